@@ -39,6 +39,25 @@ def create_app(config_name='default'):
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
     
+    # Invalidate cached dashboards when their rows change
+    from app.dashboard_cache import DashboardCache
+    DashboardCache.register_session_events()
+    
+    # Keep the per-orphanage report counters current
+    from app.report_counters import ReportCounterService
+    ReportCounterService.register_session_events()
+    
+    # Register CLI commands
+    from app.cli import forecast_cli, alerts_cli, reports_cli
+    app.cli.add_command(forecast_cli)
+    app.cli.add_command(alerts_cli)
+    app.cli.add_command(reports_cli)
+    
+    # Forecast-dedicated workers can pay the pandas/sklearn import cost at boot
+    if app.config.get('FORECAST_PRELOAD'):
+        from app.lazy_forecasting import preload_forecasting
+        preload_forecasting()
+    
     # Global error handlers
     @app.errorhandler(404)
     def not_found_error(error):
@@ -4,14 +4,23 @@ from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import PolynomialFeatures
 from sklearn.metrics import mean_absolute_error
 from datetime import datetime, date, timedelta
-from app.models import UsageLog, Inventory
+from flask import g, current_app, has_app_context
+from app.models import UsageLog, Inventory, ForecastState, ForecastAccuracy, ForecastModel
+from app.forecast_cache import ForecastCache
+from app.forecast_state import ForecastStateService, MIN_DATA_POINTS, confidence_level
+from app.forecast_models import ForecastModelService, design_matrix
+from app.usage_series import UsageSeries
+from app.stockout_simulation import StockoutSimulator
 from app import db
 
+# Method name of the intermittent-demand model
+INTERMITTENT_METHOD = 'tsb'
+
 class ForecastingEngine:
     """AI-powered forecasting engine for inventory management"""
     
     def __init__(self):
-        self.min_data_points = 5
+        self.min_data_points = MIN_DATA_POINTS
         self.default_forecast_days = 7
     
     def get_usage_data(self, orphanage_id, item_id, days_back=30):
@@ -19,42 +28,102 @@ class ForecastingEngine:
         end_date = date.today()
         start_date = end_date - timedelta(days=days_back)
         
-        usage_logs = UsageLog.get_usage_for_period(
-            orphanage_id, item_id, start_date, end_date
-        )
+        series = UsageSeries.load(orphanage_id, [item_id], start_date, end_date)
         
-        if not usage_logs:
+        if not series.has_data[0]:
             return pd.DataFrame()
         
-        # Convert to DataFrame
-        data = []
-        for log in usage_logs:
-            data.append({
-                'date': log.date,
-                'quantity_used': log.quantity_used,
-                'day_of_week': log.date.weekday(),
-                'day_number': (log.date - start_date).days
-            })
-        
-        df = pd.DataFrame(data)
-        
-        # Fill missing dates with 0 usage
-        date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-        df_complete = pd.DataFrame({'date': date_range})
-        df_complete['date'] = df_complete['date'].dt.date
-        
-        df = df_complete.merge(df, on='date', how='left')
-        df['quantity_used'] = df['quantity_used'].fillna(0)
-        df['day_of_week'] = df['date'].apply(lambda x: x.weekday())
-        df['day_number'] = df['date'].apply(lambda x: (x - start_date).days)
-        
-        return df
+        # Missing dates are already zero-filled by the series builder
+        return pd.DataFrame({
+            'date': series.dates(),
+            'quantity_used': series.values[0],
+            'day_of_week': series.day_of_week,
+            'day_number': series.day_number
+        })
     
     def predict_usage(self, orphanage_id, item_id, forecast_days=None):
         """Predict future usage for an item"""
         if forecast_days is None:
             forecast_days = self.default_forecast_days
         
+        return ForecastCache.get_or_compute(
+            orphanage_id, item_id, forecast_days,
+            lambda: self._fit_and_predict(orphanage_id, item_id, forecast_days)
+        )
+    
+    def predict_usage_stored(self, orphanage_id, item_ids, forecast_days=None):
+        """Predict usage for many items from their stored models
+        
+        Follows the same per-item path as predict_usage (selecting models
+        that are missing, stale or expired) with one query for all stored
+        models, so results match the single-item forecasts. Returns
+        {item_id: predict_usage-style dict}.
+        """
+        if forecast_days is None:
+            forecast_days = self.default_forecast_days
+        
+        models = {model.item_id: model for model in ForecastModel.query.filter(
+            ForecastModel.orphanage_id == orphanage_id,
+            ForecastModel.item_id.in_(item_ids)
+        ).all()}
+        
+        selected = False
+        for item_id in item_ids:
+            if ForecastModelService.needs_selection(models.get(item_id)):
+                models[item_id] = ForecastModelService.select(orphanage_id, item_id, self, commit=False)
+                selected = True
+        if selected:
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        
+        return {item_id: ForecastModelService.predict(models[item_id], forecast_days) for item_id in item_ids}
+    
+    def _fit_and_predict(self, orphanage_id, item_id, forecast_days):
+        """Predict forward from the item's stored model, selecting one if needed"""
+        model = ForecastModel.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        if ForecastModelService.needs_selection(model):
+            model = ForecastModelService.select(orphanage_id, item_id, self)
+        return ForecastModelService.predict(model, forecast_days)
+    
+    def select_model(self, orphanage_id, item_id):
+        """Fit the candidate models on recent usage and return the best fit
+        
+        Returns a fitted-model dict with the method, its coefficients (see
+        ForecastModel), their origin date, accuracy (in-sample RMSE, the
+        metric drift is measured in) and confidence.
+        """
+        # Backtested items only fit the method that scored best out of sample
+        backtest = ForecastAccuracy.best_for(orphanage_id, item_id)
+        selected_method = backtest.method if backtest else None
+        today = date.today()
+        
+        # Mostly-zero usage goes to the intermittent-demand model
+        if selected_method == INTERMITTENT_METHOD or (
+            selected_method is None and self._is_intermittent(orphanage_id, item_id)
+        ):
+            series = UsageSeries.load(orphanage_id, [item_id], today - timedelta(days=30), today)
+            forecast = self._predict_series(series, 1, intermittent=np.array([True]))[item_id]
+            accuracy = forecast['accuracy']
+            if forecast['method'] == INTERMITTENT_METHOD:
+                settings = self._intermittent_settings()
+                fitted = tsb_forecast(series.values, settings['alpha'], settings['beta'])[1]
+                accuracy = float(np.sqrt(np.mean((series.values - fitted) ** 2)))
+            return {
+                'method': forecast['method'],
+                'coefficients': forecast['predictions'],
+                'origin_date': today,
+                'accuracy': accuracy,
+                'confidence': forecast['confidence']
+            }
+        
+        # Items with maintained sufficient statistics skip the history scan
+        state = ForecastState.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        if state is not None and state.half_life_days == ForecastStateService._half_life():
+            return ForecastStateService.fit(state, method=selected_method, min_data_points=self.min_data_points)
+        
         df = self.get_usage_data(orphanage_id, item_id)
         
         if len(df) < self.min_data_points:
@@ -65,11 +134,11 @@ class ForecastingEngine:
                 avg_usage = 0
             
             return {
-                'predictions': [avg_usage] * forecast_days,
-                'total_predicted': avg_usage * forecast_days,
-                'confidence': 'low',
                 'method': 'average',
-                'accuracy': None
+                'coefficients': [avg_usage],
+                'origin_date': today,
+                'accuracy': None,
+                'confidence': 'low'
             }
         
         # Prepare features
@@ -78,6 +147,8 @@ class ForecastingEngine:
         
         # Try different models and pick the best one
         models = self._get_models()
+        if selected_method in models:
+            models = {selected_method: models[selected_method]}
         best_model = None
         best_score = float('inf')
         best_method = 'linear'
@@ -97,80 +168,208 @@ class ForecastingEngine:
         
         if best_model is None:
             # Fallback to simple average
-            avg_usage = df['quantity_used'].mean()
             return {
-                'predictions': [avg_usage] * forecast_days,
-                'total_predicted': avg_usage * forecast_days,
-                'confidence': 'low',
                 'method': 'average',
-                'accuracy': None
+                'coefficients': [df['quantity_used'].mean()],
+                'origin_date': today,
+                'accuracy': None,
+                'confidence': 'low'
             }
         
-        # Generate future predictions
-        last_day = df['day_number'].max()
-        future_predictions = []
-        
-        for i in range(1, forecast_days + 1):
-            future_day = last_day + i
-            future_date = date.today() + timedelta(days=i)
-            future_dow = future_date.weekday()
-            
-            prediction = best_model.predict([[future_day, future_dow]])[0]
-            future_predictions.append(max(0, prediction))  # Ensure non-negative
-        
         # Calculate confidence based on model accuracy
         confidence = self._calculate_confidence(best_score, df['quantity_used'].std())
+        rmse = float(np.sqrt(np.mean((y - best_model.predict(X)) ** 2)))
         
         return {
-            'predictions': future_predictions,
-            'total_predicted': sum(future_predictions),
-            'confidence': confidence,
             'method': best_method,
-            'accuracy': best_score
+            'coefficients': self._coefficients(best_model),
+            'origin_date': df['date'].iloc[0],  # day_number 0
+            'accuracy': rmse,
+            'confidence': confidence
         }
     
-    def predict_stockout(self, orphanage_id, item_id, forecast_days=None):
-        """Predict when an item will run out of stock"""
+    def _coefficients(self, model):
+        """Coefficients of a fitted model over the design_matrix columns"""
+        regression = model.steps[-1] if hasattr(model, 'steps') else model
+        coef = list(regression.coef_)
+        if hasattr(model, 'steps'):
+            # PolynomialFeatures already emits the constant column
+            coef[0] += regression.intercept_
+            return coef
+        return [regression.intercept_] + coef
+    
+    def predict_usage_batch(self, orphanage_id, item_ids=None, forecast_days=None, days_back=30):
+        """Predict future usage for many items of an orphanage in one pass
+        
+        Loads the usage of every requested item with a single query, builds an
+        items x days matrix and solves the linear and polynomial least-squares
+        fits for all items at once. Returns {item_id: predict_usage-style dict}.
+        """
+        if forecast_days is None:
+            forecast_days = self.default_forecast_days
+        
+        if item_ids is None:
+            item_ids = [row.item_id for row in Inventory.query.with_entities(Inventory.item_id)
+                                                              .filter_by(orphanage_id=orphanage_id)
+                                                              .all()]
+        item_ids = list(dict.fromkeys(item_ids))
+        if not item_ids:
+            return {}
+        
+        end_date = date.today()
+        start_date = end_date - timedelta(days=days_back)
+        
+        # Items x days usage matrix, zero-filled for days without logs
+        series = UsageSeries.load(orphanage_id, item_ids, start_date, end_date)
+        return self._predict_series(series, forecast_days)
+    
+    def _predict_series(self, series, forecast_days, intermittent=None):
+        """Batch-fit every item of a UsageSeries; see predict_usage_batch
+        
+        Items flagged in ``intermittent`` (by default those whose zero-day
+        ratio reaches FORECAST_INTERMITTENT_ZERO_RATIO) are forecast with TSB
+        instead of the regression models.
+        """
+        item_ids = series.item_ids
+        usage = series.values
+        has_data = series.has_data
+        n_days = series.n_days
+        
+        day_number = series.day_number
+        day_of_week = series.day_of_week
+        future_day, future_dow = self._future_features(day_number[-1], forecast_days).T
+        
+        # Fit every model for all items at once: one least-squares solve with
+        # the items as the right-hand-side columns
+        fitted_predictions = {}
+        scores = {}
+        for model_name, degree in (('linear', 1), ('polynomial', 2)):
+            X = design_matrix(day_number, day_of_week, degree)
+            coef = np.linalg.lstsq(X, usage.T, rcond=None)[0]
+            scores[model_name] = np.abs(usage.T - X @ coef).mean(axis=0)
+            fitted_predictions[model_name] = (design_matrix(future_day, future_dow, degree) @ coef).T
+        
+        # Ties go to the simpler model, matching predict_usage
+        use_polynomial = scores['polynomial'] < scores['linear']
+        best_scores = np.where(use_polynomial, scores['polynomial'], scores['linear'])
+        best_predictions = np.where(use_polynomial[:, None],
+                                    fitted_predictions['polynomial'],
+                                    fitted_predictions['linear'])
+        best_predictions = np.maximum(best_predictions, 0)  # Ensure non-negative
+        std_devs = usage.std(axis=1, ddof=1) if n_days > 1 else np.zeros(len(item_ids))
+        
+        settings = self._intermittent_settings()
+        if intermittent is None:
+            intermittent = zero_day_ratio(usage) >= settings['zero_ratio']
+        if intermittent.any():
+            rates, fitted = tsb_forecast(usage[intermittent], settings['alpha'], settings['beta'])
+            best_predictions[intermittent] = rates[:, None]
+            best_scores[intermittent] = np.abs(usage[intermittent] - fitted).mean(axis=1)
+        
+        results = {}
+        for i, item_id in enumerate(item_ids):
+            if not has_data[i] or n_days < self.min_data_points:
+                avg_usage = float(usage[i].mean()) if has_data[i] else 0
+                results[item_id] = {
+                    'predictions': [avg_usage] * forecast_days,
+                    'total_predicted': avg_usage * forecast_days,
+                    'confidence': 'low',
+                    'method': 'average',
+                    'accuracy': None
+                }
+                continue
+            
+            predictions = best_predictions[i].tolist()
+            results[item_id] = {
+                'predictions': predictions,
+                'total_predicted': sum(predictions),
+                'confidence': self._calculate_confidence(best_scores[i], std_devs[i]),
+                'method': INTERMITTENT_METHOD if intermittent[i] else 'polynomial' if use_polynomial[i] else 'linear',
+                'accuracy': float(best_scores[i])
+            }
+        
+        return results
+    
+    def slice_forecast(self, forecast, forecast_days):
+        """Derive a shorter-horizon view from an existing usage forecast
+        
+        A day's prediction does not depend on the horizon it was fitted for,
+        so the first N days of a longer forecast equal an N-day forecast.
+        """
+        if forecast is None or len(forecast['predictions']) == forecast_days:
+            return forecast
+        if len(forecast['predictions']) < forecast_days:
+            raise ValueError(
+                f"Forecast covers {len(forecast['predictions'])} days, {forecast_days} requested"
+            )
+        
+        predictions = forecast['predictions'][:forecast_days]
+        return dict(forecast, predictions=predictions, total_predicted=sum(predictions))
+    
+    def context(self, orphanage_id, item_id, horizon=30, inventory=None, forecast=None):
+        """Get the request-scoped forecast context for an item
+        
+        A precomputed ``forecast`` covering ``horizon`` days (e.g. from a
+        forecast snapshot) is used instead of fitting.
+        """
+        contexts = g.setdefault('forecast_contexts', {}) if has_app_context() else {}
+        context = contexts.get((orphanage_id, item_id))
+        if context is None or context.horizon < horizon:
+            context = ForecastContext(self, orphanage_id, item_id, horizon, inventory, forecast)
+            contexts[(orphanage_id, item_id)] = context
+        return context
+    
+    def predict_stockout(self, orphanage_id, item_id, forecast_days=None, forecast=None, inventory=None,
+                         simulate_days=None, history=None):
+        """Predict when an item will run out of stock
+        
+        Pass a precomputed ``forecast`` (covering at least ``forecast_days``)
+        and/or ``inventory`` to skip refitting and reloading them. With
+        ``simulate_days`` the Monte Carlo stockout probabilities and day
+        quantiles over that many days are added, bootstrapped from
+        ``history`` (see get_usage_history).
+        """
         if forecast_days is None:
             forecast_days = self.default_forecast_days
         
         # Get current inventory
-        inventory = Inventory.query.filter_by(
-            orphanage_id=orphanage_id,
-            item_id=item_id
-        ).first()
+        if inventory is None:
+            inventory = Inventory.query.filter_by(
+                orphanage_id=orphanage_id,
+                item_id=item_id
+            ).first()
         
         if not inventory:
             return None
         
         # Get usage prediction
-        forecast = self.predict_usage(orphanage_id, item_id, forecast_days)
+        if forecast is None:
+            forecast = self.predict_usage(orphanage_id, item_id, max(forecast_days, simulate_days or 0))
+        simulated_forecast = self.slice_forecast(forecast, simulate_days) if simulate_days else None
+        forecast = self.slice_forecast(forecast, forecast_days)
         
         current_stock = inventory.quantity if inventory.quantity is not None else 0
         daily_predictions = forecast['predictions']
         
         # Calculate day-by-day stock levels
-        stock_levels = []
-        running_stock = current_stock
+        running_stock, stockout_day = stock_projection(current_stock, daily_predictions)
+        stockout_mask = running_stock <= 0
+        today = date.today()
         
-        for day, predicted_usage in enumerate(daily_predictions, 1):
-            running_stock -= predicted_usage
-            stock_levels.append({
+        stock_levels = [
+            {
                 'day': day,
-                'date': date.today() + timedelta(days=day),
+                'date': today + timedelta(days=day),
                 'predicted_usage': predicted_usage,
-                'remaining_stock': max(0, running_stock),
-                'stockout': running_stock <= 0
-            })
-        
-        # Find stockout day
-        stockout_day = None
-        for level in stock_levels:
-            if level['stockout']:
-                stockout_day = level['day']
-                break
+                'remaining_stock': max(0, remaining),
+                'stockout': stockout
+            }
+            for day, (predicted_usage, remaining, stockout) in enumerate(
+                zip(daily_predictions, running_stock.tolist(), stockout_mask.tolist()), 1
+            )
+        ]
         
-        return {
+        prediction = {
             'current_stock': current_stock,
             'stockout_day': stockout_day,
             'stockout_date': date.today() + timedelta(days=stockout_day) if stockout_day else None,
@@ -178,20 +377,47 @@ class ForecastingEngine:
             'forecast_confidence': forecast['confidence'],
             'total_predicted_usage': forecast['total_predicted']
         }
+        
+        if simulate_days:
+            # Probabilistic view around the point forecast
+            if history is None:
+                history = self.get_usage_history(orphanage_id, item_id)
+            simulator = self._stockout_simulator(seed=(orphanage_id, item_id, today.toordinal()))
+            probabilities, quantile_days = simulator.simulate(
+                [simulated_forecast['predictions']], history, [current_stock]
+            )
+            prediction.update(simulator.summarize(probabilities[0], quantile_days[0]))
+        
+        return prediction
     
-    def get_reorder_recommendation(self, orphanage_id, item_id):
-        """Get reorder recommendations for an item"""
-        inventory = Inventory.query.filter_by(
-            orphanage_id=orphanage_id,
-            item_id=item_id
-        ).first()
+    def get_usage_history(self, orphanage_id, item_id, days_back=30):
+        """Daily usage of an item over the last ``days_back`` days as a 1 x days array"""
+        end_date = date.today()
+        return UsageSeries.load(orphanage_id, [item_id], end_date - timedelta(days=days_back), end_date).values
+    
+    def get_reorder_recommendation(self, orphanage_id, item_id, forecast=None, inventory=None):
+        """Get reorder recommendations for an item
+        
+        Accepts a precomputed ``forecast`` covering at least 30 days and the
+        item's ``inventory`` row so callers can chain a single fit.
+        """
+        if inventory is None:
+            inventory = Inventory.query.filter_by(
+                orphanage_id=orphanage_id,
+                item_id=item_id
+            ).first()
         
         if not inventory:
             return None
         
         # Get 30-day usage forecast
-        forecast = self.predict_usage(orphanage_id, item_id, 30)
-        stockout_prediction = self.predict_stockout(orphanage_id, item_id, 30) # This can be None
+        if forecast is None:
+            forecast = self.predict_usage(orphanage_id, item_id, 30)
+        else:
+            forecast = self.slice_forecast(forecast, 30)
+        stockout_prediction = self.predict_stockout(
+            orphanage_id, item_id, 30, forecast=forecast, inventory=inventory
+        ) # This can be None
         
         # Calculate recommended order quantity
         monthly_usage = forecast['total_predicted']
@@ -227,6 +453,40 @@ class ForecastingEngine:
             'confidence': forecast['confidence']
         }
     
+    def _future_features(self, last_day, forecast_days):
+        """Feature matrix [day_number, day_of_week] for the next forecast_days days"""
+        offsets = np.arange(1, forecast_days + 1)
+        return np.column_stack([
+            last_day + offsets,
+            (date.today().weekday() + offsets) % 7
+        ])
+    
+    def _intermittent_settings(self):
+        config = current_app.config if has_app_context() else {}
+        return {
+            'zero_ratio': config.get('FORECAST_INTERMITTENT_ZERO_RATIO', 0.5),
+            'alpha': config.get('FORECAST_TSB_ALPHA', 0.1),
+            'beta': config.get('FORECAST_TSB_BETA', 0.1)
+        }
+    
+    def _is_intermittent(self, orphanage_id, item_id, days_back=30):
+        """Whether an item's zero-usage days reach the intermittent-demand threshold"""
+        end_date = date.today()
+        usage_days = db.session.query(db.func.count(db.distinct(UsageLog.date))).filter(
+            UsageLog.orphanage_id == orphanage_id,
+            UsageLog.item_id == item_id,
+            UsageLog.date >= end_date - timedelta(days=days_back),
+            UsageLog.date <= end_date,
+            UsageLog.quantity_used > 0
+        ).scalar()
+        if not usage_days:
+            return False
+        return 1 - usage_days / (days_back + 1) >= self._intermittent_settings()['zero_ratio']
+    
+    def _stockout_simulator(self, seed=None):
+        n_paths = current_app.config.get('FORECAST_SIMULATION_PATHS', 2000) if has_app_context() else 2000
+        return StockoutSimulator(n_paths=n_paths, seed=seed)
+    
     def _get_models(self):
         """Get different regression models to try"""
         return {
@@ -236,17 +496,107 @@ class ForecastingEngine:
     
     def _calculate_confidence(self, mae, std_dev):
         """Calculate confidence level based on model accuracy"""
-        if std_dev == 0:
-            return 'medium'
-        
-        relative_error = mae / std_dev if std_dev > 0 else 1
-        
-        if relative_error < 0.3:
-            return 'high'
-        elif relative_error < 0.6:
-            return 'medium'
-        else:
-            return 'low'
+        return confidence_level(mae, std_dev)
+
+class ForecastContext:
+    """Request-scoped forecast for one item
+    
+    Fits the usage models once for the longest horizon needed and derives
+    the shorter usage, stockout and reorder views from that single fit.
+    """
+    
+    def __init__(self, engine, orphanage_id, item_id, horizon=30, inventory=None, forecast=None):
+        self.engine = engine
+        self.orphanage_id = orphanage_id
+        self.item_id = item_id
+        self.horizon = horizon
+        self._inventory = inventory
+        self._forecast = forecast
+        self._history = None
+    
+    @property
+    def inventory(self):
+        if self._inventory is None:
+            self._inventory = Inventory.query.filter_by(
+                orphanage_id=self.orphanage_id,
+                item_id=self.item_id
+            ).first()
+        return self._inventory
+    
+    @property
+    def forecast(self):
+        if self._forecast is None:
+            self._forecast = self.engine.predict_usage(self.orphanage_id, self.item_id, self.horizon)
+        return self._forecast
+    
+    @property
+    def history(self):
+        if self._history is None:
+            self._history = self.engine.get_usage_history(self.orphanage_id, self.item_id)
+        return self._history
+    
+    def usage(self, forecast_days=None):
+        """Usage forecast for the first ``forecast_days`` days"""
+        if forecast_days is None:
+            forecast_days = self.engine.default_forecast_days
+        return self.engine.slice_forecast(self.forecast, forecast_days)
+    
+    def stockout(self, forecast_days=None):
+        """Stockout prediction over the first ``forecast_days`` days
+        
+        The Monte Carlo view always covers the context's full horizon.
+        """
+        return self.engine.predict_stockout(
+            self.orphanage_id, self.item_id, forecast_days,
+            forecast=self.forecast, inventory=self.inventory,
+            simulate_days=self.horizon, history=self.history
+        )
+    
+    def reorder(self):
+        """Reorder recommendation derived from the shared fit"""
+        return self.engine.get_reorder_recommendation(
+            self.orphanage_id, self.item_id,
+            forecast=self.forecast, inventory=self.inventory
+        )
+
+def stock_projection(current_stock, daily_predictions):
+    """Stock left after each forecast day and the first day it runs out
+    
+    Returns (running_stock, stockout_day) where stockout_day is 1-based, or
+    None when the stock lasts the whole forecast.
+    """
+    running_stock = current_stock - np.cumsum(daily_predictions)
+    stockout_mask = running_stock <= 0
+    stockout_day = int(stockout_mask.argmax()) + 1 if stockout_mask.any() else None
+    return running_stock, stockout_day
+
+def zero_day_ratio(values):
+    """Share of days without usage for every row of an items x days matrix"""
+    return (np.atleast_2d(values) <= 0).mean(axis=1)
+
+def tsb_forecast(values, alpha=0.1, beta=0.1):
+    """Teunter-Syntetos-Babai intermittent-demand forecast for every row
+    
+    The demand probability p is smoothed every day and the demand size z
+    only on days with usage; the forecast is the flat daily rate p * z. The
+    recurrence runs over days with all items updated at once. Returns
+    (rates, fitted) where fitted holds the one-step-ahead rate of each day.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    occurred = values > 0
+    
+    # Start from the window's averages rather than the first observation
+    p = occurred.mean(axis=1)
+    n_occurred = occurred.sum(axis=1)
+    z = np.divide(np.where(occurred, values, 0).sum(axis=1), n_occurred,
+                  out=np.zeros(len(values)), where=n_occurred > 0)
+    
+    fitted = np.empty_like(values)
+    for t in range(values.shape[1]):
+        fitted[:, t] = p * z
+        p = p + beta * (occurred[:, t] - p)
+        z = np.where(occurred[:, t], z + alpha * (values[:, t] - z), z)
+    return p * z, fitted
 
 def make_pipeline(*steps):
     """Simple pipeline implementation"""
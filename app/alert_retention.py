@@ -0,0 +1,113 @@
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from app.models import Alert, AlertArchive
+from app.job_scheduler import JobScheduler
+from app import db
+
+ARCHIVE_JOB = 'alert_archive'
+
+class AlertRetentionService:
+    """Moves old read alerts out of the live alerts table"""
+    
+    @staticmethod
+    def archive(retention_days=None, chunk_size=None, before_write=None):
+        """Archive read alerts older than the retention window, in chunks
+        
+        Each chunk is folded into alerts_archive (one row per orphanage,
+        item and alert type, counting occurrences) and deleted from alerts
+        in its own transaction, so a large backlog never holds long locks.
+        ``before_write`` is called before each chunk is folded in (the
+        scheduler renews its lease there).
+        """
+        config = current_app.config
+        retention_days = retention_days if retention_days is not None else config.get('ALERT_RETENTION_DAYS', 90)
+        chunk_size = chunk_size or config.get('ALERT_ARCHIVE_CHUNK_SIZE', 1000)
+        started = time.perf_counter()
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        
+        archived = created = updated = chunks = 0
+        while True:
+            rows = db.session.query(
+                Alert.id, Alert.orphanage_id, Alert.item_id, Alert.alert_type, Alert.title, Alert.message, Alert.created_at
+            ).filter(Alert.is_read == True, Alert.created_at < cutoff)\
+             .order_by(Alert.id).limit(chunk_size).all()
+            if not rows:
+                break
+            
+            if before_write:
+                before_write()
+            
+            # Collapse the chunk's repeats before touching the archive
+            groups = {}
+            for alert_id, orphanage_id, item_id, alert_type, title, message, created_at in rows:
+                group = groups.setdefault((orphanage_id, item_id, alert_type), {
+                    'count': 0, 'first': created_at, 'last': created_at, 'title': title, 'message': message
+                })
+                group['count'] += 1
+                group['first'] = min(group['first'], created_at)
+                if created_at >= group['last']:
+                    group['last'], group['title'], group['message'] = created_at, title, message
+            
+            existing = {
+                (entry.orphanage_id, entry.item_id, entry.alert_type): entry
+                for entry in AlertArchive.query.filter(
+                    AlertArchive.orphanage_id.in_({key[0] for key in groups}),
+                    AlertArchive.alert_type.in_({key[2] for key in groups})
+                ).all()
+            }
+            
+            new_rows = []
+            for (orphanage_id, item_id, alert_type), group in groups.items():
+                entry = existing.get((orphanage_id, item_id, alert_type))
+                if entry is None:
+                    new_rows.append({
+                        'orphanage_id': orphanage_id,
+                        'item_id': item_id,
+                        'alert_type': alert_type,
+                        'title': group['title'],
+                        'message': group['message'],
+                        'occurrence_count': group['count'],
+                        'first_created_at': group['first'],
+                        'last_created_at': group['last'],
+                        'archived_at': datetime.utcnow()
+                    })
+                    continue
+                
+                entry.occurrence_count += group['count']
+                entry.first_created_at = min(entry.first_created_at or group['first'], group['first'])
+                if entry.last_created_at is None or group['last'] >= entry.last_created_at:
+                    entry.last_created_at, entry.title, entry.message = group['last'], group['title'], group['message']
+                entry.archived_at = datetime.utcnow()
+                updated += 1
+            
+            try:
+                if new_rows:
+                    db.session.bulk_insert_mappings(AlertArchive, new_rows)
+                Alert.query.filter(Alert.id.in_([row[0] for row in rows])).delete(synchronize_session=False)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            
+            archived += len(rows)
+            created += len(new_rows)
+            chunks += 1
+        
+        return {
+            'alerts_archived': archived,
+            'archive_rows_created': created,
+            'archive_rows_updated': updated,
+            'chunks': chunks,
+            'retention_days': retention_days,
+            'elapsed_seconds': round(time.perf_counter() - started, 2)
+        }
+
+class AlertRetentionScheduler(JobScheduler):
+    """Runs the alert archival every ALERT_ARCHIVE_INTERVAL on one worker"""
+    job_name = ARCHIVE_JOB
+    interval_setting = 'ALERT_ARCHIVE_INTERVAL'
+    default_interval = timedelta(days=1)
+    
+    def run(self, last_run_at):
+        return AlertRetentionService.archive(before_write=self.renew_lease)
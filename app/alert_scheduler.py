@@ -0,0 +1,21 @@
+from datetime import timedelta
+from app.job_scheduler import JobScheduler
+
+ALERT_JOB = 'alert_check'
+
+class AlertScheduler(JobScheduler):
+    """Periodic incremental alert checks, run by at most one worker at a time
+    
+    Each run only evaluates inventory changed since the previous run's
+    watermark or whose expiry date crossed an alert threshold since then.
+    """
+    job_name = ALERT_JOB
+    interval_setting = 'ALERT_CHECK_INTERVAL'
+    default_interval = timedelta(hours=6)
+    
+    def run(self, last_run_at):
+        from app.services import InventoryService
+        
+        result = InventoryService.evaluate_alerts(changed_since=last_run_at, before_write=self.renew_lease)
+        result['full_scan'] = last_run_at is None
+        return result
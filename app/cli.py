@@ -0,0 +1,164 @@
+import time
+import click
+from flask.cli import AppGroup
+
+forecast_cli = AppGroup('forecast', help='Forecasting maintenance commands.')
+alerts_cli = AppGroup('alerts', help='Alert background jobs.')
+reports_cli = AppGroup('reports', help='Report maintenance commands.')
+
+@forecast_cli.command('rebuild-state')
+@click.option('--orphanage-id', type=int, default=None, help='Only rebuild items of this orphanage.')
+def rebuild_state(orphanage_id):
+    """Recompute incremental forecast state from the full usage history"""
+    from app.forecast_state import ForecastStateService
+    from app.forecast_cache import ForecastCache
+    from app.models import ForecastState
+    
+    started = time.perf_counter()
+    rebuilt = ForecastStateService.rebuild_all(orphanage_id)
+    
+    # Forecasts cached from the old state are stale now
+    query = ForecastState.query
+    if orphanage_id:
+        query = query.filter_by(orphanage_id=orphanage_id)
+    for state in query.all():
+        ForecastCache.invalidate(state.orphanage_id, state.item_id)
+    
+    click.echo(f'Rebuilt forecast state for {rebuilt} items in {time.perf_counter() - started:.2f}s')
+
+@forecast_cli.command('precompute')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count).')
+@click.option('--chunk-size', type=int, default=50, help='Inventory rows per worker task.')
+def precompute(workers, chunk_size):
+    """Precompute forecasts for every inventory row into forecast_snapshots"""
+    from app.forecast_snapshots import ForecastSnapshotService
+    
+    result = ForecastSnapshotService.precompute(workers=workers, chunk_size=chunk_size)
+    click.echo(
+        f"Wrote {result['snapshots_written']} of {result['inventory_rows']} forecast snapshots "
+        f"with {result['workers']} workers in {result['elapsed_seconds']}s "
+        f"(pruned {result['snapshots_pruned']} old snapshots)"
+    )
+
+@forecast_cli.command('backtest')
+@click.option('--orphanage-id', type=int, default=None, help='Only backtest items of this orphanage.')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count).')
+def backtest(orphanage_id, workers):
+    """Rolling-origin backtest of every model, storing MAE/MAPE per item"""
+    from app.forecast_backtest import ForecastBacktestService
+    
+    result = ForecastBacktestService.run(orphanage_id=orphanage_id, workers=workers)
+    click.echo(
+        f"Backtested {result['items']} items ({result['results_written']} results) "
+        f"in {result['elapsed_seconds']}s"
+    )
+
+@forecast_cli.command('seasonality')
+@click.option('--full', is_flag=True, help='Recompute every profile instead of only items with new usage.')
+def seasonality(full):
+    """Refresh the weekday and monthly seasonality profiles from usage logs"""
+    from app.seasonality import SeasonalityService
+    
+    started = time.perf_counter()
+    result = SeasonalityService.refresh(full=full)
+    click.echo(
+        f"Refreshed {result['profiles_refreshed']} seasonality profiles "
+        f"({'full' if result['full'] else 'incremental'}) in {time.perf_counter() - started:.2f}s"
+    )
+
+@forecast_cli.command('select-models')
+@click.option('--orphanage-id', type=int, default=None, help='Only select models for items of this orphanage.')
+@click.option('--all', 'force', is_flag=True, help='Reselect every item, not only stale or expired ones.')
+def select_models(orphanage_id, force):
+    """Rerun model selection for items whose stored model drifted or expired"""
+    from app.ai_forecasting import forecasting_engine
+    from app.forecast_models import ForecastModelService
+    from app.forecast_cache import ForecastCache
+    from app.models import ForecastModel
+    
+    started = time.perf_counter()
+    selected = ForecastModelService.reselect(forecasting_engine, orphanage_id, force=force)
+    
+    query = ForecastModel.query
+    if orphanage_id:
+        query = query.filter_by(orphanage_id=orphanage_id)
+    for model in query.all():
+        ForecastCache.invalidate(model.orphanage_id, model.item_id)
+    
+    click.echo(f'Selected models for {selected} items in {time.perf_counter() - started:.2f}s')
+
+@forecast_cli.command('rebuild-risk')
+@click.option('--orphanage-id', type=int, default=None, help='Only rebuild items of this orphanage.')
+def rebuild_risk(orphanage_id):
+    """Recompute the stockout-risk index for every inventory item"""
+    from app.stockout_risk import StockoutRiskService
+    
+    started = time.perf_counter()
+    rebuilt = StockoutRiskService.rebuild(orphanage_id)
+    click.echo(f'Rebuilt stockout risk for {rebuilt} items in {time.perf_counter() - started:.2f}s')
+
+def _report_alert_check(result):
+    click.echo(
+        f"Created {result['alerts_created']} alerts "
+        f"({', '.join(f'{count} {alert_type}' for alert_type, count in result['by_type'].items())}) "
+        f"in {result['elapsed_seconds']}s ({'full' if result['full_scan'] else 'incremental'} scan)"
+    )
+
+def _report_risk_rebuild(result):
+    click.echo(f"Rebuilt stockout risk for {result['items_rebuilt']} items in {result['elapsed_seconds']}s")
+
+def _report_archive(result):
+    click.echo(
+        f"Archived {result['alerts_archived']} read alerts older than {result['retention_days']} days "
+        f"in {result['chunks']} chunks ({result['archive_rows_created']} archive rows created, "
+        f"{result['archive_rows_updated']} updated) in {result['elapsed_seconds']}s"
+    )
+
+@alerts_cli.command('worker')
+@click.option('--once', is_flag=True, help='Run each job once (if due) and exit.')
+@click.option('--force', is_flag=True, help='With --once, run even if the interval has not elapsed.')
+@click.option('--poll-seconds', type=int, default=None, help='Seconds between due checks (default: ALERT_SCHEDULER_POLL_SECONDS).')
+def alerts_worker(once, force, poll_seconds):
+    """Run alert checks every ALERT_CHECK_INTERVAL, archival every ALERT_ARCHIVE_INTERVAL
+    and the stockout-risk rebuild every FORECAST_RISK_REBUILD_INTERVAL"""
+    from app.alert_scheduler import AlertScheduler
+    from app.alert_retention import AlertRetentionScheduler
+    from app.stockout_risk import StockoutRiskScheduler
+    from app.job_scheduler import run_schedulers
+    
+    reporters = {
+        AlertScheduler: _report_alert_check,
+        AlertRetentionScheduler: _report_archive,
+        StockoutRiskScheduler: _report_risk_rebuild
+    }
+    schedulers = [AlertScheduler(), AlertRetentionScheduler(), StockoutRiskScheduler()]
+    if once:
+        for scheduler in schedulers:
+            result = scheduler.run_if_due(force=force)
+            if result is None:
+                click.echo(f'Job {scheduler.job_name} not due or running on another worker')
+            else:
+                reporters[type(scheduler)](result)
+        return
+    
+    click.echo(f'Alert worker {schedulers[0].owner} started')
+    run_schedulers(schedulers, poll_seconds, lambda scheduler, result: reporters[type(scheduler)](result))
+
+@alerts_cli.command('archive')
+@click.option('--retention-days', type=int, default=None, help='Archive read alerts older than this (default: ALERT_RETENTION_DAYS).')
+@click.option('--chunk-size', type=int, default=None, help='Alerts moved per transaction (default: ALERT_ARCHIVE_CHUNK_SIZE).')
+def alerts_archive(retention_days, chunk_size):
+    """Move old read alerts to alerts_archive, collapsing repeats"""
+    from app.alert_retention import AlertRetentionService
+    
+    _report_archive(AlertRetentionService.archive(retention_days=retention_days, chunk_size=chunk_size))
+
+@reports_cli.command('rebuild-counters')
+@click.option('--orphanage-id', type=int, default=None, help='Only rebuild the counters of this orphanage.')
+def rebuild_counters(orphanage_id):
+    """Recount the per-orphanage report counters from inventory and usage logs"""
+    from app.report_counters import ReportCounterService
+    
+    started = time.perf_counter()
+    rebuilt = ReportCounterService.rebuild(orphanage_id)
+    click.echo(f'Rebuilt report counters for {rebuilt} orphanages in {time.perf_counter() - started:.2f}s')
@@ -0,0 +1,128 @@
+"""Dashboard cache on top of the Flask-Caching extension, invalidated on commit"""
+import time
+from datetime import date
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import cache
+
+# Version bumped for every orphanage when a change can't be attributed to one
+ALL_ORPHANAGES = '*'
+
+class DashboardCache:
+    """Caches serialized dashboard data per orphanage
+    
+    Commits that change an orphanage's inventory, usage logs, alerts or the
+    orphanage itself bump its dashboard version. A stale entry keeps being
+    served while the single request that wins the refresh lock recomputes
+    it (stale-while-revalidate), so a burst of requests after a write
+    triggers one recomputation.
+    """
+    
+    @staticmethod
+    def _version_key(orphanage_id):
+        return f'dashboard_version:{orphanage_id}'
+    
+    @staticmethod
+    def _get_version_part(orphanage_id):
+        key = DashboardCache._version_key(orphanage_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), timeout=0)
+            version = cache.get(key)
+        return version
+    
+    @staticmethod
+    def get_version(orphanage_id):
+        """Get the current dashboard version of an orphanage"""
+        return (DashboardCache._get_version_part(orphanage_id), DashboardCache._get_version_part(ALL_ORPHANAGES))
+    
+    @staticmethod
+    def invalidate(orphanage_id=ALL_ORPHANAGES):
+        """Mark an orphanage's cached dashboard (or every dashboard) as stale"""
+        cache.set(DashboardCache._version_key(orphanage_id), time.time_ns(), timeout=0)
+    
+    @staticmethod
+    def get_or_compute(orphanage_id, compute):
+        """Return the cached dashboard, recomputing it at most once per change"""
+        version = DashboardCache.get_version(orphanage_id)
+        # Expiry counts depend on the date, so it is part of the key too
+        key = f'dashboard:{orphanage_id}:{date.today().isoformat()}'
+        
+        entry = cache.get(key)
+        if entry is not None:
+            if entry['version'] == version:
+                return entry['data']
+            
+            # Stale: only the lock holder recomputes, everyone else gets the old data
+            lock_key = f'dashboard_refresh:{orphanage_id}'
+            if not cache.add(lock_key, True, timeout=current_app.config.get('DASHBOARD_REFRESH_LOCK_TIMEOUT', 30)):
+                return entry['data']
+            try:
+                return DashboardCache._store(key, version, compute())
+            finally:
+                cache.delete(lock_key)
+        
+        return DashboardCache._store(key, version, compute())
+    
+    @staticmethod
+    def _store(key, version, data):
+        if data is not None:
+            cache.set(key, {'version': version, 'data': data},
+                      timeout=current_app.config.get('DASHBOARD_CACHE_TIMEOUT', 300))
+        return data
+    
+    @staticmethod
+    def _changed_orphanages(session, instances):
+        from sqlalchemy import inspect
+        from app.models import Inventory, UsageLog, Alert, Orphanage, Item
+        
+        changed = set()
+        for instance in instances:
+            if isinstance(instance, (Inventory, UsageLog, Alert)):
+                changed.add(instance.orphanage_id)
+                # A row moved to another orphanage changes both dashboards
+                changed.update(inspect(instance).attrs.orphanage_id.history.deleted)
+            elif isinstance(instance, Orphanage):
+                changed.add(instance.id)
+            elif isinstance(instance, Item):
+                changed.add(ALL_ORPHANAGES)
+        return changed
+    
+    @staticmethod
+    def _after_flush(session, flush_context):
+        dirty = [instance for instance in session.dirty if session.is_modified(instance)]
+        changed = DashboardCache._changed_orphanages(session, list(session.new) + dirty + list(session.deleted))
+        if changed:
+            session.info.setdefault('dashboard_changes', set()).update(changed)
+    
+    @staticmethod
+    def _do_orm_execute(orm_execute_state):
+        # Bulk INSERT/UPDATE/DELETE statements don't go through the flush
+        if orm_execute_state.is_select:
+            return
+        tracked = {'inventory', 'usage_logs', 'alerts', 'orphanages', 'items'}
+        if any(mapper.local_table.name in tracked for mapper in orm_execute_state.all_mappers):
+            orm_execute_state.session.info.setdefault('dashboard_changes', set()).add(ALL_ORPHANAGES)
+    
+    @staticmethod
+    def _after_commit(session):
+        changed = session.info.pop('dashboard_changes', None)
+        if not changed or not has_app_context():
+            return
+        for orphanage_id in changed:
+            DashboardCache.invalidate(orphanage_id)
+    
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop('dashboard_changes', None)
+    
+    @staticmethod
+    def register_session_events():
+        """Hook dashboard invalidation into every SQLAlchemy session (idempotent)"""
+        if event.contains(Session, 'after_commit', DashboardCache._after_commit):
+            return
+        event.listen(Session, 'after_flush', DashboardCache._after_flush)
+        event.listen(Session, 'do_orm_execute', DashboardCache._do_orm_execute)
+        event.listen(Session, 'after_commit', DashboardCache._after_commit)
+        event.listen(Session, 'after_rollback', DashboardCache._after_rollback)
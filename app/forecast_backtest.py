@@ -0,0 +1,234 @@
+import time
+import numpy as np
+from datetime import date, datetime, timedelta
+from flask import current_app
+from app.ai_forecasting import forecasting_engine, design_matrix, tsb_forecast, INTERMITTENT_METHOD
+from app.models import Inventory, ForecastAccuracy, ForecastModel, ForecastState
+from app.forecast_cache import ForecastCache
+from app.forecast_state import ForecastStateService
+from app.usage_series import UsageSeries
+from app.worker_pool import map_in_workers
+from app import db
+
+# Least-squares degree of the engine's regression models, so they can be
+# fitted for every item and cutoff in one batched solve
+REGRESSION_DEGREES = {'linear': 1, 'polynomial': 2}
+
+# Extra history loaded for items served by their ForecastState, in half-lives
+# of its decay (older days weigh in at under 1/16)
+STATE_LOOKBACK_HALF_LIVES = 4
+
+class ForecastBacktestService:
+    """Rolling-origin backtesting of the engine's models and its stored results
+    
+    Regressions are scored the way each item is actually served: over the
+    recent window, or as the decayed ForecastState fit for items with state.
+    """
+    
+    @staticmethod
+    def _settings():
+        config = current_app.config
+        return {
+            'train_days': config.get('FORECAST_BACKTEST_TRAIN_DAYS', 31),
+            'horizon': config.get('FORECAST_BACKTEST_HORIZON_DAYS', 7),
+            'n_cutoffs': config.get('FORECAST_BACKTEST_CUTOFFS', 8),
+            'step': config.get('FORECAST_BACKTEST_STEP_DAYS', 7)
+        }
+    
+    @staticmethod
+    def backtest_series(series, train_days=31, horizon=7, n_cutoffs=8, step=7,
+                        state_first_day=None, half_life=None):
+        """Backtest every model of the engine on every item of a UsageSeries
+        
+        Each cutoff c trains on the ``train_days`` days before c (the same
+        window the live forecast uses) and scores the next ``horizon`` days.
+        Items served by their ForecastState have a non-negative index in
+        ``state_first_day`` (the series column their state starts at); their
+        regressions are scored as the state fits them instead, decay-weighted
+        with ``half_life`` over every day before c. All cutoffs and items are
+        evaluated together. Returns ({method: (mae, mape)}, n_cutoffs) with
+        per-item arrays; mape is NaN for items without any non-zero usage in
+        the test windows.
+        """
+        n_items, n_days = series.values.shape
+        cutoffs = np.array([c for c in (n_days - horizon - k * step for k in range(n_cutoffs))
+                            if c >= train_days])
+        if n_items == 0 or len(cutoffs) == 0:
+            return {}, 0
+        
+        # (cutoffs, days) column indices into the series
+        train_idx = cutoffs[:, None] - train_days + np.arange(train_days)
+        test_idx = cutoffs[:, None] + np.arange(horizon)
+        start_weekday = series.start_date.weekday()
+        
+        # (cutoffs, days, items) usage for training and testing
+        y_train = series.values[:, train_idx].transpose(1, 2, 0)
+        actual = series.values[:, test_idx].transpose(1, 2, 0)
+        
+        # Day numbers restart at 0 for each training window, as in get_usage_data
+        train_day = np.broadcast_to(np.arange(train_days), train_idx.shape)
+        test_day = np.broadcast_to(train_days + np.arange(horizon), test_idx.shape)
+        train_dow = (start_weekday + train_idx) % 7
+        test_dow = (start_weekday + test_idx) % 7
+        
+        methods = list(forecasting_engine._get_models()) + [INTERMITTENT_METHOD]
+        results = {}
+        for method in methods:
+            if method == INTERMITTENT_METHOD:
+                # One recurrence over every (cutoff, item) training window
+                settings = forecasting_engine._intermittent_settings()
+                windows = y_train.transpose(0, 2, 1).reshape(-1, train_days)
+                rates = tsb_forecast(windows, settings['alpha'], settings['beta'])[0]
+                predicted = np.broadcast_to(rates.reshape(len(cutoffs), 1, n_items), actual.shape)
+            else:
+                degree = REGRESSION_DEGREES[method]
+                X_train = design_matrix(train_day.ravel(), train_dow.ravel(), degree).reshape(len(cutoffs), train_days, -1)
+                X_test = design_matrix(test_day.ravel(), test_dow.ravel(), degree).reshape(len(cutoffs), horizon, -1)
+                coef = np.linalg.pinv(X_train) @ y_train
+                predicted = X_test @ coef
+                
+                if state_first_day is not None and (np.asarray(state_first_day) >= 0).any():
+                    served = np.asarray(state_first_day) >= 0
+                    predicted[:, :, served] = ForecastBacktestService._state_predictions(
+                        series.values[served], np.asarray(state_first_day)[served],
+                        cutoffs, horizon, start_weekday, degree, half_life
+                    )
+            
+            errors = np.abs(np.maximum(predicted, 0) - actual)
+            mae = errors.mean(axis=(0, 1))
+            
+            nonzero = actual > 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ape_sum = np.where(nonzero, errors / np.where(nonzero, actual, 1), 0).sum(axis=(0, 1))
+                mape = 100 * ape_sum / nonzero.sum(axis=(0, 1))
+            results[method] = (mae, mape)
+        
+        return results, len(cutoffs)
+    
+    @staticmethod
+    def _state_predictions(values, first_day, cutoffs, horizon, start_weekday, degree, half_life):
+        """(cutoffs, horizon, items) forecasts of the ForecastState fit at each cutoff
+        
+        Mirrors ForecastStateService.fit: a least-squares fit over the
+        zero-filled days from the item's first day up to the cutoff, weighted
+        by the state's decay with day numbers counted from the last training day.
+        """
+        decay = ForecastStateService._decay(half_life)
+        days = np.arange(values.shape[1])
+        day_of_week = (start_weekday + days) % 7
+        
+        predicted = np.empty((len(cutoffs), horizon, len(values)))
+        for k, cutoff in enumerate(cutoffs):
+            u = days[:cutoff] - (cutoff - 1)
+            X = design_matrix(u, day_of_week[:cutoff], degree)
+            weights = (decay ** -u) * (days[:cutoff] >= first_day[:, None])  # items x days
+            
+            A = np.einsum('id,dj,dk->ijk', weights, X, X)
+            b = np.einsum('id,dj,id->ij', weights, X, values[:, :cutoff])
+            coef = (np.linalg.pinv(A) @ b[:, :, None])[:, :, 0]
+            
+            X_test = design_matrix(np.arange(1, horizon + 1), (start_weekday + cutoff + np.arange(horizon)) % 7, degree)
+            predicted[k] = X_test @ coef.T
+        return predicted
+    
+    @staticmethod
+    def backtest_items(orphanage_id, item_ids, settings):
+        """Backtest items of one orphanage and return ForecastAccuracy rows"""
+        end_date = date.today() - timedelta(days=1)  # Only complete days
+        history = settings['train_days'] + (settings['n_cutoffs'] - 1) * settings['step'] + settings['horizon']
+        
+        # Items with a current state are forecast from it (see select_model)
+        half_life = ForecastStateService._half_life()
+        first_dates = dict(db.session.query(ForecastState.item_id, ForecastState.first_date).filter(
+            ForecastState.orphanage_id == orphanage_id,
+            ForecastState.item_id.in_(item_ids),
+            ForecastState.half_life_days == half_life
+        ).all())
+        if first_dates:
+            history += int(np.ceil(STATE_LOOKBACK_HALF_LIVES * half_life))
+        
+        start_date = end_date - timedelta(days=history - 1)
+        series = UsageSeries.load(orphanage_id, item_ids, start_date, end_date)
+        state_first_day = np.array([
+            max((first_dates[item_id] - start_date).days, 0) if first_dates.get(item_id) else -1
+            for item_id in series.item_ids
+        ])
+        
+        results, n_cutoffs = ForecastBacktestService.backtest_series(
+            series, state_first_day=state_first_day, half_life=half_life, **settings
+        )
+        computed_at = datetime.utcnow()
+        rows = []
+        for method, (mae, mape) in results.items():
+            for i, item_id in enumerate(series.item_ids):
+                if not series.has_data[i]:
+                    continue
+                rows.append({
+                    'orphanage_id': orphanage_id,
+                    'item_id': item_id,
+                    'method': method,
+                    'mae': float(mae[i]),
+                    'mape': float(mape[i]) if np.isfinite(mape[i]) else None,
+                    'n_cutoffs': n_cutoffs,
+                    'horizon_days': settings['horizon'],
+                    'computed_at': computed_at
+                })
+        return rows
+    
+    @staticmethod
+    def run(orphanage_id=None, workers=None, chunk_size=500):
+        """Backtest the whole catalog in parallel and persist MAE/MAPE per item and model"""
+        started = time.perf_counter()
+        settings = ForecastBacktestService._settings()
+        
+        query = Inventory.query.with_entities(Inventory.orphanage_id, Inventory.item_id)
+        if orphanage_id:
+            query = query.filter_by(orphanage_id=orphanage_id)
+        
+        items_by_orphanage = {}
+        for inv_orphanage_id, inv_item_id in query.order_by(Inventory.orphanage_id, Inventory.item_id).all():
+            items_by_orphanage.setdefault(inv_orphanage_id, []).append(inv_item_id)
+        
+        tasks = [
+            (inv_orphanage_id, item_ids[i:i + chunk_size], settings)
+            for inv_orphanage_id, item_ids in items_by_orphanage.items()
+            for i in range(0, len(item_ids), chunk_size)
+        ]
+        
+        rows = []
+        for task_rows in map_in_workers(ForecastBacktestService.backtest_items, tasks, workers=workers):
+            rows.extend(task_rows)
+        
+        try:
+            stale = ForecastAccuracy.query
+            if orphanage_id:
+                stale = stale.filter_by(orphanage_id=orphanage_id)
+            stale.delete(synchronize_session=False)
+            if rows:
+                db.session.bulk_insert_mappings(ForecastAccuracy, rows)
+            
+            # Stored selections may now disagree with the backtest's best method
+            models = ForecastModel.query
+            if orphanage_id:
+                models = models.filter_by(orphanage_id=orphanage_id)
+            staled = models.with_entities(ForecastModel.orphanage_id, ForecastModel.item_id).all()
+            models.update({'stale': True}, synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        # Cached forecasts were computed from the models just marked stale
+        for model_orphanage_id, model_item_id in staled:
+            ForecastCache.invalidate(model_orphanage_id, model_item_id)
+        
+        # Risk entries now forecast from the state fit until reselection
+        from app.stockout_risk import StockoutRiskService
+        
+        StockoutRiskService.rebuild(orphanage_id)
+        
+        return {
+            'items': sum(len(item_ids) for item_ids in items_by_orphanage.values()),
+            'results_written': len(rows),
+            'elapsed_seconds': round(time.perf_counter() - started, 2)
+        }
@@ -0,0 +1,72 @@
+"""Forecast result cache on top of the Flask-Caching extension"""
+import threading
+import time
+from datetime import date
+from flask import current_app
+from app import cache
+
+class ForecastCache:
+    """Caches forecasting results per (orphanage, item, horizon, usage version)
+
+    Every write to an item's usage logs bumps its usage version, so entries
+    computed from older data are never looked up again and simply expire.
+    """
+
+    _stats = {'hits': 0, 'misses': 0}
+    _stats_lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(orphanage_id, item_id):
+        return f'forecast_version:{orphanage_id}:{item_id}'
+
+    @staticmethod
+    def get_version(orphanage_id, item_id):
+        """Get the current usage version for an item"""
+        key = ForecastCache._version_key(orphanage_id, item_id)
+        version = cache.get(key)
+        if version is None:
+            # Start from a fresh token rather than 0 so an evicted version key
+            # can never resurrect forecasts cached under an older version
+            cache.add(key, time.time_ns(), timeout=0)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def invalidate(orphanage_id, item_id):
+        """Bump the usage version of an item after its usage logs changed"""
+        cache.set(ForecastCache._version_key(orphanage_id, item_id), time.time_ns(), timeout=0)
+
+    @staticmethod
+    def get_or_compute(orphanage_id, item_id, horizon, compute):
+        """Return the cached forecast or compute and store it"""
+        version = ForecastCache.get_version(orphanage_id, item_id)
+        # Forecasts are relative to today, so the date is part of the key too
+        key = f'forecast:{orphanage_id}:{item_id}:{horizon}:{version}:{date.today().isoformat()}'
+
+        result = cache.get(key)
+        if result is not None:
+            ForecastCache._count('hits')
+            return result
+
+        ForecastCache._count('misses')
+        result = compute()
+        cache.set(key, result, timeout=current_app.config.get('FORECAST_CACHE_TIMEOUT', 3600))
+        return result
+
+    @staticmethod
+    def _count(name):
+        with ForecastCache._stats_lock:
+            ForecastCache._stats[name] += 1
+
+    @staticmethod
+    def stats():
+        """Get hit/miss counters for this process"""
+        with ForecastCache._stats_lock:
+            hits = ForecastCache._stats['hits']
+            misses = ForecastCache._stats['misses']
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else None
+        }
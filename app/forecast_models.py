@@ -0,0 +1,192 @@
+import json
+import numpy as np
+from datetime import date, datetime, timedelta
+from flask import current_app
+from app.models import ForecastModel
+from app.forecast_state import ForecastStateService
+from app import db
+
+# Methods whose coefficients can be refitted from an item's ForecastState
+STATE_REFIT_METHODS = ('average', 'linear', 'polynomial')
+
+class ForecastModelService:
+    """Persisted per-item model selection with drift-triggered reselection
+    
+    The model tournament runs once per item and its winner is stored with
+    its fitted parameters; forecasts then evaluate that single fit. Each
+    usage write scores the stored fit against the day's actual total and
+    refits the chosen method's coefficients from the item's ForecastState.
+    The full tournament only reruns once the smoothed error drifts too far
+    above the fit's own in-sample error, when the data calls for another
+    method, or when the selection gets too old. Errors are RMSEs throughout.
+    """
+    
+    @staticmethod
+    def _settings():
+        config = current_app.config
+        return {
+            'threshold': config.get('FORECAST_DRIFT_THRESHOLD', 2.0),
+            'alpha': config.get('FORECAST_DRIFT_ALPHA', 0.3),
+            'min_residuals': config.get('FORECAST_DRIFT_MIN_RESIDUALS', 3),
+            'max_age': timedelta(days=config.get('FORECAST_MODEL_MAX_AGE_DAYS', 7))
+        }
+    
+    @staticmethod
+    def needs_selection(model):
+        """Whether an item has no usable stored model"""
+        if model is None or model.stale:
+            return True
+        return model.selected_at < datetime.utcnow() - ForecastModelService._settings()['max_age']
+    
+    @staticmethod
+    def select(orphanage_id, item_id, engine, commit=True):
+        """Run the engine's model tournament for an item and store the winner"""
+        fitted = engine.select_model(orphanage_id, item_id)
+        
+        model = ForecastModel.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        if model is None:
+            model = ForecastModel(orphanage_id=orphanage_id, item_id=item_id)
+            db.session.add(model)
+        
+        model.method = fitted['method']
+        model.coefficients = json.dumps([float(c) for c in fitted['coefficients']])
+        model.origin_date = fitted['origin_date']
+        model.accuracy = float(fitted['accuracy']) if fitted['accuracy'] is not None else None
+        model.confidence = fitted['confidence']
+        model.residual_ewma = 0.0
+        model.residual_count = 0
+        model.stale = False
+        model.selected_at = datetime.utcnow()
+        
+        if commit:
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return model
+    
+    @staticmethod
+    def evaluate(model, days):
+        """Stored fit's daily usage for a sequence of dates (non-negative)"""
+        return ForecastModelService.evaluate_fit(json.loads(model.coefficients), model.origin_date, days)
+    
+    @staticmethod
+    def evaluate_fit(coefficients, origin_date, days):
+        """Daily usage of fitted coefficients (see ForecastModel) for a sequence of dates"""
+        coef = np.asarray(coefficients, dtype=float)
+        if len(coef) == 1:
+            return np.full(len(days), max(coef[0], 0.0))  # Flat daily rate
+        
+        day_number = [(day - origin_date).days for day in days]
+        day_of_week = [day.weekday() for day in days]
+        X = design_matrix(day_number, day_of_week, 1 if len(coef) == 3 else 2)
+        return np.maximum(X @ coef, 0)
+    
+    @staticmethod
+    def predict(model, forecast_days):
+        """Forecast the next ``forecast_days`` days from the stored fit"""
+        today = date.today()
+        days = [today + timedelta(days=offset) for offset in range(1, forecast_days + 1)]
+        predictions = ForecastModelService.evaluate(model, days).tolist()
+        return {
+            'predictions': predictions,
+            'total_predicted': sum(predictions),
+            'confidence': model.confidence,
+            'method': model.method,
+            'accuracy': model.accuracy
+        }
+    
+    @staticmethod
+    def record_actuals(orphanage_id, item_id, day_totals, state=None):
+        """Fold the new total usage of logged days into the drift statistic
+        
+        ``day_totals`` maps each written date to the day's total usage after
+        the write. Marks the model stale when the root of the smoothed squared
+        residual exceeds FORECAST_DRIFT_THRESHOLD times the fit's in-sample
+        RMSE. Otherwise the stored method's coefficients are refitted from the
+        item's updated ``state`` so the write shows up in the next forecast;
+        when the state calls for another method (an 'average' item now has
+        enough data, or a regression too little) the model is marked stale
+        so reselection, with its intermittent-demand check, picks it. TSB
+        rates are not derivable from the state and wait for reselection.
+        """
+        model = ForecastModel.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        if model is None or model.stale:
+            return model
+        
+        settings = ForecastModelService._settings()
+        days = sorted(day_totals)
+        squared_residuals = (np.asarray([day_totals[day] for day in days]) - ForecastModelService.evaluate(model, days)) ** 2
+        
+        for squared_residual in squared_residuals:
+            if model.residual_count == 0:
+                model.residual_ewma = float(squared_residual)
+            else:
+                model.residual_ewma = float(
+                    settings['alpha'] * squared_residual + (1 - settings['alpha']) * model.residual_ewma
+                )
+            model.residual_count += 1
+        
+        if model.residual_count >= settings['min_residuals'] and \
+                np.sqrt(model.residual_ewma) > settings['threshold'] * (model.accuracy or 0):
+            model.stale = True
+        elif state is not None and model.method in STATE_REFIT_METHODS:
+            fitted = ForecastStateService.fit(state, method=model.method)
+            if fitted['method'] != model.method or (
+                model.method == 'average' and ForecastStateService.has_enough_data(state)
+            ):
+                model.stale = True
+            else:
+                model.coefficients = json.dumps([float(c) for c in fitted['coefficients']])
+                model.origin_date = fitted['origin_date']
+                model.accuracy = float(fitted['accuracy']) if fitted['accuracy'] is not None else None
+                model.confidence = fitted['confidence']
+        
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return model
+    
+    @staticmethod
+    def reselect(engine, orphanage_id=None, force=False):
+        """Rerun selection for stale, expired or missing models (every item if ``force``)"""
+        from app.models import Inventory
+        
+        query = Inventory.query.with_entities(Inventory.orphanage_id, Inventory.item_id)
+        if orphanage_id:
+            query = query.filter_by(orphanage_id=orphanage_id)
+        
+        models = ForecastModel.query
+        if orphanage_id:
+            models = models.filter_by(orphanage_id=orphanage_id)
+        stored = {(model.orphanage_id, model.item_id): model for model in models.all()}
+        
+        selected = []
+        for inv_orphanage_id, inv_item_id in query.all():
+            if force or ForecastModelService.needs_selection(stored.get((inv_orphanage_id, inv_item_id))):
+                ForecastModelService.select(inv_orphanage_id, inv_item_id, engine, commit=False)
+                selected.append((inv_orphanage_id, inv_item_id))
+        
+        db.session.commit()
+        
+        # Risk entries were computed from the replaced models
+        from app.stockout_risk import StockoutRiskService
+        
+        StockoutRiskService.rebuild(items=selected)
+        return len(selected)
+
+def design_matrix(day_number, day_of_week, degree):
+    """Build the regression design matrix used by the batch fits
+    
+    Columns follow PolynomialFeatures ordering: [1, d, w] for degree 1 and
+    [1, d, w, d^2, d*w, w^2] for degree 2.
+    """
+    d = np.asarray(day_number, dtype=float)
+    w = np.asarray(day_of_week, dtype=float)
+    columns = [np.ones_like(d), d, w]
+    if degree >= 2:
+        columns += [d * d, d * w, w * w]
+    return np.column_stack(columns)
@@ -0,0 +1,105 @@
+import json
+import os
+import time
+from datetime import datetime, date, timedelta
+from flask import current_app
+from app.models import Inventory, ForecastSnapshot, ForecastState
+from app.worker_pool import map_in_workers
+from app import db
+
+SNAPSHOT_HORIZON_DAYS = 30
+
+class ForecastSnapshotService:
+    """Nightly precomputed forecasts and their lookup on the request path"""
+    
+    @staticmethod
+    def compute(inventory_ids):
+        """Run the forecasting engine for inventory rows, returning snapshot rows"""
+        from app.ai_forecasting import ForecastContext, forecasting_engine
+        
+        computed_at = datetime.utcnow()
+        rows = []
+        for inventory in Inventory.query.filter(Inventory.id.in_(inventory_ids)).all():
+            try:
+                context = ForecastContext(
+                    forecasting_engine, inventory.orphanage_id, inventory.item_id,
+                    SNAPSHOT_HORIZON_DAYS, inventory
+                )
+                forecast = context.forecast
+                reorder = context.reorder()
+            except Exception as e:
+                print(f"Forecast precompute failed for inventory {inventory.id}: {str(e)}")
+                continue
+            
+            rows.append({
+                'orphanage_id': inventory.orphanage_id,
+                'item_id': inventory.item_id,
+                'horizon_days': SNAPSHOT_HORIZON_DAYS,
+                'predictions': json.dumps([float(p) for p in forecast['predictions']]),
+                'stockout_date': reorder['stockout_date'],
+                'reorder_quantity': float(reorder['recommended_quantity']),
+                'confidence': forecast['confidence'],
+                'method': forecast['method'],
+                'accuracy': float(forecast['accuracy']) if forecast['accuracy'] is not None else None,
+                'computed_at': computed_at
+            })
+        return rows
+    
+    @staticmethod
+    def precompute(workers=None, chunk_size=50, config_name=None):
+        """Forecast every inventory row across a process pool and store snapshots
+        
+        Workers only compute; the parent bulk-inserts all rows in one
+        transaction and prunes snapshots older than the retention window.
+        """
+        started = time.perf_counter()
+        inventory_ids = [row.id for row in Inventory.query.with_entities(Inventory.id).order_by(Inventory.id).all()]
+        chunks = [inventory_ids[i:i + chunk_size] for i in range(0, len(inventory_ids), chunk_size)]
+        
+        rows = []
+        for chunk_rows in map_in_workers(ForecastSnapshotService.compute, [(chunk,) for chunk in chunks],
+                                         workers=workers, config_name=config_name):
+            rows.extend(chunk_rows)
+        
+        retention = timedelta(days=current_app.config.get('FORECAST_SNAPSHOT_RETENTION_DAYS', 7))
+        try:
+            if rows:
+                db.session.bulk_insert_mappings(ForecastSnapshot, rows)
+            pruned = ForecastSnapshot.query.filter(
+                ForecastSnapshot.computed_at < datetime.utcnow() - retention
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        return {
+            'inventory_rows': len(inventory_ids),
+            'snapshots_written': len(rows),
+            'snapshots_pruned': pruned,
+            'workers': workers or os.cpu_count() or 1,
+            'elapsed_seconds': round(time.perf_counter() - started, 2)
+        }
+    
+    @staticmethod
+    def get_fresh(orphanage_id, item_id):
+        """Get today's snapshot for an item if no usage was written since it was computed"""
+        max_age = current_app.config.get('FORECAST_SNAPSHOT_MAX_AGE', timedelta(hours=24))
+        now = datetime.utcnow()
+        
+        snapshot = ForecastSnapshot.query.filter(
+            ForecastSnapshot.orphanage_id == orphanage_id,
+            ForecastSnapshot.item_id == item_id,
+            ForecastSnapshot.computed_at >= now - max_age
+        ).order_by(ForecastSnapshot.computed_at.desc()).first()
+        
+        # Predictions are relative to the (local) day they were computed on
+        utc_offset = datetime.now() - now
+        if snapshot is None or (snapshot.computed_at + utc_offset).date() != date.today():
+            return None
+        
+        state = ForecastState.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        if state is not None and state.updated_at and state.updated_at > snapshot.computed_at:
+            return None
+        
+        return snapshot
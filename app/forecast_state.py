@@ -0,0 +1,244 @@
+import numpy as np
+from datetime import date
+from flask import current_app
+from app.models import ForecastState, UsageLog
+from app import db
+
+# Order of the Xᵀy sums, matching the [1, u, w, u², u·w, w²] feature columns
+SUM_COLUMNS = ('sum_y', 'sum_yu', 'sum_yw', 'sum_yuu', 'sum_yuw', 'sum_yww')
+
+# Fewest days of history a regression is fitted on
+MIN_DATA_POINTS = 5
+
+def confidence_level(mae, std_dev):
+    """Calculate confidence level based on model accuracy"""
+    if std_dev == 0:
+        return 'medium'
+    
+    relative_error = mae / std_dev if std_dev > 0 else 1
+    
+    if relative_error < 0.3:
+        return 'high'
+    elif relative_error < 0.6:
+        return 'medium'
+    else:
+        return 'low'
+
+class ForecastStateService:
+    """Incremental normal-equation forecaster backed by ForecastState rows
+    
+    Every usage write updates the item's decayed sums in O(1); forecasting
+    solves a 3x3 (linear) or 6x6 (quadratic) system without reading history.
+    The XᵀX side only depends on the calendar, so it is rebuilt from dates.
+    """
+    
+    @staticmethod
+    def _half_life():
+        return float(current_app.config.get('FORECAST_STATE_HALF_LIFE_DAYS', 14))
+    
+    @staticmethod
+    def _decay(half_life_days):
+        return 0.5 ** (1.0 / half_life_days)
+    
+    @staticmethod
+    def _shift(state, new_anchor):
+        """Move the state's anchor forward, decaying and re-centring the sums"""
+        k = (new_anchor - state.anchor_date).days
+        if k == 0:
+            return
+        
+        factor = ForecastStateService._decay(state.half_life_days) ** k
+        sum_y, sum_yu, sum_yw = state.sum_y, state.sum_yu, state.sum_yw
+        
+        # u' = u - k for every observation
+        state.sum_yuu = (state.sum_yuu - 2 * k * sum_yu + k * k * sum_y) * factor
+        state.sum_yuw = (state.sum_yuw - k * sum_yw) * factor
+        state.sum_yu = (sum_yu - k * sum_y) * factor
+        state.sum_y = sum_y * factor
+        state.sum_yw = sum_yw * factor
+        state.sum_yww = state.sum_yww * factor
+        state.sum_yy = state.sum_yy * factor
+        state.anchor_date = new_anchor
+    
+    @staticmethod
+    def apply(orphanage_id, item_id, deltas, day_totals_before, log_count_change=0):
+        """Fold committed usage changes into the item's state
+        
+        ``deltas`` maps each changed date to the change in that day's total
+        usage and ``day_totals_before`` to the day's total before the write
+        (see UsageLog.get_day_totals). Must be called after the write is
+        committed; an item without state is built from its full history.
+        """
+        state = ForecastState.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        if state is None or state.half_life_days != ForecastStateService._half_life():
+            return ForecastStateService.rebuild(orphanage_id, item_id)
+        
+        for day, delta in deltas.items():
+            if day > state.anchor_date:
+                ForecastStateService._shift(state, day)
+            
+            before = day_totals_before.get(day, 0)
+            after = before + delta
+            weight = ForecastStateService._decay(state.half_life_days) ** (state.anchor_date - day).days
+            u = (day - state.anchor_date).days
+            w = day.weekday()
+            
+            state.sum_y += weight * delta
+            state.sum_yu += weight * delta * u
+            state.sum_yw += weight * delta * w
+            state.sum_yuu += weight * delta * u * u
+            state.sum_yuw += weight * delta * u * w
+            state.sum_yww += weight * delta * w * w
+            state.sum_yy += weight * (after * after - before * before)
+            state.first_date = min(state.first_date, day)
+        
+        state.log_count = max(0, (state.log_count or 0) + log_count_change)
+        
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return state
+    
+    @staticmethod
+    def rebuild(orphanage_id, item_id, commit=True):
+        """Recompute an item's state from scratch out of its usage logs"""
+        rows = db.session.query(UsageLog.date, db.func.sum(UsageLog.quantity_used), db.func.count(UsageLog.id)).filter(
+            UsageLog.orphanage_id == orphanage_id,
+            UsageLog.item_id == item_id
+        ).group_by(UsageLog.date).all()
+        
+        state = ForecastState.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        if state is None:
+            state = ForecastState(orphanage_id=orphanage_id, item_id=item_id)
+            db.session.add(state)
+        
+        half_life = ForecastStateService._half_life()
+        today = date.today()
+        state.half_life_days = half_life
+        
+        if rows:
+            days, totals, counts = zip(*rows)
+            anchor = max(today, max(days))
+            y = np.asarray(totals, dtype=float)
+            u = (np.array(days, dtype='datetime64[D]') - np.datetime64(anchor)).astype(float)
+            w = np.array([day.weekday() for day in days], dtype=float)
+            weights = ForecastStateService._decay(half_life) ** -u
+            
+            for column, feature in zip(SUM_COLUMNS, (1, u, w, u * u, u * w, w * w)):
+                setattr(state, column, float(np.sum(weights * y * feature)))
+            state.sum_yy = float(np.sum(weights * y * y))
+            state.anchor_date = anchor
+            state.first_date = min(days)
+            state.log_count = int(sum(counts))
+        else:
+            for column in SUM_COLUMNS + ('sum_yy',):
+                setattr(state, column, 0.0)
+            state.anchor_date = today
+            state.first_date = today
+            state.log_count = 0
+        
+        if commit:
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return state
+    
+    @staticmethod
+    def rebuild_all(orphanage_id=None):
+        """Recompute the state of every inventory item, optionally for one orphanage"""
+        from app.models import Inventory
+        
+        query = Inventory.query.with_entities(Inventory.orphanage_id, Inventory.item_id)
+        if orphanage_id:
+            query = query.filter_by(orphanage_id=orphanage_id)
+        
+        rebuilt = 0
+        for inv_orphanage_id, inv_item_id in query.all():
+            ForecastStateService.rebuild(inv_orphanage_id, inv_item_id, commit=False)
+            rebuilt += 1
+        
+        db.session.commit()
+        return rebuilt
+    
+    @staticmethod
+    def has_enough_data(state, min_data_points=MIN_DATA_POINTS):
+        """Whether the state spans enough days with usage to fit a regression"""
+        return (state.log_count or 0) > 0 and (date.today() - state.first_date).days + 1 >= min_data_points
+    
+    @staticmethod
+    def fit(state, method=None, min_data_points=MIN_DATA_POINTS):
+        """Fit the usage models from the state's sufficient statistics
+        
+        Returns a fitted-model dict (see ForecastModelService) whose
+        coefficients are over the [1, u, w, u², u·w, w²] features with u
+        counted in days from today. Since in-sample MAE is not recoverable
+        from sums, models are scored (and ``accuracy`` reported) by weighted
+        RMSE. Pass ``method`` to fit only that model instead of picking the
+        best in-sample fit ('average' fits the decayed mean). Needs NumPy
+        only, so it is safe on the write path.
+        """
+        today = date.today()
+        decay = ForecastStateService._decay(state.half_life_days)
+        
+        # Bring the sums to today's anchor without touching the stored row
+        k = (today - state.anchor_date).days
+        factor = decay ** k
+        sy, syu, syw = state.sum_y, state.sum_yu, state.sum_yw
+        b = np.array([
+            sy,
+            syu - k * sy,
+            syw,
+            state.sum_yuu - 2 * k * syu + k * k * sy,
+            state.sum_yuw - k * syw,
+            state.sum_yww
+        ]) * factor
+        syy = state.sum_yy * factor
+        
+        # XᵀX over the zero-filled daily span, which only depends on dates
+        n_days = max((today - state.first_date).days, 0) + 1
+        u = np.arange(-(n_days - 1), 1, dtype=float)
+        w = (today.weekday() + u) % 7
+        weights = decay ** -u
+        features = np.column_stack([np.ones_like(u), u, w, u * u, u * w, w * w])
+        xtx = (features * weights[:, None]).T @ features
+        total_weight = weights.sum()
+        
+        if method == 'average' or not ForecastStateService.has_enough_data(state, min_data_points):
+            avg_usage = b[0] / total_weight if state.log_count > 0 else 0
+            return {
+                'method': 'average',
+                'coefficients': [float(avg_usage)],
+                'origin_date': today,
+                'accuracy': None,
+                'confidence': 'low'
+            }
+        
+        candidates = (('linear', 3), ('polynomial', 6))
+        if method in dict(candidates):
+            candidates = ((method, dict(candidates)[method]),)
+        
+        best = None
+        for model_name, n_features in candidates:
+            A = xtx[:n_features, :n_features]
+            rhs = b[:n_features]
+            coef = np.linalg.lstsq(A, rhs, rcond=None)[0]
+            sse = syy - 2 * coef @ rhs + coef @ A @ coef
+            rmse = float(np.sqrt(max(sse, 0) / total_weight))
+            if best is None or rmse < best[1]:
+                best = (model_name, rmse, coef)
+        
+        model_name, rmse, coef = best
+        mean = b[0] / total_weight
+        std_dev = float(np.sqrt(max(syy / total_weight - mean * mean, 0)))
+        
+        return {
+            'method': model_name,
+            'coefficients': coef.tolist(),
+            'origin_date': today,
+            'accuracy': rmse,
+            'confidence': confidence_level(rmse, std_dev)
+        }
@@ -0,0 +1,136 @@
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.models import ScheduledJob
+from app import db
+
+class JobScheduler:
+    """Periodic background job run by at most one worker at a time
+    
+    The job's watermark (start of its last completed run) and a lease
+    live in a ScheduledJob row, so any number of workers can poll while
+    only the lease holder runs the job. Subclasses set ``job_name`` and
+    ``interval_setting`` (a timedelta config key) and implement ``run``,
+    calling ``renew_lease`` between chunks of a long run.
+    """
+    job_name = None
+    interval_setting = None
+    default_interval = timedelta(hours=6)
+    
+    def __init__(self, owner=None):
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    
+    def run(self, last_run_at):
+        """Do one run of the job and return its result dict (with 'error' on failure)"""
+        raise NotImplementedError
+    
+    def _get_job(self):
+        job = ScheduledJob.query.filter_by(name=self.job_name).first()
+        if job is None:
+            try:
+                db.session.add(ScheduledJob(name=self.job_name))
+                db.session.commit()
+            except IntegrityError:
+                # Another worker created it first
+                db.session.rollback()
+            job = ScheduledJob.query.filter_by(name=self.job_name).first()
+        return job
+    
+    def acquire_lease(self):
+        """Take (or extend) the job's lease unless another live worker holds it"""
+        self._get_job()
+        now = datetime.utcnow()
+        acquired = ScheduledJob.query.filter(
+            ScheduledJob.name == self.job_name,
+            db.or_(
+                ScheduledJob.lease_expires_at.is_(None),
+                ScheduledJob.lease_expires_at < now,
+                ScheduledJob.lease_owner == self.owner
+            )
+        ).update({
+            'lease_owner': self.owner,
+            'lease_expires_at': now + current_app.config.get('ALERT_LEASE_TIMEOUT', timedelta(minutes=10))
+        }, synchronize_session=False)
+        db.session.commit()
+        return acquired == 1
+    
+    def renew_lease(self):
+        """Push back the expiry of the lease this worker holds
+        
+        Long runs call this between chunks of work so the lease cannot
+        lapse mid-run and let a second worker start the same job. Raises
+        RuntimeError when the lease was lost, stopping the run before it
+        writes anything more.
+        """
+        renewed = ScheduledJob.query.filter_by(name=self.job_name, lease_owner=self.owner).update({
+            'lease_expires_at': datetime.utcnow() + current_app.config.get('ALERT_LEASE_TIMEOUT', timedelta(minutes=10))
+        }, synchronize_session=False)
+        db.session.commit()
+        if renewed != 1:
+            raise RuntimeError(f'{self.job_name} lease was taken over by another worker')
+    
+    def release_lease(self, last_run_at=None):
+        """Give up the lease, advancing the watermark if a run completed
+        
+        Only a worker still holding the lease writes, so a run whose lease
+        was taken over never moves the other worker's watermark.
+        """
+        values = {'lease_owner': None, 'lease_expires_at': None}
+        if last_run_at is not None:
+            values['last_run_at'] = last_run_at
+        ScheduledJob.query.filter_by(name=self.job_name, lease_owner=self.owner)\
+                          .update(values, synchronize_session=False)
+        db.session.commit()
+    
+    def run_if_due(self, force=False):
+        """Run the job if its interval elapsed and the lease is ours
+        
+        Returns the run's result, or None when the job was not due or
+        another worker holds the lease.
+        """
+        if not self.acquire_lease():
+            return None
+        
+        completed_at = None
+        try:
+            job = self._get_job()
+            interval = current_app.config.get(self.interval_setting, self.default_interval)
+            started = datetime.utcnow()
+            if not force and job.last_run_at is not None and started - job.last_run_at < interval:
+                return None
+            
+            result = self.run(job.last_run_at)
+            if 'error' not in result:
+                # Writes that landed during the run are picked up by the next one
+                completed_at = started
+            return result
+        finally:
+            self.release_lease(completed_at)
+    
+    def run_forever(self, poll_seconds=None, on_result=None):
+        """Poll for due runs until interrupted"""
+        run_schedulers([self], poll_seconds, on_result and (lambda scheduler, result: on_result(result)))
+
+def run_schedulers(schedulers, poll_seconds=None, on_result=None):
+    """Poll several jobs in one worker until interrupted
+    
+    ``on_result(scheduler, result)`` is called after every completed run.
+    """
+    poll_seconds = poll_seconds or current_app.config.get('ALERT_SCHEDULER_POLL_SECONDS', 60)
+    while True:
+        for scheduler in schedulers:
+            try:
+                result = scheduler.run_if_due()
+                if result is not None and on_result:
+                    on_result(scheduler, result)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Scheduled job {scheduler.job_name} error: {str(e)}")
+            finally:
+                # Don't hold a connection while sleeping
+                db.session.remove()
+        time.sleep(poll_seconds)
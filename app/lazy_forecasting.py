@@ -0,0 +1,43 @@
+"""Lazy access to the forecasting stack
+
+Importing app.ai_forecasting pulls in pandas, NumPy and scikit-learn. Web
+workers that only serve login, inventory or alert pages never need them,
+so routes and services go through the proxy below, which imports the real
+engine on first attribute access. Forecast-dedicated workers can import
+everything up front with preload_forecasting() (see FORECAST_PRELOAD).
+"""
+import threading
+
+_load_lock = threading.Lock()
+_engine = None
+
+def load_forecasting_engine():
+    """Import app.ai_forecasting and return its global engine"""
+    global _engine
+    if _engine is None:
+        with _load_lock:
+            if _engine is None:
+                from app.ai_forecasting import forecasting_engine as engine
+                _engine = engine
+    return _engine
+
+def preload_forecasting():
+    """Eagerly import the whole forecasting stack, e.g. in a post-fork hook"""
+    load_forecasting_engine()
+    import app.forecast_state  # noqa: F401
+    import app.usage_series  # noqa: F401
+
+def is_loaded():
+    """Whether the forecasting stack has been imported in this process"""
+    return _engine is not None
+
+class LazyForecastingEngine:
+    """Proxy that stands in for ForecastingEngine until it is first used"""
+
+    def __getattr__(self, name):
+        return getattr(load_forecasting_engine(), name)
+
+    def __repr__(self):
+        return f'<LazyForecastingEngine loaded={is_loaded()}>'
+
+forecasting_engine = LazyForecastingEngine()
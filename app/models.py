@@ -1,7 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, date
+from sqlalchemy.ext.hybrid import hybrid_method
+from datetime import datetime, date, timedelta
+import json
 from app import db
 
 class Role(db.Model):
@@ -122,6 +124,7 @@ class Item(db.Model):
 class Inventory(db.Model):
     """Model for current inventory levels"""
     __tablename__ = 'inventory'
+    # Write through the ORM session only: ReportCounterService counts flushes
     
     id = db.Column(db.Integer, primary_key=True)
     orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), nullable=False)
@@ -132,16 +135,21 @@ class Inventory(db.Model):
     expiry_date = db.Column(db.Date)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Unique constraint to prevent duplicate entries
-    __table_args__ = (db.UniqueConstraint('orphanage_id', 'item_id'),)
+    # Unique constraint to prevent duplicate entries; expiry lookups are range scans
+    __table_args__ = (
+        db.UniqueConstraint('orphanage_id', 'item_id'),
+        db.Index('ix_inventory_expiry_date', 'expiry_date'),
+    )
     
     def __repr__(self):
         return f'<Inventory {self.item.name}: {self.quantity} {self.item.unit}>'
     
+    @hybrid_method
     def is_low_stock(self):
         """Check if item is below minimum level"""
         return self.quantity <= self.minimum_level
     
+    @hybrid_method
     def is_critical_stock(self):
         """Check if item is critically low (below 50% of minimum)"""
         return self.quantity <= (self.minimum_level * 0.5)
@@ -158,21 +166,33 @@ class Inventory(db.Model):
             return (self.expiry_date - date.today()).days
         return None
     
+    @hybrid_method
     def is_expired(self):
         """Check if item is expired"""
         if self.expiry_date:
             return date.today() > self.expiry_date
         return False
     
+    @is_expired.expression
+    def is_expired(cls):
+        return cls.expiry_date < date.today()
+    
+    @hybrid_method
     def is_expiring_soon(self, days=7):
         """Check if item is expiring within specified days"""
         if self.expiry_date:
             return 0 < (self.expiry_date - date.today()).days <= days
         return False
+    
+    @is_expiring_soon.expression
+    def is_expiring_soon(cls, days=7):
+        today = date.today()
+        return db.and_(cls.expiry_date > today, cls.expiry_date <= today + timedelta(days=days))
 
 class UsageLog(db.Model):
     """Model for daily usage tracking"""
     __tablename__ = 'usage_logs'
+    # Write through the ORM session only: ReportCounterService counts flushes
     
     id = db.Column(db.Integer, primary_key=True)
     orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), nullable=False)
@@ -184,9 +204,25 @@ class UsageLog(db.Model):
     recorded_by = db.Column(db.String(100)) # This might be redundant or used if user_id is null
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Exports stream usage in (date, id) order, optionally for one orphanage
+    __table_args__ = (
+        db.Index('ix_usage_logs_date_id', 'date', 'id'),
+        db.Index('ix_usage_logs_orphanage_date_id', 'orphanage_id', 'date', 'id'),
+    )
+    
     def __repr__(self):
         return f'<UsageLog {self.item.name}: {self.quantity_used} on {self.date}>'
     
+    @staticmethod
+    def get_day_totals(orphanage_id, item_id, days):
+        """Get total usage per day for the given dates (0 for days without logs)"""
+        totals = dict(db.session.query(UsageLog.date, db.func.sum(UsageLog.quantity_used)).filter(
+            UsageLog.orphanage_id == orphanage_id,
+            UsageLog.item_id == item_id,
+            UsageLog.date.in_(list(days))
+        ).group_by(UsageLog.date).all())
+        return {day: totals.get(day) or 0 for day in days}
+    
     @staticmethod
     def get_usage_for_period(orphanage_id, item_id, start_date, end_date):
         """Get usage data for a specific period"""
@@ -197,6 +233,202 @@ class UsageLog(db.Model):
             UsageLog.date <= end_date
         ).all()
 
+class ForecastState(db.Model):
+    """Running sufficient statistics of an item's daily usage for forecasting
+    
+    Holds the exponentially-decayed sums needed to fit the linear and
+    quadratic usage models by normal equations. Sums are relative to
+    ``anchor_date``: each day t is weighted by decay**(anchor_date - t) and
+    its day feature is u = (t - anchor_date).days.
+    """
+    __tablename__ = 'forecast_states'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    anchor_date = db.Column(db.Date, nullable=False)
+    first_date = db.Column(db.Date, nullable=False)  # Earliest usage date seen
+    half_life_days = db.Column(db.Float, nullable=False)
+    log_count = db.Column(db.Integer, nullable=False, default=0)
+    sum_y = db.Column(db.Float, nullable=False, default=0)
+    sum_yu = db.Column(db.Float, nullable=False, default=0)
+    sum_yw = db.Column(db.Float, nullable=False, default=0)
+    sum_yuu = db.Column(db.Float, nullable=False, default=0)
+    sum_yuw = db.Column(db.Float, nullable=False, default=0)
+    sum_yww = db.Column(db.Float, nullable=False, default=0)
+    sum_yy = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('orphanage_id', 'item_id'),)
+    
+    def __repr__(self):
+        return f'<ForecastState {self.orphanage_id}/{self.item_id} @ {self.anchor_date}>'
+
+class ForecastSnapshot(db.Model):
+    """Precomputed forecast for an inventory item, written by the nightly job"""
+    __tablename__ = 'forecast_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    horizon_days = db.Column(db.Integer, nullable=False)
+    predictions = db.Column(db.Text, nullable=False)  # JSON list of daily predictions
+    stockout_date = db.Column(db.Date)
+    reorder_quantity = db.Column(db.Float)
+    confidence = db.Column(db.String(20))
+    method = db.Column(db.String(50))
+    accuracy = db.Column(db.Float)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_forecast_snapshots_item_computed', 'orphanage_id', 'item_id', 'computed_at'),)
+    
+    def __repr__(self):
+        return f'<ForecastSnapshot {self.orphanage_id}/{self.item_id} at {self.computed_at}>'
+    
+    def to_forecast(self):
+        """Rebuild the predict_usage-style dict stored in this snapshot"""
+        predictions = json.loads(self.predictions)
+        return {
+            'predictions': predictions,
+            'total_predicted': sum(predictions),
+            'confidence': self.confidence,
+            'method': self.method,
+            'accuracy': self.accuracy
+        }
+
+class SeasonalityProfile(db.Model):
+    """Weekday and monthly usage multipliers of an item, materialized from usage_logs
+    
+    Each factor is the average daily usage on that weekday (or in that
+    month) over the overall average daily usage, counting days without logs
+    as zero usage between ``first_date`` and ``last_date``.
+    """
+    __tablename__ = 'seasonality_profiles'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    weekday_factors = db.Column(db.Text, nullable=False)  # JSON list, Monday first
+    monthly_factors = db.Column(db.Text, nullable=False)  # JSON list, January first
+    first_date = db.Column(db.Date)
+    last_date = db.Column(db.Date)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('orphanage_id', 'item_id'),)
+    
+    def __repr__(self):
+        return f'<SeasonalityProfile {self.orphanage_id}/{self.item_id} at {self.computed_at}>'
+    
+    def history_days(self):
+        """Number of calendar days the factors were computed over"""
+        if self.first_date is None or self.last_date is None:
+            return 0
+        return (self.last_date - self.first_date).days + 1
+
+class ForecastAccuracy(db.Model):
+    """Out-of-sample error of one forecasting method for an item, from backtesting"""
+    __tablename__ = 'forecast_accuracy'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    method = db.Column(db.String(50), nullable=False)
+    mae = db.Column(db.Float, nullable=False)
+    mape = db.Column(db.Float)  # Over days with non-zero usage; NULL if there were none
+    n_cutoffs = db.Column(db.Integer, nullable=False)
+    horizon_days = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('orphanage_id', 'item_id', 'method'),)
+    
+    def __repr__(self):
+        return f'<ForecastAccuracy {self.orphanage_id}/{self.item_id} {self.method}: MAE {self.mae:.2f}>'
+    
+    @staticmethod
+    def best_for(orphanage_id, item_id):
+        """Get the backtested method with the lowest MAE for an item, if any"""
+        return ForecastAccuracy.query.filter_by(
+            orphanage_id=orphanage_id,
+            item_id=item_id
+        ).order_by(ForecastAccuracy.mae.asc()).first()
+    
+    def accuracy_percentage(self):
+        """Accuracy as 100 - MAPE, clipped to 0-100"""
+        if self.mape is None:
+            return None
+        return max(0.0, min(100.0, 100.0 - self.mape))
+
+class ForecastModel(db.Model):
+    """Selected forecasting method and its fitted parameters for an item
+    
+    Regression coefficients are over the [1, d, w, d², d·w, w²] features
+    (truncated to three for the linear model) with d counted in days from
+    ``origin_date``; flat methods store a single daily rate. ``residual_ewma``
+    tracks the squared error of the stored fit on newly logged days.
+    """
+    __tablename__ = 'forecast_models'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    method = db.Column(db.String(50), nullable=False)
+    coefficients = db.Column(db.Text, nullable=False)  # JSON list
+    origin_date = db.Column(db.Date, nullable=False)
+    accuracy = db.Column(db.Float)  # In-sample RMSE of the fit
+    confidence = db.Column(db.String(20))
+    residual_ewma = db.Column(db.Float, nullable=False, default=0)
+    residual_count = db.Column(db.Integer, nullable=False, default=0)
+    stale = db.Column(db.Boolean, nullable=False, default=False)  # Drifted or superseded by a backtest
+    selected_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('orphanage_id', 'item_id'),)
+    
+    def __repr__(self):
+        return f'<ForecastModel {self.orphanage_id}/{self.item_id} {self.method}>'
+
+class StockoutRisk(db.Model):
+    """Predicted stockout of an inventory item, indexed for per-orphanage ranking
+    
+    Stores the median simulated stockout date rather than a day count so
+    entries do not age; items not expected to run out within the forecast
+    horizon have no ``stockout_date``.
+    """
+    __tablename__ = 'stockout_risk'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    current_stock = db.Column(db.Float, nullable=False)
+    daily_usage = db.Column(db.Float, nullable=False)  # Average forecast usage per day
+    stockout_date = db.Column(db.Date)
+    stockout_probability_7d = db.Column(db.Float)  # P(stockout within 7 days of computed_at)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    item = db.relationship('Item')
+    
+    __table_args__ = (
+        db.UniqueConstraint('orphanage_id', 'item_id'),
+        db.Index('ix_stockout_risk_orphanage_date', 'orphanage_id', 'stockout_date'),
+    )
+    
+    def __repr__(self):
+        return f'<StockoutRisk {self.orphanage_id}/{self.item_id}: {self.stockout_date}>'
+    
+    def to_dict(self):
+        """Serialize for the risk API"""
+        today = date.today()
+        return {
+            'item_id': self.item_id,
+            'item_name': self.item.name if self.item else None,
+            'unit': self.item.unit if self.item else None,
+            'current_stock': self.current_stock,
+            'daily_usage': self.daily_usage,
+            'stockout_date': self.stockout_date.isoformat() if self.stockout_date else None,
+            'days_to_stockout': max((self.stockout_date - today).days, 0) if self.stockout_date else None,
+            'stockout_probability_7d': self.stockout_probability_7d,
+            'computed_at': self.computed_at.isoformat()
+        }
+
 class Alert(db.Model):
     """Model for system alerts"""
     __tablename__ = 'alerts'
@@ -214,30 +446,110 @@ class Alert(db.Model):
     orphanage = db.relationship('Orphanage', backref='alerts')
     item = db.relationship('Item', backref='alerts')
     
+    # Duplicate checks look up unread alerts per inventory row; listings page by creation time
+    __table_args__ = (
+        db.Index('ix_alerts_orphanage_item_read', 'orphanage_id', 'item_id', 'is_read'),
+        db.Index('ix_alerts_orphanage_created', 'orphanage_id', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Alert {self.title}>'
     
+    @staticmethod
+    def stock_alert_fields(item_name, unit, quantity, minimum_level, critical=False):
+        """Type, title and message of a low (or critical) stock alert"""
+        return {
+            'alert_type': 'critical_stock' if critical else 'low_stock',
+            'title': f'Critical Stock Alert: {item_name}' if critical else f'Low Stock: {item_name}',
+            'message': f'{item_name} is running low. Current stock: {quantity} {unit}, Minimum level: {minimum_level} {unit}'
+        }
+    
+    @staticmethod
+    def expiry_alert_fields(item_name, days_left):
+        """Type, title and message of an expiry alert"""
+        return {
+            'alert_type': 'expiring' if days_left > 0 else 'expired',
+            'title': f'Expiry Alert: {item_name}',
+            'message': f'{item_name} {"expires in " + str(days_left) + " days" if days_left > 0 else "has expired"}'
+        }
+    
     @staticmethod
     def create_low_stock_alert(inventory):
         """Create a low stock alert for an inventory item"""
         alert = Alert(
             orphanage_id=inventory.orphanage_id,
             item_id=inventory.item_id,
-            alert_type='low_stock',
-            title=f'Low Stock: {inventory.item.name}',
-            message=f'{inventory.item.name} is running low. Current stock: {inventory.quantity} {inventory.item.unit}, Minimum level: {inventory.minimum_level} {inventory.item.unit}'
+            **Alert.stock_alert_fields(inventory.item.name, inventory.item.unit, inventory.quantity, inventory.minimum_level)
         )
         return alert
     
     @staticmethod
     def create_expiry_alert(inventory):
         """Create an expiry alert for an inventory item"""
-        days_left = inventory.days_until_expiry()
         alert = Alert(
             orphanage_id=inventory.orphanage_id,
             item_id=inventory.item_id,
-            alert_type='expiring' if days_left > 0 else 'expired',
-            title=f'Expiry Alert: {inventory.item.name}',
-            message=f'{inventory.item.name} {"expires in " + str(days_left) + " days" if days_left > 0 else "has expired"}'
+            **Alert.expiry_alert_fields(inventory.item.name, inventory.days_until_expiry())
         )
         return alert
+
+class AlertArchive(db.Model):
+    """Archived read alerts, collapsed to one row per item and alert type
+    
+    Filled by the retention job (see AlertRetentionService); repeats of the
+    same alert add to ``occurrence_count`` and keep the latest text.
+    """
+    __tablename__ = 'alerts_archive'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'))
+    alert_type = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(200), nullable=False)  # Of the latest occurrence
+    message = db.Column(db.Text, nullable=False)
+    occurrence_count = db.Column(db.Integer, nullable=False, default=0)
+    first_created_at = db.Column(db.DateTime)
+    last_created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_alerts_archive_key', 'orphanage_id', 'item_id', 'alert_type'),)
+    
+    def __repr__(self):
+        return f'<AlertArchive {self.orphanage_id}/{self.item_id} {self.alert_type} x{self.occurrence_count}>'
+
+class ScheduledJob(db.Model):
+    """Run cursor and lease of a periodic background job
+    
+    ``last_run_at`` is the watermark the job's next run continues from. A
+    worker may only run the job while it holds an unexpired lease, so only
+    one of several scaled-out workers runs it at a time.
+    """
+    __tablename__ = 'scheduled_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    last_run_at = db.Column(db.DateTime)  # UTC start of the last completed run
+    lease_owner = db.Column(db.String(100))
+    lease_expires_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ScheduledJob {self.name}: last run {self.last_run_at}>'
+
+class OrphanageStats(db.Model):
+    """Report counters of one orphanage, kept current on every flush
+    
+    Lets the network-wide report summary add up one row per orphanage
+    instead of counting inventory and usage logs (see ReportCounterService).
+    """
+    __tablename__ = 'orphanage_stats'
+    
+    orphanage_id = db.Column(db.Integer, db.ForeignKey('orphanages.id'), primary_key=True)
+    total_items = db.Column(db.Integer, nullable=False, default=0)
+    low_stock_count = db.Column(db.Integer, nullable=False, default=0)
+    usage_log_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    orphanage = db.relationship('Orphanage', backref=db.backref('stats', uselist=False, cascade='all, delete-orphan'))
+    
+    def __repr__(self):
+        return f'<OrphanageStats {self.orphanage_id}: {self.total_items} items, {self.usage_log_count} logs>'
@@ -0,0 +1,156 @@
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models import Inventory, UsageLog, Orphanage, OrphanageStats
+from app import db
+
+class ReportCounterService:
+    """Per-orphanage report counters maintained from session flushes
+    
+    Inventory counters are recounted for orphanages whose inventory changed
+    (a COUNT over that orphanage's rows); usage log counts are adjusted by
+    the flush's inserts and deletes, so writes never scan usage_logs. The
+    counters are written in the flush's own transaction.
+    
+    Every write to inventory and usage_logs must therefore go through the
+    ORM session (add, modify or delete instances, then commit). Bulk paths
+    such as ``bulk_insert_mappings``, Core ``insert()`` and query-level
+    UPDATE/DELETE bypass the flush and leave the counters drifting; run
+    ``flask reports rebuild-counters`` after any of those.
+    """
+    
+    @staticmethod
+    def _count_inventory(connection, orphanage_id):
+        return connection.execute(
+            db.select(
+                db.func.count(Inventory.id),
+                db.func.coalesce(db.func.sum(db.case((Inventory.is_low_stock(), 1), else_=0)), 0)
+            ).where(Inventory.orphanage_id == orphanage_id)
+        ).one()
+    
+    @staticmethod
+    def _apply(connection, orphanage_id, usage_delta, recount_inventory):
+        values = {'updated_at': datetime.utcnow()}
+        if usage_delta:
+            values['usage_log_count'] = OrphanageStats.usage_log_count + usage_delta
+        if recount_inventory:
+            values['total_items'], values['low_stock_count'] = ReportCounterService._count_inventory(connection, orphanage_id)
+        
+        updated = connection.execute(
+            db.update(OrphanageStats).where(OrphanageStats.orphanage_id == orphanage_id).values(**values)
+        ).rowcount
+        if updated == 0:
+            # First write for this orphanage: start from full counts, which
+            # already include the rows just flushed
+            total_items, low_stock_count = ReportCounterService._count_inventory(connection, orphanage_id)
+            usage_log_count = connection.execute(
+                db.select(db.func.count(UsageLog.id)).where(UsageLog.orphanage_id == orphanage_id)
+            ).scalar()
+            connection.execute(db.insert(OrphanageStats).values(
+                orphanage_id=orphanage_id,
+                total_items=total_items,
+                low_stock_count=low_stock_count,
+                usage_log_count=usage_log_count,
+                updated_at=values['updated_at']
+            ))
+    
+    @staticmethod
+    def _after_flush(session, flush_context):
+        usage_deltas = {}
+        inventory_changed = set()
+        removed_orphanages = {obj.id for obj in session.deleted if isinstance(obj, Orphanage)}
+        
+        for obj in session.new:
+            if isinstance(obj, UsageLog):
+                usage_deltas[obj.orphanage_id] = usage_deltas.get(obj.orphanage_id, 0) + 1
+            elif isinstance(obj, Inventory):
+                inventory_changed.add(obj.orphanage_id)
+        
+        for obj in session.deleted:
+            if isinstance(obj, UsageLog):
+                orphanage_id = (inspect(obj).attrs.orphanage_id.history.deleted or [obj.orphanage_id])[0]
+                usage_deltas[orphanage_id] = usage_deltas.get(orphanage_id, 0) - 1
+            elif isinstance(obj, Inventory):
+                inventory_changed.add(obj.orphanage_id)
+                inventory_changed.update(inspect(obj).attrs.orphanage_id.history.deleted)
+        
+        for obj in session.dirty:
+            if isinstance(obj, UsageLog):
+                # A log moved to another orphanage
+                for old_orphanage_id in inspect(obj).attrs.orphanage_id.history.deleted:
+                    if old_orphanage_id != obj.orphanage_id:
+                        usage_deltas[old_orphanage_id] = usage_deltas.get(old_orphanage_id, 0) - 1
+                        usage_deltas[obj.orphanage_id] = usage_deltas.get(obj.orphanage_id, 0) + 1
+            elif isinstance(obj, Inventory) and session.is_modified(obj):
+                inventory_changed.add(obj.orphanage_id)
+                inventory_changed.update(inspect(obj).attrs.orphanage_id.history.deleted)
+        
+        orphanage_ids = (set(usage_deltas) | inventory_changed) - removed_orphanages - {None}
+        if not orphanage_ids:
+            return
+        
+        connection = session.connection()
+        for orphanage_id in orphanage_ids:
+            ReportCounterService._apply(
+                connection, orphanage_id, usage_deltas.get(orphanage_id, 0), orphanage_id in inventory_changed
+            )
+    
+    @staticmethod
+    def rebuild(orphanage_id=None):
+        """Recompute the counters from scratch with GROUP BY queries"""
+        inventory_query = db.session.query(
+            Inventory.orphanage_id,
+            db.func.count(Inventory.id),
+            db.func.sum(db.case((Inventory.is_low_stock(), 1), else_=0))
+        ).group_by(Inventory.orphanage_id)
+        usage_query = db.session.query(UsageLog.orphanage_id, db.func.count(UsageLog.id)).group_by(UsageLog.orphanage_id)
+        orphanage_query = db.session.query(Orphanage.id)
+        if orphanage_id:
+            inventory_query = inventory_query.filter(Inventory.orphanage_id == orphanage_id)
+            usage_query = usage_query.filter(UsageLog.orphanage_id == orphanage_id)
+            orphanage_query = orphanage_query.filter(Orphanage.id == orphanage_id)
+        
+        inventory_counts = {row[0]: row[1:] for row in inventory_query.all()}
+        usage_counts = dict(usage_query.all())
+        now = datetime.utcnow()
+        rows = [{
+            'orphanage_id': inv_orphanage_id,
+            'total_items': inventory_counts.get(inv_orphanage_id, (0, 0))[0],
+            'low_stock_count': int(inventory_counts.get(inv_orphanage_id, (0, 0))[1] or 0),
+            'usage_log_count': usage_counts.get(inv_orphanage_id, 0),
+            'updated_at': now
+        } for (inv_orphanage_id,) in orphanage_query.all()]
+        
+        try:
+            stale = OrphanageStats.query
+            if orphanage_id:
+                stale = stale.filter_by(orphanage_id=orphanage_id)
+            stale.delete(synchronize_session=False)
+            if rows:
+                db.session.bulk_insert_mappings(OrphanageStats, rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(rows)
+    
+    @staticmethod
+    def totals():
+        """Network-wide counter sums, one row per orphanage read"""
+        total_items, low_stock_count, usage_log_count = db.session.query(
+            db.func.coalesce(db.func.sum(OrphanageStats.total_items), 0),
+            db.func.coalesce(db.func.sum(OrphanageStats.low_stock_count), 0),
+            db.func.coalesce(db.func.sum(OrphanageStats.usage_log_count), 0)
+        ).one()
+        return {
+            'total_items': int(total_items),
+            'low_stock_count': int(low_stock_count),
+            'total_usage_logs': int(usage_log_count)
+        }
+    
+    @staticmethod
+    def register_session_events():
+        """Hook counter maintenance into every SQLAlchemy session (idempotent)"""
+        if event.contains(Session, 'after_flush', ReportCounterService._after_flush):
+            return
+        event.listen(Session, 'after_flush', ReportCounterService._after_flush)
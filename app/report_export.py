@@ -0,0 +1,118 @@
+import csv
+import io
+import itertools
+import json
+import time
+import zlib
+from flask import current_app
+from app.models import Inventory, UsageLog, Item, Orphanage
+from app import db
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+USAGE_COLUMNS = ('id', 'date', 'orphanage_id', 'orphanage_name', 'item_id', 'item_name', 'category',
+                 'quantity_used', 'unit', 'notes', 'recorded_by', 'created_at')
+INVENTORY_COLUMNS = ('id', 'orphanage_id', 'orphanage_name', 'item_id', 'item_name', 'category', 'quantity',
+                     'unit', 'minimum_level', 'maximum_level', 'expiry_date', 'last_updated')
+
+class ReportExportService:
+    """Constant-memory CSV / JSON-lines exports of usage logs and inventory
+    
+    Rows are read with server-side iteration (``yield_per``) as plain
+    tuples and encoded into bounded chunks. A chunk is emitted when it
+    reaches EXPORT_FLUSH_BYTES or EXPORT_FLUSH_SECONDS after the previous
+    one, and the first row is emitted as soon as it arrives, so the first
+    byte never waits for the whole result.
+    """
+    
+    @staticmethod
+    def _usage_rows(orphanage_id, start_date, end_date):
+        query = db.session.query(
+            UsageLog.id, UsageLog.date, UsageLog.orphanage_id, Orphanage.name, UsageLog.item_id, Item.name,
+            Item.category, UsageLog.quantity_used, Item.unit, UsageLog.notes, UsageLog.recorded_by, UsageLog.created_at
+        ).join(Item, UsageLog.item_id == Item.id)\
+         .join(Orphanage, UsageLog.orphanage_id == Orphanage.id)
+        if orphanage_id:
+            query = query.filter(UsageLog.orphanage_id == orphanage_id)
+        if start_date:
+            query = query.filter(UsageLog.date >= start_date)
+        if end_date:
+            query = query.filter(UsageLog.date <= end_date)
+        return query.order_by(UsageLog.date, UsageLog.id)
+    
+    @staticmethod
+    def _inventory_rows(orphanage_id):
+        query = db.session.query(
+            Inventory.id, Inventory.orphanage_id, Orphanage.name, Inventory.item_id, Item.name, Item.category,
+            Inventory.quantity, Item.unit, Inventory.minimum_level, Inventory.maximum_level, Inventory.expiry_date,
+            Inventory.last_updated
+        ).join(Item, Inventory.item_id == Item.id)\
+         .join(Orphanage, Inventory.orphanage_id == Orphanage.id)
+        if orphanage_id:
+            query = query.filter(Inventory.orphanage_id == orphanage_id)
+        return query.order_by(Inventory.orphanage_id, Inventory.id)
+    
+    @staticmethod
+    def _encode(columns, rows, export_format):
+        """Yield the CSV header and then one encoded line per row"""
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in itertools.chain([columns], rows):
+                writer.writerow(row)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        else:
+            for row in rows:
+                yield json.dumps(dict(zip(columns, row)), default=str) + '\n'
+    
+    @staticmethod
+    def _chunks(lines):
+        """Group encoded lines into byte chunks bounded in size and delay"""
+        config = current_app.config
+        flush_bytes = config.get('EXPORT_FLUSH_BYTES', 64 * 1024)
+        flush_seconds = config.get('EXPORT_FLUSH_SECONDS', 1.0)
+        
+        parts, size = [], 0
+        last_flush = None
+        for line in lines:
+            data = line.encode('utf-8')
+            parts.append(data)
+            size += len(data)
+            # The first line goes out at once so the response starts promptly
+            if last_flush is None or size >= flush_bytes or time.monotonic() - last_flush >= flush_seconds:
+                yield b''.join(parts)
+                parts, size = [], 0
+                last_flush = time.monotonic()
+        if parts:
+            yield b''.join(parts)
+    
+    @staticmethod
+    def _gzip(chunks):
+        # A sync flush per chunk keeps the compressed stream incremental
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    
+    @staticmethod
+    def stream(dataset, export_format='csv', orphanage_id=None, start_date=None, end_date=None, compress=False):
+        """Return a generator of export byte chunks, gzip-compressed if ``compress``
+        
+        ``dataset`` is 'usage' (logs in the date range) or 'inventory' (the
+        current inventory rows; there is no inventory history to filter).
+        Raises ValueError for an unknown dataset or format.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        if dataset == 'usage':
+            columns, query = USAGE_COLUMNS, ReportExportService._usage_rows(orphanage_id, start_date, end_date)
+        elif dataset == 'inventory':
+            columns, query = INVENTORY_COLUMNS, ReportExportService._inventory_rows(orphanage_id)
+        else:
+            raise ValueError('dataset must be usage or inventory')
+        
+        rows = query.execution_options(yield_per=current_app.config.get('EXPORT_YIELD_PER', 1000))
+        chunks = ReportExportService._chunks(ReportExportService._encode(columns, rows, export_format))
+        return ReportExportService._gzip(chunks) if compress else chunks
@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, Response, stream_with_context, current_app
+import json
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 from app.models import Orphanage, Item, Inventory, UsageLog, Alert, db
-from app.services import InventoryService, AlertService
-from app.ai_forecasting import forecasting_engine
+from app.services import InventoryService, AlertService, REPORT_GRANULARITIES
+from app.forecast_cache import ForecastCache
 
 main_bp = Blueprint('main', __name__)
 
@@ -17,7 +18,7 @@ def index():
     if not orphanage:
         return render_template('setup.html')
     
-    dashboard_data = InventoryService.get_dashboard_data(orphanage.id)
+    dashboard_data = InventoryService.get_cached_dashboard_data(orphanage.id)
     return render_template('dashboard.html', data=dashboard_data)
 
 @main_bp.route('/inventory')
@@ -150,6 +151,22 @@ def forecasting():
                          item_data=item_data,
                          inventory_data=inventory_data)
 
+@main_bp.route('/forecasting/risk')
+@login_required
+def stockout_risk():
+    """Items of an orphanage ranked by predicted stockout date"""
+    from app.stockout_risk import StockoutRiskService
+    
+    # Use current user's orphanage or allow admin to view any orphanage
+    if current_user.role.name == 'admin':
+        orphanage_id = request.args.get('orphanage_id', 1, type=int)
+    else:
+        orphanage_id = current_user.orphanage_id if current_user.orphanage_id else 1
+    
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    risks = [entry.to_dict() for entry in StockoutRiskService.top(orphanage_id, limit)]
+    return render_template('forecasting_risk.html', risks=risks, orphanage_id=orphanage_id, limit=limit)
+
 @main_bp.route('/api/forecasting/<int:orphanage_id>/<int:item_id>')
 @login_required
 def api_forecasting(orphanage_id, item_id):
@@ -157,6 +174,42 @@ def api_forecasting(orphanage_id, item_id):
     forecasting_data = InventoryService.get_forecasting_data(orphanage_id, item_id)
     return jsonify(forecasting_data)
 
+@main_bp.route('/api/forecasting/<int:orphanage_id>/batch')
+@login_required
+def api_forecasting_batch(orphanage_id):
+    """API endpoint streaming forecasts for many items as newline-delimited JSON"""
+    horizon = request.args.get('horizon', 7, type=int)
+    if not 1 <= horizon <= 90:
+        return jsonify({'success': False, 'message': 'horizon must be between 1 and 90 days'}), 400
+    
+    item_ids = None
+    if request.args.get('item_ids'):
+        try:
+            item_ids = [int(item_id) for item_id in request.args['item_ids'].split(',') if item_id.strip()]
+        except ValueError:
+            return jsonify({'success': False, 'message': 'item_ids must be a comma-separated list of integers'}), 400
+    
+    def generate():
+        for forecast in InventoryService.iter_batch_forecasts(orphanage_id, item_ids, horizon):
+            yield json.dumps(forecast) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@main_bp.route('/api/forecasting/<int:orphanage_id>/risk')
+@login_required
+def api_stockout_risk(orphanage_id):
+    """API endpoint for the top-N items by predicted stockout date"""
+    from app.stockout_risk import StockoutRiskService
+    
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    return jsonify([entry.to_dict() for entry in StockoutRiskService.top(orphanage_id, limit)])
+
+@main_bp.route('/api/forecasting/cache_stats')
+@login_required
+def api_forecast_cache_stats():
+    """API endpoint for forecast cache hit/miss counters"""
+    return jsonify(ForecastCache.stats())
+
 @main_bp.route('/chart-test')
 def chart_test():
     """Test page for charts"""
@@ -173,12 +226,43 @@ def alerts():
     else:
         orphanage_id = current_user.orphanage_id if current_user.orphanage_id else 1
     
-    alerts = Alert.query.filter_by(orphanage_id=orphanage_id)\
-                       .order_by(Alert.created_at.desc()).all()
+    try:
+        alerts, next_cursor = AlertService.list_alerts(
+            orphanage_id, current_app.config['ITEMS_PER_PAGE'], request.args.get('cursor')
+        )
+    except ValueError:
+        # Stale or mangled cursor: start from the newest alerts
+        alerts, next_cursor = AlertService.list_alerts(orphanage_id, current_app.config['ITEMS_PER_PAGE'])
     
     alerts_summary = AlertService.get_alerts_summary(orphanage_id)
     
-    return render_template('alerts.html', alerts=alerts, alerts_summary=alerts_summary)
+    return render_template('alerts.html', alerts=alerts, alerts_summary=alerts_summary,
+                           next_cursor=next_cursor, orphanage_id=orphanage_id)
+
+@main_bp.route('/api/alerts/<int:orphanage_id>')
+@login_required
+def api_alerts(orphanage_id):
+    """API endpoint for keyset-paginated alerts, newest first"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    try:
+        alerts, next_cursor = AlertService.list_alerts(orphanage_id, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    return jsonify({
+        'alerts': [
+            {
+                'id': alert.id,
+                'item_id': alert.item_id,
+                'alert_type': alert.alert_type,
+                'title': alert.title,
+                'message': alert.message,
+                'is_read': bool(alert.is_read),
+                'created_at': alert.created_at.isoformat() if alert.created_at else None
+            } for alert in alerts
+        ],
+        'next_cursor': next_cursor
+    })
 
 @main_bp.route('/alerts/mark_read/<int:alert_id>', methods=['POST'])
 @login_required
@@ -187,10 +271,8 @@ def mark_alert_read(alert_id):
     success = AlertService.mark_alert_as_read(alert_id)
     return jsonify({'success': success})
 
-@main_bp.route('/reports')
-@login_required
-def reports():
-    """Reports page"""
+def _report_params():
+    """Orphanage, date range and paging of a usage report request"""
     # Use current user's orphanage or allow admin to view any orphanage
     if current_user.role.name == 'admin':
         orphanage_id = request.args.get('orphanage_id', 1, type=int)
@@ -207,19 +289,85 @@ def reports():
     if request.args.get('end_date'):
         end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
     
+    return {
+        'orphanage_id': orphanage_id,
+        'start_date': start_date,
+        'end_date': end_date,
+        'granularity': request.args.get('granularity', 'day'),
+        'page': max(request.args.get('page', 1, type=int), 1),
+        'per_page': min(max(request.args.get('per_page', 20, type=int), 1), 100),
+        'item_id': request.args.get('item_id', type=int)
+    }
+
+@main_bp.route('/reports')
+@login_required
+def reports():
+    """Reports page"""
+    params = _report_params()
+    if params['granularity'] not in REPORT_GRANULARITIES:
+        params['granularity'] = 'day'
+    
     # Get usage report and summary statistics
-    usage_report = InventoryService.generate_usage_report(orphanage_id, start_date, end_date)
-    summary_stats = InventoryService.get_report_summary_stats(orphanage_id)
+    usage_report = InventoryService.generate_usage_report(**params)
+    summary_stats = InventoryService.get_report_summary_stats(params['orphanage_id'])
     
     return render_template('reports.html', 
                          usage_report=usage_report,
-                         start_date=start_date,
-                         end_date=end_date,
+                         start_date=params['start_date'],
+                         end_date=params['end_date'],
                          total_items=summary_stats['total_items'],
                          low_stock_count=summary_stats['low_stock_count'],
                          total_usage_logs=summary_stats['total_usage_logs'],
                          total_orphanages=summary_stats['total_orphanages'])
 
+@main_bp.route('/api/reports/usage')
+@login_required
+def api_usage_report():
+    """API endpoint for a paginated usage report with day/week/month series"""
+    try:
+        params = _report_params()
+        usage_report = InventoryService.generate_usage_report(**params)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    for usage in usage_report['item_usage'].values():
+        for bucket in usage['usage_series']:
+            bucket['period_start'] = bucket['period_start'].isoformat()
+    return jsonify(usage_report)
+
+@main_bp.route('/reports/export')
+@login_required
+def export_report():
+    """Stream usage logs or inventory as CSV or JSON lines"""
+    from app.report_export import ReportExportService
+    
+    # Admins may export the whole network, other users their own orphanage
+    if current_user.role.name == 'admin':
+        orphanage_id = request.args.get('orphanage_id', type=int)
+    else:
+        orphanage_id = current_user.orphanage_id if current_user.orphanage_id else 1
+    
+    dataset = request.args.get('dataset', 'usage')
+    export_format = request.args.get('format', 'csv')
+    compress = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else None
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else None
+        chunks = ReportExportService.stream(dataset, export_format, orphanage_id, start_date, end_date, compress)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    filename = f"{dataset}_export_{date.today().isoformat()}.{export_format}"
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    if compress:
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Accel-Buffering': 'no'  # Let reverse proxies pass chunks through as they come
+    })
+
 @main_bp.route('/items')
 @login_required
 def items():
@@ -267,29 +415,28 @@ def orphanages():
 @login_required
 def api_dashboard(orphanage_id):
     """API endpoint for dashboard data"""
-    dashboard_data = InventoryService.get_dashboard_data(orphanage_id)
+    dashboard_data = InventoryService.get_cached_dashboard_data(orphanage_id)
     
     # Convert data to JSON-serializable format
     if dashboard_data:
-        # Remove non-serializable objects
         api_data = {
             'summary': dashboard_data['summary'],
             'category_stats': dashboard_data['category_stats'],
             'low_stock_items': [
                 {
-                    'item_name': inv.item.name,
-                    'current_stock': inv.quantity,
-                    'minimum_level': inv.minimum_level,
-                    'unit': inv.item.unit,
-                    'category': inv.item.category
+                    'item_name': inv['item']['name'],
+                    'current_stock': inv['quantity'],
+                    'minimum_level': inv['minimum_level'],
+                    'unit': inv['item']['unit'],
+                    'category': inv['item']['category']
                 } for inv in dashboard_data['low_stock_items']
             ],
             'recent_usage': [
                 {
-                    'item_name': log.item.name,
-                    'quantity_used': log.quantity_used,
-                    'date': log.date.isoformat(),
-                    'unit': log.item.unit
+                    'item_name': log['item']['name'],
+                    'quantity_used': log['quantity_used'],
+                    'date': log['date'].isoformat(),
+                    'unit': log['item']['unit']
                 } for log in dashboard_data['recent_usage']
             ]
         }
@@ -297,12 +444,28 @@ def api_dashboard(orphanage_id):
     
     return jsonify({'error': 'Orphanage not found'}), 404
 
+@main_bp.route('/api/inventory/expiring')
+@login_required
+def api_expiring_inventory():
+    """API endpoint for items expiring within a window, grouped by orphanage"""
+    days = request.args.get('days', 7, type=int)
+    if not 1 <= days <= 365:
+        return jsonify({'success': False, 'message': 'days must be between 1 and 365'}), 400
+    include_expired = request.args.get('include_expired', 'false').lower() in ('1', 'true', 'yes')
+    
+    # Admins see the whole network, other users their own orphanage
+    orphanage_id = None
+    if current_user.role.name != 'admin':
+        orphanage_id = current_user.orphanage_id if current_user.orphanage_id else 1
+    
+    return jsonify(InventoryService.get_expiring_items(days, include_expired, orphanage_id))
+
 @main_bp.route('/check_alerts')
 @login_required
 def check_alerts():
     """Manual alert check endpoint"""
-    alerts_created = InventoryService.check_and_create_alerts()
-    return jsonify({'alerts_created': alerts_created})
+    result = InventoryService.evaluate_alerts()
+    return jsonify(result)
 
 # Error handlers
 @main_bp.errorhandler(404)
@@ -510,8 +673,12 @@ def add_usage_log():
         notes=data.get('notes'),
         recorded_by=data.get('recorded_by')
     )
+    day_totals = UsageLog.get_day_totals(log.orphanage_id, log.item_id, [log.date])
     db.session.add(log)
     db.session.commit()
+    InventoryService.record_usage_change(
+        log.orphanage_id, log.item_id, {log.date: log.quantity_used}, day_totals, log_count_change=1
+    )
     return jsonify({'success': True, 'message': 'Usage log added', 'id': log.id})
 
 @main_bp.route('/usage_logs/<int:log_id>', methods=['PUT'])
@@ -519,18 +686,29 @@ def add_usage_log():
 def update_usage_log(log_id):
     data = request.get_json()
     log = UsageLog.query.get_or_404(log_id)
+    old_date, old_quantity = log.date, log.quantity_used
+    new_date = datetime.strptime(data['date'], '%Y-%m-%d').date() if data.get('date') else log.date
+    day_totals = UsageLog.get_day_totals(log.orphanage_id, log.item_id, {old_date, new_date})
     log.quantity_used = data.get('quantity_used', log.quantity_used)
     log.notes = data.get('notes', log.notes)
-    log.date = datetime.strptime(data['date'], '%Y-%m-%d').date() if data.get('date') else log.date
+    log.date = new_date
     db.session.commit()
+    deltas = {old_date: -old_quantity}
+    deltas[new_date] = deltas.get(new_date, 0) + log.quantity_used
+    InventoryService.record_usage_change(log.orphanage_id, log.item_id, deltas, day_totals)
     return jsonify({'success': True, 'message': 'Usage log updated'})
 
 @main_bp.route('/usage_logs/<int:log_id>', methods=['DELETE'])
 @login_required
 def delete_usage_log(log_id):
     log = UsageLog.query.get_or_404(log_id)
+    orphanage_id, item_id, log_date, quantity_used = log.orphanage_id, log.item_id, log.date, log.quantity_used
+    day_totals = UsageLog.get_day_totals(orphanage_id, item_id, [log_date])
     db.session.delete(log)
     db.session.commit()
+    InventoryService.record_usage_change(
+        orphanage_id, item_id, {log_date: -quantity_used}, day_totals, log_count_change=-1
+    )
     return jsonify({'success': True, 'message': 'Usage log deleted'})
 
 @main_bp.route('/alerts/<int:alert_id>', methods=['GET'])
@@ -0,0 +1,177 @@
+import json
+import numpy as np
+from datetime import datetime
+from app.models import UsageLog, ForecastState, SeasonalityProfile
+from app import db
+
+WEEKDAY_KEYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+MONTH_KEYS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+SEASONS = {
+    'winter': (12, 1, 2),
+    'spring': (3, 4, 5),
+    'summer': (6, 7, 8),
+    'autumn': (9, 10, 11)
+}
+
+# History needed before the weekday / monthly factors are reported
+MIN_WEEKLY_DAYS = 28
+MIN_MONTHLY_DAYS = 365
+
+class SeasonalityService:
+    """Materialized weekday and monthly seasonality profiles"""
+    
+    @staticmethod
+    def _calendar_days(first_date, last_date):
+        """Count the days per weekday (Monday first) and per month in a date span"""
+        days = np.arange(np.datetime64(first_date), np.datetime64(last_date) + 1)
+        weekdays = (days.astype(int) + 3) % 7  # 1970-01-01 was a Thursday
+        months = days.astype('datetime64[M]').astype(int) % 12
+        return np.bincount(weekdays, minlength=7), np.bincount(months, minlength=12)
+    
+    @staticmethod
+    def _changed_items(since):
+        """(orphanage_id, item_id) pairs with usage writes after ``since``, or all if None"""
+        new_logs = db.session.query(UsageLog.orphanage_id, UsageLog.item_id)
+        if since is None:
+            return set(new_logs.distinct().all())
+        
+        changed = set(new_logs.filter(UsageLog.created_at > since).distinct().all())
+        # Edits and deletions of older logs touch the item's forecast state
+        changed.update(db.session.query(ForecastState.orphanage_id, ForecastState.item_id).filter(
+            ForecastState.updated_at > since
+        ).all())
+        return changed
+    
+    @staticmethod
+    def compute(orphanage_id, item_ids):
+        """Compute the factors of items of one orphanage with GROUP BY queries
+        
+        Returns {item_id: (weekday_factors, monthly_factors, first_date, last_date)}
+        for items that have usage logs.
+        """
+        scope = (UsageLog.orphanage_id == orphanage_id, UsageLog.item_id.in_(item_ids))
+        weekday = db.extract('dow', UsageLog.date)  # 0 = Sunday
+        month = db.extract('month', UsageLog.date)
+        total = db.func.sum(UsageLog.quantity_used)
+        
+        spans = db.session.query(
+            UsageLog.item_id, db.func.min(UsageLog.date), db.func.max(UsageLog.date), total
+        ).filter(*scope).group_by(UsageLog.item_id).all()
+        by_weekday = db.session.query(UsageLog.item_id, weekday, total).filter(*scope).group_by(UsageLog.item_id, weekday).all()
+        by_month = db.session.query(UsageLog.item_id, month, total).filter(*scope).group_by(UsageLog.item_id, month).all()
+        
+        weekday_sums = {item_id: np.zeros(7) for item_id, _, _, _ in spans}
+        for item_id, dow, quantity in by_weekday:
+            weekday_sums[item_id][(int(dow) + 6) % 7] = quantity or 0
+        month_sums = {item_id: np.zeros(12) for item_id, _, _, _ in spans}
+        for item_id, month_number, quantity in by_month:
+            month_sums[item_id][int(month_number) - 1] = quantity or 0
+        
+        profiles = {}
+        for item_id, first_date, last_date, quantity in spans:
+            weekday_days, month_days = SeasonalityService._calendar_days(first_date, last_date)
+            overall = (quantity or 0) / ((last_date - first_date).days + 1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weekday_factors = np.where(weekday_days > 0, weekday_sums[item_id] / weekday_days, overall)
+                month_factors = np.where(month_days > 0, month_sums[item_id] / month_days, overall)
+            if overall > 0:
+                weekday_factors, month_factors = weekday_factors / overall, month_factors / overall
+            else:
+                weekday_factors, month_factors = np.ones(7), np.ones(12)
+            profiles[item_id] = (
+                [round(float(f), 4) for f in weekday_factors],
+                [round(float(f), 4) for f in month_factors],
+                first_date, last_date
+            )
+        return profiles
+    
+    @staticmethod
+    def refresh(full=False, chunk_size=500):
+        """Recompute the profiles of items with usage writes since the last refresh"""
+        started = datetime.utcnow()
+        last_refresh = None if full else db.session.query(db.func.max(SeasonalityProfile.computed_at)).scalar()
+        
+        items_by_orphanage = {}
+        for orphanage_id, item_id in SeasonalityService._changed_items(last_refresh):
+            items_by_orphanage.setdefault(orphanage_id, []).append(item_id)
+        
+        refreshed = 0
+        try:
+            for orphanage_id, item_ids in items_by_orphanage.items():
+                for i in range(0, len(item_ids), chunk_size):
+                    chunk = item_ids[i:i + chunk_size]
+                    profiles = SeasonalityService.compute(orphanage_id, chunk)
+                    existing = {
+                        profile.item_id: profile for profile in SeasonalityProfile.query.filter(
+                            SeasonalityProfile.orphanage_id == orphanage_id,
+                            SeasonalityProfile.item_id.in_(chunk)
+                        ).all()
+                    }
+                    
+                    for item_id in chunk:
+                        profile = existing.get(item_id)
+                        if item_id not in profiles:
+                            # All of the item's logs were deleted
+                            if profile is not None:
+                                db.session.delete(profile)
+                            continue
+                        
+                        if profile is None:
+                            profile = SeasonalityProfile(orphanage_id=orphanage_id, item_id=item_id)
+                            db.session.add(profile)
+                        weekday_factors, month_factors, first_date, last_date = profiles[item_id]
+                        profile.weekday_factors = json.dumps(weekday_factors)
+                        profile.monthly_factors = json.dumps(month_factors)
+                        profile.first_date = first_date
+                        profile.last_date = last_date
+                        profile.computed_at = started
+                        refreshed += 1
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        return {
+            'items_checked': sum(len(item_ids) for item_ids in items_by_orphanage.values()),
+            'profiles_refreshed': refreshed,
+            'full': last_refresh is None
+        }
+    
+    @staticmethod
+    def get_patterns(orphanage_id, item_id):
+        """Get an item's seasonal patterns from its stored profile"""
+        profile = SeasonalityProfile.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        history_days = profile.history_days() if profile else 0
+        
+        weekly_patterns = {}
+        if history_days >= MIN_WEEKLY_DAYS:
+            weekly_patterns = dict(zip(WEEKDAY_KEYS, json.loads(profile.weekday_factors)))
+        
+        if history_days < MIN_MONTHLY_DAYS:
+            return {
+                'has_seasonal_pattern': False,
+                'peak_season': None,
+                'low_season': None,
+                'seasonal_variation': 0.0,
+                'monthly_patterns': {},
+                'weekly_patterns': weekly_patterns
+            }
+        
+        monthly_factors = json.loads(profile.monthly_factors)
+        season_factors = {
+            season: sum(monthly_factors[m - 1] for m in months) / len(months)
+            for season, months in SEASONS.items()
+        }
+        return {
+            'has_seasonal_pattern': True,
+            'peak_season': max(season_factors, key=season_factors.get),
+            'low_season': min(season_factors, key=season_factors.get),
+            'seasonal_variation': (max(monthly_factors) - min(monthly_factors)) / 2,
+            'monthly_patterns': dict(zip(MONTH_KEYS, monthly_factors)),
+            'weekly_patterns': weekly_patterns
+        }
+    
+    @staticmethod
+    def monthly_factor(seasonal_patterns, day):
+        """Monthly multiplier for a date, or 1.0 without a monthly pattern"""
+        return seasonal_patterns.get('monthly_patterns', {}).get(MONTH_KEYS[day.month - 1], 1.0)
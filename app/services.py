@@ -1,14 +1,28 @@
+import base64
+import binascii
+import time
 from datetime import datetime, date, timedelta
-from app.models import Inventory, UsageLog, Alert, Orphanage, Item
-from app.ai_forecasting import forecasting_engine
+from app.models import Inventory, UsageLog, Alert, Orphanage, Item, ForecastAccuracy
+from app.lazy_forecasting import forecasting_engine
+from app.forecast_cache import ForecastCache
+from app.forecast_snapshots import ForecastSnapshotService
 from app import db
 
+# Latest unread alerts fetched for the dashboard (the page shows the first five)
+DASHBOARD_LIST_LIMIT = 10
+
+REPORT_GRANULARITIES = ('day', 'week', 'month')
+
 class InventoryService:
     """Service class for inventory management operations"""
     
     @staticmethod
-    def update_stock(orphanage_id, item_id, quantity_change, operation='add', notes=None):
-        """Update inventory stock levels"""
+    def update_stock(orphanage_id, item_id, quantity_change, operation='add', notes=None, record_usage=True):
+        """Update inventory stock levels
+        
+        Callers that fold this change into a larger usage write pass
+        ``record_usage=False`` and call record_usage_change once themselves.
+        """
         inventory = Inventory.query.filter_by(
             orphanage_id=orphanage_id,
             item_id=item_id
@@ -33,6 +47,7 @@ class InventoryService:
             
             # Create usage log if subtracting (consumption)
             if operation == 'subtract' and quantity_change > 0:
+                day_totals = UsageLog.get_day_totals(orphanage_id, item_id, [date.today()])
                 usage_log = UsageLog(
                     orphanage_id=orphanage_id,
                     item_id=item_id,
@@ -42,6 +57,12 @@ class InventoryService:
                 )
                 db.session.add(usage_log)
                 db.session.commit()
+                if record_usage:
+                    InventoryService.record_usage_change(
+                        orphanage_id, item_id, {usage_log.date: quantity_change}, day_totals, log_count_change=1
+                    )
+            elif record_usage:
+                InventoryService.refresh_stockout_risk(orphanage_id, item_id)
             
             # Check for alerts
             InventoryService.check_and_create_alerts(inventory)
@@ -61,6 +82,9 @@ class InventoryService:
         if usage_date is None:
             usage_date = date.today()
         
+        today = date.today()
+        day_totals = UsageLog.get_day_totals(orphanage_id, item_id, [usage_date, today])
+        
         # Check if usage already logged for this date
         existing_log = UsageLog.query.filter_by(
             orphanage_id=orphanage_id,
@@ -77,6 +101,7 @@ class InventoryService:
             
             # Adjust inventory (add back old quantity, subtract new quantity)
             quantity_adjustment = old_quantity - quantity_used
+            log_count_change = 0
         else:
             # Create new log
             usage_log = UsageLog(
@@ -88,16 +113,28 @@ class InventoryService:
             )
             db.session.add(usage_log)
             quantity_adjustment = -quantity_used
+            log_count_change = 1
         
         # Update inventory
         result = InventoryService.update_stock(
             orphanage_id, item_id, abs(quantity_adjustment),
-            operation='add' if quantity_adjustment > 0 else 'subtract'
+            operation='add' if quantity_adjustment > 0 else 'subtract',
+            record_usage=False
         )
         
         if result["success"]:
             try:
                 db.session.commit()
+                
+                # Record this log and the consumption log update_stock writes
+                # for today as one change
+                deltas = {usage_date: -quantity_adjustment}
+                if quantity_adjustment < 0:
+                    deltas[today] = deltas.get(today, 0) - quantity_adjustment
+                    log_count_change += 1
+                InventoryService.record_usage_change(
+                    orphanage_id, item_id, deltas, day_totals, log_count_change
+                )
                 return {"success": True, "message": "Usage logged successfully"}
             except Exception as e:
                 db.session.rollback()
@@ -105,59 +142,137 @@ class InventoryService:
         else:
             return result
     
+    @staticmethod
+    def record_usage_change(orphanage_id, item_id, deltas, day_totals_before, log_count_change=0):
+        """Propagate committed usage log writes to the forecasting state and cache
+        
+        ``deltas`` maps each affected date to the change in that day's total
+        usage; ``day_totals_before`` holds the totals read before the write.
+        """
+        from app.forecast_state import ForecastStateService
+        from app.forecast_models import ForecastModelService
+        
+        state = None
+        try:
+            state = ForecastStateService.apply(orphanage_id, item_id, deltas, day_totals_before, log_count_change)
+        except Exception as e:
+            # The state can always be recomputed with `flask forecast rebuild-state`
+            print(f"Forecast state update failed: {str(e)}")
+        
+        try:
+            ForecastModelService.record_actuals(orphanage_id, item_id, {
+                day: day_totals_before.get(day, 0) + delta for day, delta in deltas.items()
+            }, state)
+        except Exception as e:
+            print(f"Forecast drift check failed: {str(e)}")
+        ForecastCache.invalidate(orphanage_id, item_id)
+        InventoryService.refresh_stockout_risk(orphanage_id, item_id)
+    
+    @staticmethod
+    def refresh_stockout_risk(orphanage_id, item_id):
+        """Update the item's entry in the stockout-risk index after a stock or usage change"""
+        from app.stockout_risk import StockoutRiskService
+        
+        try:
+            StockoutRiskService.refresh(orphanage_id, item_id)
+        except Exception as e:
+            # The index can always be rebuilt with `flask forecast rebuild-risk`
+            print(f"Stockout risk update failed: {str(e)}")
+    
     @staticmethod
     def check_and_create_alerts(inventory=None):
         """Check inventory levels and create alerts as needed"""
-        if inventory:
-            inventories = [inventory]
-        else:
-            inventories = Inventory.query.all()
+        result = InventoryService.evaluate_alerts(inventory_id=inventory.id if inventory else None)
+        return result['alerts_created']
+    
+    @staticmethod
+    def evaluate_alerts(orphanage_id=None, inventory_id=None, changed_since=None, before_write=None):
+        """Create stock and expiry alerts for every inventory row that needs one
         
-        alerts_created = 0
+        Rows are classified with SQL predicates, rows that already have an
+        unread alert are excluded with an anti-join (NOT EXISTS) and the new
+        alerts are written with a single bulk insert. A row gets at most one
+        stock alert (critical or low) and one expiry alert (expired or
+        expiring). With ``changed_since`` (UTC) only rows updated after it or
+        whose expiry date crossed an alert threshold since then are checked.
+        ``before_write`` is called before the insert (the scheduler renews
+        its lease there). Returns per-type counts and timing.
+        """
+        started = time.perf_counter()
+        today = date.today()
         
-        for inv in inventories:
-            # Check for existing alerts to avoid duplicates
-            existing_alert = Alert.query.filter_by(
-                orphanage_id=inv.orphanage_id,
-                item_id=inv.item_id,
-                is_read=False
-            ).first()
-            
-            alert_created = False
-            
-            # Low stock alert
-            if inv.is_critical_stock() and not existing_alert:
-                alert = Alert.create_low_stock_alert(inv)
-                alert.alert_type = 'critical_stock'
-                alert.title = f'Critical Stock Alert: {inv.item.name}'
-                db.session.add(alert)
-                alert_created = True
-            elif inv.is_low_stock() and not existing_alert:
-                alert = Alert.create_low_stock_alert(inv)
-                db.session.add(alert)
-                alert_created = True
-            
-            # Expiry alerts
-            if inv.expiry_date:
-                if inv.is_expired() and not existing_alert:
-                    alert = Alert.create_expiry_alert(inv)
-                    db.session.add(alert)
-                    alert_created = True
-                elif inv.is_expiring_soon() and not existing_alert:
-                    alert = Alert.create_expiry_alert(inv)
-                    db.session.add(alert)
-                    alert_created = True
-            
-            if alert_created:
-                alerts_created += 1
+        stock_alert = db.case(
+            (Inventory.is_critical_stock(), 'critical_stock'),
+            (Inventory.is_low_stock(), 'low_stock'),
+            else_=None
+        )
+        expiry_alert = db.case(
+            (Inventory.is_expired(), 'expired'),
+            (Inventory.is_expiring_soon(7), 'expiring'),
+            else_=None
+        )
+        has_unread_alert = db.exists().where(
+            Alert.orphanage_id == Inventory.orphanage_id,
+            Alert.item_id == Inventory.item_id,
+            Alert.is_read == False
+        )
+        
+        query = db.session.query(
+            Inventory.orphanage_id, Inventory.item_id, Inventory.quantity, Inventory.minimum_level,
+            Inventory.expiry_date, Item.name, Item.unit, stock_alert, expiry_alert
+        ).join(Item, Inventory.item_id == Item.id)\
+         .filter(db.or_(stock_alert.isnot(None), expiry_alert.isnot(None)), ~has_unread_alert)
+        if orphanage_id:
+            query = query.filter(Inventory.orphanage_id == orphanage_id)
+        if inventory_id:
+            query = query.filter(Inventory.id == inventory_id)
+        if changed_since is not None:
+            # Expiry thresholds move with the local date, last_updated is UTC
+            last_day = (changed_since + (datetime.now() - datetime.utcnow())).date()
+            query = query.filter(db.or_(
+                Inventory.last_updated > changed_since,
+                # Became expired
+                db.and_(Inventory.expiry_date >= last_day, Inventory.expiry_date < today),
+                # Entered the 7-day expiring window
+                db.and_(Inventory.expiry_date > last_day + timedelta(days=7),
+                        Inventory.expiry_date <= today + timedelta(days=7))
+            ))
+        
+        rows = []
+        error = None
+        counts = {'low_stock': 0, 'critical_stock': 0, 'expiring': 0, 'expired': 0}
+        for inv_orphanage_id, inv_item_id, quantity, minimum_level, expiry_date, name, unit, stock_type, expiry_type in query.all():
+            fields = []
+            if stock_type:
+                fields.append(Alert.stock_alert_fields(name, unit, quantity, minimum_level,
+                                                       critical=stock_type == 'critical_stock'))
+            if expiry_type:
+                fields.append(Alert.expiry_alert_fields(name, (expiry_date - today).days))
+            for alert in fields:
+                rows.append(dict(alert, orphanage_id=inv_orphanage_id, item_id=inv_item_id))
+                counts[alert['alert_type']] += 1
         
-        if alerts_created > 0:
+        if rows and before_write:
+            before_write()
+        
+        if rows:
             try:
+                db.session.execute(db.insert(Alert), rows)
                 db.session.commit()
             except Exception as e:
                 db.session.rollback()
+                print(f"Alert evaluation error: {str(e)}")
+                counts = dict.fromkeys(counts, 0)
+                error = str(e)
         
-        return alerts_created
+        result = {
+            'alerts_created': sum(counts.values()),
+            'by_type': counts,
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        }
+        if error:
+            result['error'] = error
+        return result
     
     @staticmethod
     def get_dashboard_data(orphanage_id):
@@ -166,46 +281,65 @@ class InventoryService:
         if not orphanage:
             return None
         
-        # Get inventory summary
-        inventories = Inventory.query.filter_by(orphanage_id=orphanage_id).all()
+        today = date.today()
+        is_low = Inventory.is_low_stock()
+        is_critical = Inventory.is_critical_stock()
+        is_expiring = Inventory.is_expiring_soon(7)
+        
+        # Inventory summary and category breakdown in one aggregate query
+        category_rows = db.session.query(
+            Item.category,
+            db.func.count(Inventory.id),
+            db.func.sum(db.case((is_low, 1), else_=0)),
+            db.func.sum(db.case((is_critical, 1), else_=0)),
+            db.func.sum(db.case((is_expiring, 1), else_=0))
+        ).join(Item, Inventory.item_id == Item.id)\
+         .filter(Inventory.orphanage_id == orphanage_id)\
+         .group_by(Item.category).all()
         
-        total_items = len(inventories)
-        low_stock_items = [inv for inv in inventories if inv.is_low_stock()]
-        critical_stock_items = [inv for inv in inventories if inv.is_critical_stock()]
-        expiring_items = [inv for inv in inventories if inv.is_expiring_soon()]
+        category_stats = {}
+        total_items = low_stock_count = critical_stock_count = expiring_items_count = 0
+        for category, items, low, critical, expiring in category_rows:
+            category_stats[category] = {
+                'total_items': items,
+                'low_stock': int(low or 0),
+                'total_value': 0  # Could be enhanced with item prices
+            }
+            total_items += items
+            low_stock_count += int(low or 0)
+            critical_stock_count += int(critical or 0)
+            expiring_items_count += int(expiring or 0)
+        
+        # Every item needing attention, most urgent first, with their items
+        inventory_rows = Inventory.query.options(db.joinedload(Inventory.item))\
+                                        .filter(Inventory.orphanage_id == orphanage_id)
+        stock_ratio = Inventory.quantity / db.func.nullif(Inventory.minimum_level, 0)
+        low_stock_items = inventory_rows.filter(is_low).order_by(stock_ratio.asc()).all()
+        critical_stock_items = inventory_rows.filter(is_critical).order_by(stock_ratio.asc()).all()
+        expiring_items = inventory_rows.filter(is_expiring).order_by(Inventory.expiry_date.asc()).all()
         
         # Get recent usage
-        recent_usage = UsageLog.query.filter_by(orphanage_id=orphanage_id)\
-                                    .filter(UsageLog.date >= date.today() - timedelta(days=7))\
+        recent_usage = UsageLog.query.options(db.joinedload(UsageLog.item))\
+                                    .filter_by(orphanage_id=orphanage_id)\
+                                    .filter(UsageLog.date >= today - timedelta(days=7))\
                                     .order_by(UsageLog.date.desc())\
                                     .limit(10).all()
         
         # Get active alerts
-        active_alerts = Alert.query.filter_by(orphanage_id=orphanage_id, is_read=False)\
-                                  .order_by(Alert.created_at.desc()).all()
-        
-        # Category breakdown
-        category_stats = {}
-        for inv in inventories:
-            category = inv.item.category
-            if category not in category_stats:
-                category_stats[category] = {
-                    'total_items': 0,
-                    'low_stock': 0,
-                    'total_value': 0  # Could be enhanced with item prices
-                }
-            category_stats[category]['total_items'] += 1
-            if inv.is_low_stock():
-                category_stats[category]['low_stock'] += 1
+        active_alerts_query = Alert.query.filter_by(orphanage_id=orphanage_id, is_read=False)
+        active_alerts_count = active_alerts_query.count()
+        active_alerts = active_alerts_query.options(db.joinedload(Alert.item))\
+                                           .order_by(Alert.created_at.desc())\
+                                           .limit(DASHBOARD_LIST_LIMIT).all()
         
         return {
             'orphanage': orphanage,
             'summary': {
                 'total_items': total_items,
-                'low_stock_count': len(low_stock_items),
-                'critical_stock_count': len(critical_stock_items),
-                'expiring_items_count': len(expiring_items),
-                'active_alerts_count': len(active_alerts)
+                'low_stock_count': low_stock_count,
+                'critical_stock_count': critical_stock_count,
+                'expiring_items_count': expiring_items_count,
+                'active_alerts_count': active_alerts_count
             },
             'low_stock_items': low_stock_items,
             'critical_stock_items': critical_stock_items,
@@ -215,6 +349,163 @@ class InventoryService:
             'category_stats': category_stats
         }
     
+    @staticmethod
+    def get_expiring_items(days=7, include_expired=False, orphanage_id=None):
+        """Inventory expiring within ``days`` across the network, grouped by orphanage
+        
+        One range scan over the expiry_date index, joined to items and
+        orphanages. Each group lists its items soonest expiry first.
+        """
+        today = date.today()
+        window = Inventory.expiry_date <= today + timedelta(days=days) if include_expired \
+            else Inventory.is_expiring_soon(days)
+        
+        query = db.session.query(Inventory, Item, Orphanage)\
+                          .join(Item, Inventory.item_id == Item.id)\
+                          .join(Orphanage, Inventory.orphanage_id == Orphanage.id)\
+                          .filter(window)
+        if orphanage_id:
+            query = query.filter(Inventory.orphanage_id == orphanage_id)
+        
+        groups = {}
+        for inventory, item, orphanage in query.order_by(Inventory.orphanage_id, Inventory.expiry_date).all():
+            group = groups.setdefault(orphanage.id, {
+                'orphanage_id': orphanage.id,
+                'orphanage_name': orphanage.name,
+                'location': orphanage.location,
+                'items': []
+            })
+            group['items'].append({
+                'inventory_id': inventory.id,
+                'item_id': item.id,
+                'item_name': item.name,
+                'category': item.category,
+                'quantity': inventory.quantity,
+                'unit': item.unit,
+                'expiry_date': inventory.expiry_date.isoformat(),
+                'days_until_expiry': (inventory.expiry_date - today).days
+            })
+        
+        return {
+            'as_of': today.isoformat(),
+            'window_days': days,
+            'include_expired': include_expired,
+            'total_items': sum(len(group['items']) for group in groups.values()),
+            'orphanages': list(groups.values())
+        }
+    
+    @staticmethod
+    def _serialize_dashboard_data(data):
+        """Convert dashboard data to plain dicts so it can be cached"""
+        def item(item):
+            return {'id': item.id, 'name': item.name, 'category': item.category, 'unit': item.unit}
+        
+        def inventory(inv):
+            return {
+                'id': inv.id,
+                'item': item(inv.item),
+                'quantity': inv.quantity,
+                'minimum_level': inv.minimum_level,
+                'expiry_date': inv.expiry_date,
+                'is_critical': inv.is_critical_stock()
+            }
+        
+        orphanage = data['orphanage']
+        return {
+            'orphanage': {
+                'id': orphanage.id,
+                'name': orphanage.name,
+                'location': orphanage.location,
+                'contact_person': orphanage.contact_person,
+                'contact_phone': orphanage.contact_phone,
+                'contact_email': orphanage.contact_email
+            },
+            'summary': data['summary'],
+            'low_stock_items': [inventory(inv) for inv in data['low_stock_items']],
+            'critical_stock_items': [inventory(inv) for inv in data['critical_stock_items']],
+            'expiring_items': [inventory(inv) for inv in data['expiring_items']],
+            'recent_usage': [
+                {'id': log.id, 'item': item(log.item), 'quantity_used': log.quantity_used, 'date': log.date}
+                for log in data['recent_usage']
+            ],
+            'active_alerts': [
+                {
+                    'id': alert.id,
+                    'alert_type': alert.alert_type,
+                    'title': alert.title,
+                    'message': alert.message,
+                    'created_at': alert.created_at
+                } for alert in data['active_alerts']
+            ],
+            'category_stats': data['category_stats']
+        }
+    
+    @staticmethod
+    def get_cached_dashboard_data(orphanage_id):
+        """Get serialized dashboard data, recomputed only after relevant commits"""
+        from app.dashboard_cache import DashboardCache
+        
+        def compute():
+            data = InventoryService.get_dashboard_data(orphanage_id)
+            return InventoryService._serialize_dashboard_data(data) if data else None
+        
+        return DashboardCache.get_or_compute(orphanage_id, compute)
+    
+    @staticmethod
+    def iter_batch_forecasts(orphanage_id, item_ids=None, horizon=7, chunk_size=200):
+        """Yield usage forecasts for many items of an orphanage, one dict per item
+        
+        Items are forecast ``chunk_size`` at a time from their stored models
+        (one inventory and one model query per chunk), the same fits that
+        back the single-item forecasting API, so results can be streamed
+        while memory stays bounded by the chunk size.
+        """
+        from app.ai_forecasting import stock_projection
+        
+        if item_ids is None:
+            item_ids = [row.item_id for row in Inventory.query.with_entities(Inventory.item_id)
+                                                              .filter_by(orphanage_id=orphanage_id)
+                                                              .order_by(Inventory.item_id)
+                                                              .all()]
+        item_ids = list(dict.fromkeys(item_ids))
+        today = date.today()
+        
+        for i in range(0, len(item_ids), chunk_size):
+            chunk = item_ids[i:i + chunk_size]
+            inventories = {
+                inventory.item_id: inventory for inventory in Inventory.query.options(
+                    db.joinedload(Inventory.item)
+                ).filter(
+                    Inventory.orphanage_id == orphanage_id,
+                    Inventory.item_id.in_(chunk)
+                ).all()
+            }
+            forecasts = forecasting_engine.predict_usage_stored(orphanage_id, list(inventories), horizon)
+            
+            for item_id in chunk:
+                inventory = inventories.get(item_id)
+                if inventory is None:
+                    yield {'item_id': item_id, 'error': 'Inventory item not found'}
+                    continue
+                
+                forecast = forecasts[item_id]
+                current_stock = inventory.quantity if inventory.quantity is not None else 0
+                stockout_day = stock_projection(current_stock, forecast['predictions'])[1]
+                
+                yield {
+                    'item_id': item_id,
+                    'item_name': inventory.item.name,
+                    'current_stock': current_stock,
+                    'minimum_level': inventory.minimum_level,
+                    'predictions': [float(p) for p in forecast['predictions']],
+                    'total_predicted': float(forecast['total_predicted']),
+                    'method': forecast['method'],
+                    'confidence': forecast['confidence'],
+                    'accuracy': float(forecast['accuracy']) if forecast['accuracy'] is not None else None,
+                    'stockout_day': stockout_day,
+                    'stockout_date': (today + timedelta(days=stockout_day)).isoformat() if stockout_day else None
+                }
+    
     @staticmethod
     def get_forecasting_data(orphanage_id, item_id):
         """Get comprehensive AI forecasting data for an item"""
@@ -234,10 +525,32 @@ class InventoryService:
                     'accuracy': 0.0
                 }
             
-            # Get AI predictions
-            usage_prediction = forecasting_engine.predict_usage(orphanage_id, item_id)
-            stockout_prediction = forecasting_engine.predict_stockout(orphanage_id, item_id)
-            reorder_recommendation = forecasting_engine.get_reorder_recommendation(orphanage_id, item_id)
+            # Get AI predictions: one 30-day fit (or tonight's precomputed
+            # snapshot) feeds the 7-day usage, stockout and reorder views
+            snapshot = ForecastSnapshotService.get_fresh(orphanage_id, item_id)
+            forecast_context = forecasting_engine.context(
+                orphanage_id, item_id, horizon=30, inventory=inventory,
+                forecast=snapshot.to_forecast() if snapshot else None
+            )
+            usage_prediction = forecast_context.usage()
+            stockout_prediction = forecast_context.stockout()
+            reorder_recommendation = forecast_context.reorder()
+            
+            # Summary fields the forecasting page shows, from the same fit
+            if usage_prediction:
+                usage_prediction = dict(
+                    usage_prediction,
+                    daily_average=usage_prediction['total_predicted'] / len(usage_prediction['predictions']),
+                    weekly_predictions=usage_prediction['predictions'],
+                    monthly_predicted=forecast_context.usage(30)['total_predicted']
+                )
+            if stockout_prediction:
+                days_remaining = stockout_prediction['stockout_day'] or \
+                    (stockout_prediction.get('stockout_day_quantiles') or {}).get('p50')
+                stockout_prediction['risk_level'] = (
+                    'low' if days_remaining is None else
+                    'high' if days_remaining < 7 else 'medium' if days_remaining < 14 else 'low'
+                )
             
             # Calculate accuracy based on recent predictions vs actual usage
             accuracy = InventoryService._calculate_forecast_accuracy(orphanage_id, item_id)
@@ -341,21 +654,12 @@ class InventoryService:
     
     @staticmethod
     def _calculate_forecast_accuracy(orphanage_id, item_id):
-        """Calculate forecast accuracy based on historical data"""
-        try:
-            # Simple accuracy calculation - in real implementation, 
-            # this would compare past predictions with actual usage
-            recent_usage = UsageLog.query.filter_by(
-                orphanage_id=orphanage_id, 
-                item_id=item_id
-            ).order_by(UsageLog.date.desc()).limit(30).all()
-            
-            if len(recent_usage) >= 7:
-                return 85.2 + (len(recent_usage) * 0.1)  # More data = higher accuracy
-            else:
-                return 65.0  # Lower accuracy with less data
-        except:
-            return 75.0  # Default accuracy
+        """Get out-of-sample forecast accuracy (100 - MAPE) from the latest backtest
+        
+        Returns None until `flask forecast backtest` has scored the item.
+        """
+        backtest = ForecastAccuracy.best_for(orphanage_id, item_id)
+        return backtest.accuracy_percentage() if backtest else None
     
     @staticmethod
     def _get_usage_analytics(orphanage_id, item_id):
@@ -463,28 +767,13 @@ class InventoryService:
     
     @staticmethod
     def _get_seasonal_patterns(orphanage_id, item_id):
-        """Analyze seasonal usage patterns"""
-        import random
+        """Get weekday and monthly usage patterns from the item's seasonality profile"""
+        from app.seasonality import SeasonalityService
         
         try:
-            # This would analyze seasonal patterns over longer periods
-            # For now, return mock seasonal data
-            return {
-                'has_seasonal_pattern': True,
-                'peak_season': 'winter',
-                'low_season': 'summer',
-                'seasonal_variation': 0.3,
-                'monthly_patterns': {
-                    'jan': 1.2, 'feb': 1.15, 'mar': 1.0, 'apr': 0.9,
-                    'may': 0.85, 'jun': 0.8, 'jul': 0.75, 'aug': 0.8,
-                    'sep': 0.95, 'oct': 1.05, 'nov': 1.1, 'dec': 1.25
-                },
-                'weekly_patterns': {
-                    'monday': 1.1, 'tuesday': 1.0, 'wednesday': 1.0,
-                    'thursday': 0.95, 'friday': 0.9, 'saturday': 0.7, 'sunday': 0.6
-                }
-            }
-        except:
+            return SeasonalityService.get_patterns(orphanage_id, item_id)
+        except Exception as e:
+            print(f"Seasonality error: {str(e)}")
             return {
                 'has_seasonal_pattern': False,
                 'peak_season': None,
@@ -579,8 +868,8 @@ class InventoryService:
         # Seasonal adjustment
         seasonal_factor = 1.0
         if seasonal_patterns.get('has_seasonal_pattern'):
-            current_month = 'jan'  # This would be dynamic
-            seasonal_factor = seasonal_patterns['monthly_patterns'].get(current_month, 1.0)
+            from app.seasonality import SeasonalityService
+            seasonal_factor = SeasonalityService.monthly_factor(seasonal_patterns, date.today())
         
         recommended_quantity = int(base_quantity * trend_factor * seasonal_factor)
         
@@ -631,15 +920,18 @@ class InventoryService:
                 'action': 'Plan reorder soon'
             })
         
-        # Usage trend risk
-        if stockout_prediction.get('stockout_day', 999) <= 7:
+        # Usage trend risk (no stockout within the forecast counts as far away)
+        stockout_day = stockout_prediction.get('stockout_day')
+        if stockout_day is None:
+            stockout_day = 999
+        if stockout_day <= 7:
             indicators.append({
                 'type': 'stockout_risk',
                 'severity': 'critical',
                 'message': 'Stockout predicted within 7 days',
                 'action': 'Emergency reorder needed'
             })
-        elif stockout_prediction.get('stockout_day', 999) <= 14:
+        elif stockout_day <= 14:
             indicators.append({
                 'type': 'stockout_risk',
                 'severity': 'high',
@@ -748,35 +1040,76 @@ class InventoryService:
         }
     
     @staticmethod
-    def generate_usage_report(orphanage_id, start_date, end_date):
-        """Generate usage report for a date range"""
-        usage_logs = UsageLog.query.filter(
+    def generate_usage_report(orphanage_id, start_date, end_date, granularity='day', page=1, per_page=20, item_id=None):
+        """Generate usage report for a date range
+        
+        Per-item totals come from one GROUP BY item query, paginated with
+        the largest consumers first; the usage series of the page's items
+        from one GROUP BY (item_id, date) query, rolled up to ``granularity``
+        (day, week starting Monday, or month). Pass ``item_id`` to drill
+        down into a single item.
+        """
+        if granularity not in REPORT_GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(REPORT_GRANULARITIES)}")
+        
+        scope = [
             UsageLog.orphanage_id == orphanage_id,
             UsageLog.date >= start_date,
             UsageLog.date <= end_date
-        ).order_by(UsageLog.date.desc()).all()
+        ]
+        if item_id:
+            scope.append(UsageLog.item_id == item_id)
+        
+        total_logs, total_items = db.session.query(
+            db.func.count(UsageLog.id), db.func.count(UsageLog.item_id.distinct())
+        ).filter(*scope).one()
+        
+        total_used = db.func.sum(UsageLog.quantity_used)
+        item_rows = db.session.query(
+            Item.id, Item.name, Item.unit, Item.category, total_used, db.func.count(UsageLog.id)
+        ).join(Item, UsageLog.item_id == Item.id)\
+         .filter(*scope)\
+         .group_by(Item.id, Item.name, Item.unit, Item.category)\
+         .order_by(total_used.desc(), Item.id)\
+         .limit(per_page).offset((page - 1) * per_page).all()
         
-        # Group by item
         item_usage = {}
-        for log in usage_logs:
-            item_name = log.item.name
-            if item_name not in item_usage:
-                item_usage[item_name] = {
-                    'total_used': 0,
-                    'unit': log.item.unit,
-                    'category': log.item.category,
-                    'daily_usage': []
-                }
-            item_usage[item_name]['total_used'] += log.quantity_used
-            item_usage[item_name]['daily_usage'].append({
-                'date': log.date,
-                'quantity': log.quantity_used,
-                'notes': log.notes
-            })
+        series = {}
+        for row_item_id, name, unit, category, quantity, log_count in item_rows:
+            series[row_item_id] = {}
+            item_usage[name] = {
+                'item_id': row_item_id,
+                'total_used': quantity or 0,
+                'log_count': log_count,
+                'unit': unit,
+                'category': category,
+                'usage_series': series[row_item_id]
+            }
+        
+        if series:
+            day_rows = db.session.query(UsageLog.item_id, UsageLog.date, total_used, db.func.count(UsageLog.id))\
+                                 .filter(*scope, UsageLog.item_id.in_(list(series)))\
+                                 .group_by(UsageLog.item_id, UsageLog.date).all()
+            for row_item_id, day, quantity, log_count in day_rows:
+                if granularity == 'week':
+                    day = day - timedelta(days=day.weekday())
+                elif granularity == 'month':
+                    day = day.replace(day=1)
+                bucket = series[row_item_id].setdefault(day, {'period_start': day, 'quantity': 0, 'log_count': 0})
+                bucket['quantity'] += quantity or 0
+                bucket['log_count'] += log_count
+        
+        for usage in item_usage.values():
+            usage['usage_series'] = sorted(usage['usage_series'].values(), key=lambda bucket: bucket['period_start'])
         
         return {
             'period': f"{start_date} to {end_date}",
-            'total_logs': len(usage_logs),
+            'granularity': granularity,
+            'total_logs': total_logs,
+            'total_items': total_items,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total_items + per_page - 1) // per_page,
             'item_usage': item_usage
         }
     
@@ -785,24 +1118,23 @@ class InventoryService:
         """Get summary statistics for reports page"""
         if orphanage_id:
             # Stats for specific orphanage
-            inventories = Inventory.query.filter_by(orphanage_id=orphanage_id).all()
-            usage_logs = UsageLog.query.filter_by(orphanage_id=orphanage_id).all()
-            total_orphanages = 1  # Current orphanage
-        else:
-            # Global stats for admin
-            inventories = Inventory.query.all()
-            usage_logs = UsageLog.query.all()
-            total_orphanages = Orphanage.query.count()
+            total_items, low_stock_count = db.session.query(
+                db.func.count(Inventory.id),
+                db.func.sum(db.case((Inventory.is_low_stock(), 1), else_=0))
+            ).filter(Inventory.orphanage_id == orphanage_id).one()
+            return {
+                'total_items': total_items,
+                'low_stock_count': int(low_stock_count or 0),
+                'total_usage_logs': UsageLog.query.filter_by(orphanage_id=orphanage_id).count(),
+                'total_orphanages': 1  # Current orphanage
+            }
         
-        # Calculate low stock items
-        low_stock_count = sum(1 for inv in inventories if inv.is_low_stock())
+        # Global stats for admin, summed from the per-orphanage counters
+        from app.report_counters import ReportCounterService
         
-        return {
-            'total_items': len(inventories),
-            'low_stock_count': low_stock_count,
-            'total_usage_logs': len(usage_logs),
-            'total_orphanages': total_orphanages
-        }
+        stats = ReportCounterService.totals()
+        stats['total_orphanages'] = Orphanage.query.count()
+        return stats
 
 class AlertService:
     """Service class for alert management"""
@@ -820,21 +1152,58 @@ class AlertService:
     @staticmethod
     def get_alerts_summary(orphanage_id):
         """Get alerts summary for an orphanage"""
-        alerts = Alert.query.filter_by(orphanage_id=orphanage_id).all()
+        rows = db.session.query(Alert.alert_type, Alert.is_read, db.func.count(Alert.id))\
+                         .filter(Alert.orphanage_id == orphanage_id)\
+                         .group_by(Alert.alert_type, Alert.is_read).all()
         
         summary = {
-            'total': len(alerts),
-            'unread': len([a for a in alerts if not a.is_read]),
+            'total': 0,
+            'unread': 0,
             'by_type': {}
         }
         
-        for alert in alerts:
-            alert_type = alert.alert_type
+        for alert_type, is_read, count in rows:
             if alert_type not in summary['by_type']:
                 summary['by_type'][alert_type] = {'total': 0, 'unread': 0}
             
-            summary['by_type'][alert_type]['total'] += 1
-            if not alert.is_read:
-                summary['by_type'][alert_type]['unread'] += 1
+            summary['total'] += count
+            summary['by_type'][alert_type]['total'] += count
+            if not is_read:
+                summary['unread'] += count
+                summary['by_type'][alert_type]['unread'] += count
         
         return summary
+    
+    @staticmethod
+    def _encode_cursor(alert):
+        return base64.urlsafe_b64encode(f'{alert.created_at.isoformat()}|{alert.id}'.encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor):
+        """Parse a listing cursor, raising ValueError if it is malformed"""
+        try:
+            created_at, alert_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(alert_id)
+        except (ValueError, UnicodeError, binascii.Error):
+            raise ValueError('invalid cursor')
+    
+    @staticmethod
+    def list_alerts(orphanage_id, limit=20, cursor=None):
+        """Get a page of an orphanage's alerts, newest first
+        
+        Keyset pagination on (created_at, id): ``cursor`` is the opaque
+        ``next_cursor`` of the previous page, so every page is an index
+        range scan however deep it is. Returns (alerts, next_cursor), with
+        next_cursor None on the last page.
+        """
+        query = Alert.query.filter(Alert.orphanage_id == orphanage_id)
+        if cursor:
+            created_at, alert_id = AlertService._decode_cursor(cursor)
+            query = query.filter(db.or_(
+                Alert.created_at < created_at,
+                db.and_(Alert.created_at == created_at, Alert.id < alert_id)
+            ))
+        
+        alerts = query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit + 1).all()
+        next_cursor = AlertService._encode_cursor(alerts[limit - 1]) if len(alerts) > limit else None
+        return alerts[:limit], next_cursor
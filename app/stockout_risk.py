@@ -0,0 +1,188 @@
+import time
+from datetime import date, datetime, timedelta
+from flask import current_app
+from app.models import Inventory, StockoutRisk, ForecastModel, ForecastState
+from app.forecast_models import ForecastModelService
+from app.forecast_state import ForecastStateService
+from app.stockout_simulation import StockoutSimulator
+from app.usage_series import UsageSeries
+from app.job_scheduler import JobScheduler
+from app import db
+
+RISK_HORIZON_DAYS = 30
+RISK_JOB = 'stockout_risk_rebuild'
+
+class StockoutRiskService:
+    """Per-orphanage stockout-risk index, updated one item at a time
+    
+    Entries are computed from the stored forecast fits with NumPy alone, so
+    refreshing one on every stock or usage write never loads the pandas and
+    scikit-learn forecasting stack.
+    """
+    
+    @staticmethod
+    def _daily_usage(orphanage_id, item_id, days, model, state):
+        """Forecast daily usage from the stored model, or the state fit while it awaits selection"""
+        if not ForecastModelService.needs_selection(model):
+            return ForecastModelService.evaluate(model, days)
+        
+        if state is None or state.half_life_days != ForecastStateService._half_life():
+            state = ForecastStateService.rebuild(orphanage_id, item_id, commit=False)
+        fitted = ForecastStateService.fit(state)
+        return ForecastModelService.evaluate_fit(fitted['coefficients'], fitted['origin_date'], days)
+    
+    @staticmethod
+    def _simulator(seed):
+        return StockoutSimulator(n_paths=current_app.config.get('FORECAST_SIMULATION_PATHS', 2000), seed=seed)
+    
+    @staticmethod
+    def _update(entry, current_stock, daily_usage, stockout, today):
+        """Store one item's simulated stockout summary in its index entry"""
+        median_day = stockout['stockout_day_quantiles'].get('p50')
+        entry.current_stock = current_stock
+        entry.daily_usage = float(daily_usage.sum()) / RISK_HORIZON_DAYS
+        entry.stockout_date = today + timedelta(days=median_day) if median_day else None
+        entry.stockout_probability_7d = stockout['stockout_probabilities'][6]
+        entry.computed_at = datetime.utcnow()
+    
+    @staticmethod
+    def refresh(orphanage_id, item_id, commit=True):
+        """Recompute the index entry of one item from its current stock and stored forecast"""
+        inventory = Inventory.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        entry = StockoutRisk.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+        
+        if inventory is None:
+            if entry is not None:
+                db.session.delete(entry)
+            entry = None
+        else:
+            today = date.today()
+            days = [today + timedelta(days=offset) for offset in range(1, RISK_HORIZON_DAYS + 1)]
+            daily_usage = StockoutRiskService._daily_usage(
+                orphanage_id, item_id, days,
+                ForecastModel.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first(),
+                ForecastState.query.filter_by(orphanage_id=orphanage_id, item_id=item_id).first()
+            )
+            current_stock = inventory.quantity if inventory.quantity is not None else 0
+            
+            history = UsageSeries.load(orphanage_id, [item_id], today - timedelta(days=30), today).values
+            simulator = StockoutRiskService._simulator((orphanage_id, item_id, today.toordinal()))
+            probabilities, quantile_days = simulator.simulate([daily_usage], history, [current_stock])
+            
+            if entry is None:
+                entry = StockoutRisk(orphanage_id=orphanage_id, item_id=item_id)
+                db.session.add(entry)
+            StockoutRiskService._update(
+                entry, current_stock, daily_usage, simulator.summarize(probabilities[0], quantile_days[0]), today
+            )
+        
+        if commit:
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return entry
+    
+    @staticmethod
+    def rebuild(orphanage_id=None, chunk_size=500, items=None, before_write=None):
+        """Recompute the entries of every inventory item, optionally for one orphanage
+        
+        Pass ``items`` ((orphanage_id, item_id) pairs) to only recompute those.
+        Items are processed ``chunk_size`` at a time per orphanage: one query
+        each for the chunk's usage history, stored models and states, then a
+        single simulation of the whole chunk sharing its random draws
+        (common random numbers) across items. ``before_write`` is called
+        after each chunk is simulated (the scheduler renews its lease there).
+        """
+        query = Inventory.query.with_entities(Inventory.orphanage_id, Inventory.item_id, Inventory.quantity)
+        if orphanage_id:
+            query = query.filter_by(orphanage_id=orphanage_id)
+        if items is not None:
+            items = set(items)
+            if not items:
+                return 0
+            query = query.filter(Inventory.orphanage_id.in_({key[0] for key in items}))
+        
+        stock_by_orphanage = {}
+        for inv_orphanage_id, inv_item_id, quantity in query.order_by(Inventory.orphanage_id, Inventory.item_id).all():
+            if items is not None and (inv_orphanage_id, inv_item_id) not in items:
+                continue
+            stock_by_orphanage.setdefault(inv_orphanage_id, {})[inv_item_id] = quantity if quantity is not None else 0
+        
+        today = date.today()
+        days = [today + timedelta(days=offset) for offset in range(1, RISK_HORIZON_DAYS + 1)]
+        simulator = StockoutRiskService._simulator(today.toordinal())
+        
+        rebuilt = 0
+        for inv_orphanage_id, stock in stock_by_orphanage.items():
+            item_ids = list(stock)
+            for start in range(0, len(item_ids), chunk_size):
+                chunk = item_ids[start:start + chunk_size]
+                models = {model.item_id: model for model in ForecastModel.query.filter(
+                    ForecastModel.orphanage_id == inv_orphanage_id, ForecastModel.item_id.in_(chunk)
+                ).all()}
+                states = {state.item_id: state for state in ForecastState.query.filter(
+                    ForecastState.orphanage_id == inv_orphanage_id, ForecastState.item_id.in_(chunk)
+                ).all()}
+                entries = {entry.item_id: entry for entry in StockoutRisk.query.filter(
+                    StockoutRisk.orphanage_id == inv_orphanage_id, StockoutRisk.item_id.in_(chunk)
+                ).all()}
+                
+                series = UsageSeries.load(inv_orphanage_id, chunk, today - timedelta(days=30), today)
+                usages = [
+                    StockoutRiskService._daily_usage(
+                        inv_orphanage_id, item_id, days, models.get(item_id), states.get(item_id)
+                    )
+                    for item_id in series.item_ids
+                ]
+                probabilities, quantile_days = simulator.simulate(
+                    usages, series.values, [stock[item_id] for item_id in series.item_ids]
+                )
+                
+                if before_write:
+                    before_write()
+                
+                for i, item_id in enumerate(series.item_ids):
+                    entry = entries.get(item_id)
+                    if entry is None:
+                        entry = StockoutRisk(orphanage_id=inv_orphanage_id, item_id=item_id)
+                        db.session.add(entry)
+                    StockoutRiskService._update(
+                        entry, stock[item_id], usages[i],
+                        simulator.summarize(probabilities[i], quantile_days[i]), today
+                    )
+                rebuilt += len(chunk)
+        
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return rebuilt
+    
+    @staticmethod
+    def top(orphanage_id, limit=20):
+        """Items expected to run out first, in one query on the (orphanage, date) index"""
+        return StockoutRisk.query.options(db.joinedload(StockoutRisk.item)).filter(
+            StockoutRisk.orphanage_id == orphanage_id,
+            StockoutRisk.stockout_date.isnot(None)
+        ).order_by(
+            StockoutRisk.stockout_date.asc(),
+            StockoutRisk.stockout_probability_7d.desc()
+        ).limit(limit).all()
+
+class StockoutRiskScheduler(JobScheduler):
+    """Rebuilds the whole stockout-risk index every FORECAST_RISK_REBUILD_INTERVAL
+    
+    Writes only refresh the touched item, so untouched items would keep
+    probabilities computed against an ever older "today" without this.
+    """
+    job_name = RISK_JOB
+    interval_setting = 'FORECAST_RISK_REBUILD_INTERVAL'
+    default_interval = timedelta(days=1)
+    
+    def run(self, last_run_at):
+        started = time.perf_counter()
+        rebuilt = StockoutRiskService.rebuild(before_write=self.renew_lease)
+        return {'items_rebuilt': rebuilt, 'elapsed_seconds': round(time.perf_counter() - started, 3)}
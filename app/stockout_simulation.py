@@ -0,0 +1,80 @@
+import numpy as np
+
+# Upper bound on simulated (path, item, day) cells held in memory at once
+MAX_CELLS_PER_CHUNK = 4_000_000
+
+class StockoutSimulator:
+    """Monte Carlo stockout probabilities for many items at once
+    
+    Demand paths are the point forecast plus daily deviations drawn with
+    replacement from each item's own de-meaned usage history (an empirical
+    bootstrap), clipped at zero. An item stocks out on the first day its
+    cumulative simulated demand reaches the current stock.
+    """
+    
+    def __init__(self, n_paths=2000, quantiles=(0.1, 0.5, 0.9), seed=None):
+        self.n_paths = n_paths
+        self.quantiles = np.asarray(quantiles, dtype=float)
+        self.rng = np.random.default_rng(seed)
+    
+    def simulate(self, forecasts, history, stock):
+        """Simulate demand paths for every item
+        
+        ``forecasts`` is items x horizon, ``history`` items x days of past
+        daily usage and ``stock`` the current quantity per item. Returns
+        (probabilities, quantile_days): P(stockout on or before day d) as an
+        items x horizon array and, per item and quantile q, the first day
+        with P >= q (NaN when that is beyond the horizon).
+        """
+        forecasts = np.atleast_2d(np.asarray(forecasts, dtype=np.float32))
+        history = np.atleast_2d(np.asarray(history, dtype=np.float32))
+        stock = np.asarray(stock, dtype=np.float32)
+        n_items, horizon = forecasts.shape
+        
+        deviations = history - history.mean(axis=1, keepdims=True)
+        probabilities = np.empty((n_items, horizon))
+        chunk_size = max(1, MAX_CELLS_PER_CHUNK // (self.n_paths * horizon))
+        
+        # One bootstrap index matrix shared by all items (common random
+        # numbers): each item's marginal curve is unaffected and the RNG cost
+        # no longer grows with the number of items
+        draws = self.rng.integers(0, history.shape[1], size=(self.n_paths, horizon))
+        
+        for start in range(0, n_items, chunk_size):
+            rows = slice(start, min(start + chunk_size, n_items))
+            demand = deviations[rows][:, draws]  # items x paths x days
+            demand += forecasts[rows][:, None]
+            np.maximum(demand, 0, out=demand)
+            np.cumsum(demand, axis=2, out=demand)
+            probabilities[rows] = np.count_nonzero(demand >= stock[rows][:, None, None], axis=1) / self.n_paths
+        
+        # Stockout curves are non-decreasing, so the q-quantile of the
+        # days-to-stockout distribution is the first day the curve reaches q
+        reached = probabilities[:, :, None] >= self.quantiles
+        quantile_days = np.where(reached.any(axis=1), reached.argmax(axis=1) + 1.0, np.nan)
+        return probabilities, quantile_days
+    
+    def summarize(self, probabilities, quantile_days):
+        """Per-item result dicts for one row of ``simulate`` output"""
+        days = {f'p{round(q * 100)}': (int(d) if not np.isnan(d) else None)
+                for q, d in zip(self.quantiles, quantile_days)}
+        return {
+            'stockout_probabilities': [round(float(p), 4) for p in probabilities],
+            'stockout_day_quantiles': days,
+            'simulated_days': len(probabilities),
+            'scenarios': StockoutSimulator.scenarios(days)
+        }
+    
+    @staticmethod
+    def scenarios(days):
+        """Optimistic/realistic/pessimistic days to stockout from the p90/p50/p10 days"""
+        def scenario(day, risk):
+            if day is None:
+                return {'days': 999, 'risk': 'very_low'}  # No stockout within the horizon
+            return {'days': day, 'risk': risk(day)}
+        
+        return {
+            'optimistic': scenario(days.get('p90'), lambda day: 'low'),
+            'realistic': scenario(days.get('p50'), lambda day: 'medium' if day < 14 else 'low'),
+            'pessimistic': scenario(days.get('p10'), lambda day: 'high' if day < 7 else 'medium')
+        }
@@ -0,0 +1,90 @@
+import numpy as np
+from datetime import date, timedelta
+from app.models import UsageLog
+from app import db
+
+class UsageSeries:
+    """Dense daily usage for one or more items of an orphanage
+    
+    ``values`` is an items x days float array, zero-filled for days without
+    logs; row ``i`` belongs to ``item_ids[i]`` and column ``j`` to
+    ``start_date + j days``.
+    """
+    
+    def __init__(self, item_ids, start_date, values, log_counts):
+        self.item_ids = list(item_ids)
+        self.start_date = start_date
+        self.values = values
+        self.log_counts = log_counts
+        self._index = {item_id: i for i, item_id in enumerate(self.item_ids)}
+    
+    @property
+    def n_days(self):
+        return self.values.shape[1]
+    
+    @property
+    def end_date(self):
+        return self.start_date + timedelta(days=self.n_days - 1)
+    
+    @property
+    def has_data(self):
+        """Boolean mask of items with at least one log in the period"""
+        return self.log_counts > 0
+    
+    @property
+    def day_number(self):
+        return np.arange(self.n_days)
+    
+    @property
+    def day_of_week(self):
+        """Weekday (Monday=0) of every column, computed arithmetically"""
+        return (self.start_date.weekday() + self.day_number) % 7
+    
+    def dates(self):
+        """Column dates as datetime.date objects"""
+        return np.arange(
+            np.datetime64(self.start_date), np.datetime64(self.end_date) + 1
+        ).astype(object)
+    
+    def row(self, item_id):
+        """Daily usage array for a single item"""
+        return self.values[self._index[item_id]]
+    
+    @staticmethod
+    def load(orphanage_id, item_ids, start_date, end_date=None):
+        """Build the series for ``item_ids`` with a single query
+        
+        Only the item_id, date and quantity_used columns are fetched; logs
+        are summed per day with ``np.bincount`` on flattened day offsets.
+        """
+        if end_date is None:
+            end_date = date.today()
+        item_ids = list(dict.fromkeys(item_ids))
+        n_items = len(item_ids)
+        n_days = (end_date - start_date).days + 1
+        
+        rows = []
+        if n_items:
+            rows = db.session.query(UsageLog.item_id, UsageLog.date, UsageLog.quantity_used).filter(
+                UsageLog.orphanage_id == orphanage_id,
+                UsageLog.item_id.in_(item_ids),
+                UsageLog.date >= start_date,
+                UsageLog.date <= end_date
+            ).all()
+        
+        if not rows:
+            return UsageSeries(item_ids, start_date, np.zeros((n_items, n_days)), np.zeros(n_items, dtype=int))
+        
+        index = {item_id: i for i, item_id in enumerate(item_ids)}
+        log_items, log_dates, quantities = zip(*rows)
+        item_rows = np.fromiter((index[item_id] for item_id in log_items), dtype=np.int64, count=len(rows))
+        offsets = (np.array(log_dates, dtype='datetime64[D]') - np.datetime64(start_date)).astype(np.int64)
+        
+        values = np.bincount(
+            item_rows * n_days + offsets,
+            weights=np.asarray(quantities, dtype=float),
+            minlength=n_items * n_days
+        ).reshape(n_items, n_days)
+        log_counts = np.bincount(item_rows, minlength=n_items)
+        
+        return UsageSeries(item_ids, start_date, values, log_counts)
@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from app import db
+
+# Per-worker Flask application, created once by the pool initializer
+_worker_app = None
+
+def _init_worker(config_name):
+    """ProcessPoolExecutor initializer: give each worker its own app and DB connections"""
+    global _worker_app
+    from app import create_app
+    
+    _worker_app = create_app(config_name)
+    with _worker_app.app_context():
+        # Connections inherited from the parent process must not be reused
+        db.engine.dispose()
+
+def _call_in_app(task):
+    fn, args = task
+    with _worker_app.app_context():
+        return fn(*args)
+
+def map_in_workers(fn, arg_tuples, workers=None, config_name=None):
+    """Run fn(*args) for every args tuple, in app-context worker processes
+    
+    Falls back to running inline (in the caller's app context) when only one
+    worker or one task is requested. Results are returned in task order.
+    """
+    arg_tuples = list(arg_tuples)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if config_name is None:
+        config_name = os.getenv('FLASK_CONFIG', 'default')
+    
+    if workers <= 1 or len(arg_tuples) <= 1:
+        return [fn(*args) for args in arg_tuples]
+    
+    # Don't hand pooled connections over to forked workers
+    db.engine.dispose()
+    with ProcessPoolExecutor(max_workers=min(workers, len(arg_tuples)),
+                             initializer=_init_worker,
+                             initargs=(config_name,)) as executor:
+        return list(executor.map(_call_in_app, [(fn, args) for args in arg_tuples]))
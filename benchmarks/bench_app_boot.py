@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark worker boot with eager vs lazy forecasting imports
+
+Each run boots a fresh interpreter that imports the app and calls
+create_app against an in-memory database, then reports the wall time and
+peak RSS. "lazy" is the default boot; "eager" sets FORECAST_PRELOAD=true
+so pandas, NumPy and scikit-learn are imported by create_app.
+
+Usage: python benchmarks/bench_app_boot.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+BOOT_SCRIPT = r'''
+import json, resource, sys, time
+start = time.perf_counter()
+from config import config
+config['default'].SQLALCHEMY_DATABASE_URI = 'sqlite://'
+from app import create_app
+create_app('default')
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss_kb //= 1024  # macOS reports bytes
+print(json.dumps({
+    'seconds': elapsed,
+    'rss_mb': rss_kb / 1024,
+    'forecasting_loaded': all(m in sys.modules for m in ('pandas', 'numpy', 'sklearn'))
+}))
+'''
+
+
+def boot(preload):
+    env = dict(os.environ, FORECAST_PRELOAD='true' if preload else 'false')
+    output = subprocess.run(
+        [sys.executable, '-c', BOOT_SCRIPT], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, preload in (('eager', True), ('lazy', False)):
+        runs = [boot(preload) for _ in range(args.runs)]
+        results[mode] = {
+            'seconds': statistics.median(r['seconds'] for r in runs),
+            'rss_mb': statistics.median(r['rss_mb'] for r in runs),
+            'forecasting_loaded': runs[0]['forecasting_loaded']
+        }
+
+    print(f"{'mode':<8} {'boot (ms)':>10} {'peak RSS (MB)':>14} {'pandas/sklearn loaded':>22}")
+    for mode, r in results.items():
+        print(f"{mode:<8} {r['seconds'] * 1000:>10.0f} {r['rss_mb']:>14.1f} {str(r['forecasting_loaded']):>22}")
+
+    eager, lazy = results['eager'], results['lazy']
+    print(f"\nlazy boot is {eager['seconds'] / lazy['seconds']:.1f}x faster and uses "
+          f"{eager['rss_mb'] - lazy['rss_mb']:.1f} MB less RSS per worker")
+
+
+if __name__ == '__main__':
+    main()
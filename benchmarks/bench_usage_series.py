@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NumPy usage-series builder against the old pandas path
+
+Compares the previous ForecastingEngine.get_usage_data implementation
+(ORM rows -> DataFrame -> merge with pd.date_range -> two .apply passes)
+with UsageSeries.load at 30, 365 and 1,095 days of history, for a single
+item and for a whole catalog loaded in one call.
+
+Usage: python benchmarks/bench_usage_series.py [--items 50] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from config import config
+
+
+def legacy_get_usage_data(orphanage_id, item_id, days_back):
+    """The pre-UsageSeries get_usage_data, kept verbatim for comparison"""
+    from app.models import UsageLog
+
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days_back)
+
+    usage_logs = UsageLog.get_usage_for_period(orphanage_id, item_id, start_date, end_date)
+    if not usage_logs:
+        return pd.DataFrame()
+
+    data = []
+    for log in usage_logs:
+        data.append({
+            'date': log.date,
+            'quantity_used': log.quantity_used,
+            'day_of_week': log.date.weekday(),
+            'day_number': (log.date - start_date).days
+        })
+    df = pd.DataFrame(data)
+
+    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
+    df_complete = pd.DataFrame({'date': date_range})
+    df_complete['date'] = df_complete['date'].dt.date
+
+    df = df_complete.merge(df, on='date', how='left')
+    df['quantity_used'] = df['quantity_used'].fillna(0)
+    df['day_of_week'] = df['date'].apply(lambda x: x.weekday())
+    df['day_number'] = df['date'].apply(lambda x: (x - start_date).days)
+    return df
+
+
+def seed(n_items, days):
+    """Create one orphanage with n_items items and daily usage for `days` days"""
+    from app import db
+    from app.models import Orphanage, Item, Inventory, UsageLog
+
+    rnd = random.Random(42)
+    orphanage = Orphanage(name='Benchmark Home', location='Benchmark')
+    db.session.add(orphanage)
+    db.session.flush()
+
+    item_ids = []
+    for i in range(n_items):
+        item = Item(name=f'Item {i}', category='Food', unit='kg')
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Inventory(orphanage_id=orphanage.id, item_id=item.id, quantity=100, minimum_level=10))
+        item_ids.append(item.id)
+
+    today = date.today()
+    db.session.bulk_insert_mappings(UsageLog, [
+        {'orphanage_id': orphanage.id, 'item_id': item_id,
+         'date': today - timedelta(days=d), 'quantity_used': rnd.uniform(0, 5)}
+        for item_id in item_ids for d in range(days + 1) if rnd.random() < 0.8
+    ])
+    db.session.commit()
+    return orphanage.id, item_ids
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    config['default'].SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    from app import create_app
+    from app.usage_series import UsageSeries
+
+    app = create_app('default')
+    with app.app_context():
+        horizons = (30, 365, 1095)
+        orphanage_id, item_ids = seed(args.items, max(horizons))
+        today = date.today()
+
+        print(f"{'days':>6} {'case':<22} {'pandas (ms)':>12} {'numpy (ms)':>12} {'speedup':>8}")
+        for days in horizons:
+            start_date = today - timedelta(days=days)
+
+            single_old = best_of(args.repeat, lambda: legacy_get_usage_data(orphanage_id, item_ids[0], days))
+            single_new = best_of(args.repeat, lambda: UsageSeries.load(orphanage_id, [item_ids[0]], start_date, today))
+            print(f"{days:>6} {'1 item':<22} {single_old * 1000:>12.2f} {single_new * 1000:>12.2f} "
+                  f"{single_old / single_new:>7.1f}x")
+
+            catalog_old = best_of(1, lambda: [legacy_get_usage_data(orphanage_id, item_id, days)
+                                              for item_id in item_ids])
+            catalog_new = best_of(args.repeat, lambda: UsageSeries.load(orphanage_id, item_ids, start_date, today))
+            print(f"{days:>6} {f'{len(item_ids)} items':<22} {catalog_old * 1000:>12.2f} {catalog_new * 1000:>12.2f} "
+                  f"{catalog_old / catalog_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -47,12 +47,43 @@ class Config:
     # AI Forecasting Configuration
     FORECAST_DAYS = 7
     MIN_DATA_POINTS = 5  # Minimum data points needed for forecasting
+    FORECAST_CACHE_TIMEOUT = int(os.environ.get('FORECAST_CACHE_TIMEOUT', '3600'))
+    FORECAST_STATE_HALF_LIFE_DAYS = 14  # Recency weighting of the incremental forecaster
+    FORECAST_SNAPSHOT_MAX_AGE = timedelta(hours=24)
+    FORECAST_SNAPSHOT_RETENTION_DAYS = 7
+    FORECAST_PRELOAD = os.environ.get('FORECAST_PRELOAD', 'False').lower() == 'true'
+    FORECAST_BACKTEST_CUTOFFS = 8  # Rolling origins per backtest
+    FORECAST_BACKTEST_STEP_DAYS = 7
+    FORECAST_BACKTEST_HORIZON_DAYS = 7
+    FORECAST_SIMULATION_PATHS = 2000  # Monte Carlo demand paths per item
+    FORECAST_INTERMITTENT_ZERO_RATIO = 0.5  # Zero-usage share above which TSB is used
+    FORECAST_TSB_ALPHA = 0.1  # Demand size smoothing
+    FORECAST_TSB_BETA = 0.1  # Demand probability smoothing
+    FORECAST_MODEL_MAX_AGE_DAYS = 7  # Scheduled reselection of stored models
+    FORECAST_DRIFT_THRESHOLD = 2.0  # Residual EWMA / in-sample error that triggers reselection
+    FORECAST_DRIFT_ALPHA = 0.3
+    FORECAST_DRIFT_MIN_RESIDUALS = 3
+    FORECAST_RISK_REBUILD_INTERVAL = timedelta(days=1)  # Scheduled refresh of every stockout-risk entry
+    
+    # Dashboard cache
+    DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', '300'))  # Upper bound on staleness
+    DASHBOARD_REFRESH_LOCK_TIMEOUT = 30  # Seconds one request may spend recomputing a stale entry
+    
+    # Report exports
+    EXPORT_YIELD_PER = 1000  # Rows fetched per server-side batch
+    EXPORT_FLUSH_BYTES = 64 * 1024  # Emit a chunk once this much is buffered...
+    EXPORT_FLUSH_SECONDS = 1.0  # ...or this long after the previous chunk
     
     # Alert Configuration
     ALERT_CHECK_INTERVAL = timedelta(hours=6)
+    ALERT_SCHEDULER_POLL_SECONDS = 60  # How often workers check whether the alert run is due
+    ALERT_LEASE_TIMEOUT = timedelta(minutes=10)  # Lease of a worker that died mid-run expires after this
+    ALERT_RETENTION_DAYS = 90  # Read alerts older than this are moved to alerts_archive
+    ALERT_ARCHIVE_INTERVAL = timedelta(days=1)
+    ALERT_ARCHIVE_CHUNK_SIZE = 1000
     EMAIL_ALERTS = os.environ.get('EMAIL_ALERTS', 'False').lower() == 'true'
     # Cache settings
-    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple')
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
     CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
     CACHE_DEFAULT_TIMEOUT = 300
     
@@ -73,8 +104,16 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
     
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'  # In-memory, one database per app
+    CACHE_TYPE = 'SimpleCache'
+    WTF_CSRF_ENABLED = False
+    FORECAST_SIMULATION_PATHS = 500
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
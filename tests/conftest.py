@@ -0,0 +1,75 @@
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+import pytest
+from flask_login import FlaskLoginClient
+from sqlalchemy import event
+from app import create_app, db as _db
+from app.models import Orphanage, Inventory, UsageLog, User, Role
+
+@pytest.fixture
+def app():
+    """App on a fresh in-memory database holding the sample orphanage and items"""
+    app = create_app('testing')
+    app.test_client_class = FlaskLoginClient
+    with app.app_context():
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+@pytest.fixture
+def db(app):
+    return _db
+
+@pytest.fixture
+def orphanage(app):
+    return Orphanage.query.first()
+
+@pytest.fixture
+def admin(db):
+    user = User(username='admin', email='admin@example.org', role=Role.query.filter_by(name='admin').first())
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def client(app, admin):
+    """Test client logged in as an admin"""
+    return app.test_client(user=admin)
+
+@pytest.fixture
+def seed_usage(db):
+    """Add random daily usage logs for every inventory item over the last ``days`` days
+    
+    Medicine items are used on about 30% of days (intermittent demand),
+    everything else on about 90%.
+    """
+    def seed(days=60, seed=0):
+        rnd = random.Random(seed)
+        today = date.today()
+        for inv in Inventory.query.all():
+            rate = 0.3 if inv.item.category == 'Medicine' else 0.9
+            for offset in range(days):
+                if rnd.random() < rate:
+                    db.session.add(UsageLog(
+                        orphanage_id=inv.orphanage_id, item_id=inv.item_id, date=today - timedelta(days=offset),
+                        quantity_used=round(rnd.uniform(0.5, 5) + offset * 0.02, 2)
+                    ))
+        db.session.commit()
+    return seed
+
+@pytest.fixture
+def count_queries(db):
+    """Context manager collecting the SQL statements run inside it"""
+    @contextmanager
+    def counting():
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return counting
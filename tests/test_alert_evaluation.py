@@ -0,0 +1,60 @@
+from datetime import date, datetime, timedelta
+from app.services import InventoryService
+from app.models import Inventory, Alert
+
+def _classify(inventory):
+    """Alert types the per-row checks call for"""
+    types = set()
+    if inventory.is_critical_stock():
+        types.add('critical_stock')
+    elif inventory.is_low_stock():
+        types.add('low_stock')
+    if inventory.is_expired():
+        types.add('expired')
+    elif inventory.is_expiring_soon(7):
+        types.add('expiring')
+    return types
+
+def _set_levels(db):
+    for n, inventory in enumerate(Inventory.query.order_by(Inventory.id)):
+        inventory.quantity = [0, 4, 12, 100][n % 4]
+        inventory.minimum_level = 10
+        inventory.expiry_date = [None, date.today() - timedelta(days=1), date.today() + timedelta(days=3),
+                                 date.today() + timedelta(days=30)][(n // 2) % 4]
+    db.session.commit()
+
+def test_alerts_match_the_per_row_checks(orphanage, db):
+    _set_levels(db)
+    
+    result = InventoryService.evaluate_alerts()
+    
+    expected = {(inv.orphanage_id, inv.item_id, alert_type)
+                for inv in Inventory.query.all() for alert_type in _classify(inv)}
+    created = {(alert.orphanage_id, alert.item_id, alert.alert_type) for alert in Alert.query.all()}
+    assert created == expected
+    assert result['alerts_created'] == len(expected)
+    assert sum(result['by_type'].values()) == len(expected)
+
+def test_rows_with_unread_alerts_are_skipped(orphanage, db, count_queries):
+    _set_levels(db)
+    InventoryService.evaluate_alerts()
+    
+    with count_queries() as statements:
+        assert InventoryService.evaluate_alerts()['alerts_created'] == 0
+    assert len(statements) == 1
+    
+    Alert.query.update({'is_read': True})
+    db.session.commit()
+    assert InventoryService.evaluate_alerts()['alerts_created'] > 0
+
+def test_changed_since_only_checks_rows_updated_after_it(orphanage, db):
+    _set_levels(db)
+    since = datetime.utcnow()
+    inventory = Inventory.query.filter(Inventory.quantity == 0, Inventory.expiry_date.is_(None)).first()
+    inventory.last_updated = datetime.utcnow() + timedelta(seconds=1)
+    db.session.commit()
+    
+    result = InventoryService.evaluate_alerts(changed_since=since)
+    
+    assert result['alerts_created'] == 1
+    assert Alert.query.one().item_id == inventory.item_id
@@ -0,0 +1,76 @@
+import base64
+from datetime import datetime, timedelta
+import pytest
+from app.services import AlertService
+from app.models import Alert
+
+ALERT_TYPES = ('low_stock', 'critical_stock', 'expiring', 'expired')
+
+@pytest.fixture
+def alerts(db, orphanage):
+    """45 alerts, several sharing a created_at so paging must break ties on id"""
+    start = datetime(2024, 1, 1, 8, 0)
+    for i in range(45):
+        db.session.add(Alert(
+            orphanage_id=orphanage.id, alert_type=ALERT_TYPES[i % 4], title=f'Alert {i}', message='',
+            is_read=i % 3 == 0, created_at=start + timedelta(hours=i // 4)
+        ))
+    db.session.commit()
+    return Alert.query.filter_by(orphanage_id=orphanage.id).all()
+
+def test_summary_matches_alerts(orphanage, alerts):
+    summary = AlertService.get_alerts_summary(orphanage.id)
+    
+    assert summary['total'] == len(alerts)
+    assert summary['unread'] == sum(not alert.is_read for alert in alerts)
+    for alert_type in ALERT_TYPES:
+        of_type = [alert for alert in alerts if alert.alert_type == alert_type]
+        assert summary['by_type'][alert_type] == {
+            'total': len(of_type), 'unread': sum(not alert.is_read for alert in of_type)
+        }
+
+def test_keyset_pages_cover_every_alert_newest_first(orphanage, alerts):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = AlertService.list_alerts(orphanage.id, limit=10, cursor=cursor)
+        seen += page
+        pages += 1
+        if cursor is None:
+            break
+    
+    expected = sorted(alerts, key=lambda alert: (alert.created_at, alert.id), reverse=True)
+    assert [alert.id for alert in seen] == [alert.id for alert in expected]
+    assert pages == 5
+
+def test_last_full_page_has_no_cursor(orphanage, alerts):
+    page, cursor = AlertService.list_alerts(orphanage.id, limit=len(alerts))
+    assert len(page) == len(alerts)
+    assert cursor is None
+
+@pytest.mark.parametrize('cursor', [
+    'garbage!',
+    base64.urlsafe_b64encode(b'no separator').decode(),
+    base64.urlsafe_b64encode(b'2024-01-01T08:00:00|abc').decode(),
+    base64.urlsafe_b64encode(b'\xff\xfe').decode()
+])
+def test_malformed_cursor_raises(orphanage, alerts, cursor):
+    with pytest.raises(ValueError, match='invalid cursor'):
+        AlertService.list_alerts(orphanage.id, cursor=cursor)
+
+def test_api_pages_and_rejects_bad_cursor(client, orphanage, alerts):
+    first = client.get(f'/api/alerts/{orphanage.id}?limit=20').get_json()
+    second = client.get(f'/api/alerts/{orphanage.id}?limit=20&cursor={first["next_cursor"]}').get_json()
+    
+    ids = [alert['id'] for alert in first['alerts'] + second['alerts']]
+    assert len(ids) == len(set(ids)) == 40
+    
+    response = client.get(f'/api/alerts/{orphanage.id}?cursor=garbage')
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'message': 'invalid cursor'}
+
+def test_alerts_page_falls_back_to_newest_on_bad_cursor(client, orphanage, alerts):
+    response = client.get(f'/alerts?orphanage_id={orphanage.id}&cursor=garbage')
+    
+    assert response.status_code == 200
+    newest = max(alerts, key=lambda alert: (alert.created_at, alert.id))
+    assert newest.title.encode() in response.data
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+import pytest
+from app.alert_retention import AlertRetentionService, AlertRetentionScheduler
+from app.models import Alert, AlertArchive, Inventory
+
+@pytest.fixture
+def old_alerts(db, orphanage):
+    """Read, unread and recent alerts for two items, 100 to 200 days old unless recent"""
+    now = datetime.utcnow()
+    item_ids = [inv.item_id for inv in Inventory.query.filter_by(orphanage_id=orphanage.id).limit(2)]
+    for i in range(10):
+        for item_id in item_ids:
+            db.session.add(Alert(orphanage_id=orphanage.id, item_id=item_id, alert_type='low_stock',
+                                 title=f'Low {i}', message=f'Low stock {i}', is_read=True,
+                                 created_at=now - timedelta(days=200 - i * 10)))
+    db.session.add(Alert(orphanage_id=orphanage.id, item_id=item_ids[0], alert_type='expired',
+                         title='Unread', message='', is_read=False, created_at=now - timedelta(days=200)))
+    db.session.add(Alert(orphanage_id=orphanage.id, item_id=item_ids[0], alert_type='low_stock',
+                         title='Recent', message='', is_read=True, created_at=now - timedelta(days=5)))
+    db.session.commit()
+    return item_ids
+
+def test_archive_collapses_old_read_alerts_in_chunks(orphanage, old_alerts):
+    result = AlertRetentionService.archive(retention_days=90, chunk_size=4)
+    
+    assert result['alerts_archived'] == 20
+    assert result['chunks'] == 5
+    assert result['archive_rows_created'] == 2
+    assert result['archive_rows_updated'] == 8
+    assert {alert.title for alert in Alert.query.all()} == {'Unread', 'Recent'}
+    
+    for item_id in old_alerts:
+        entry = AlertArchive.query.filter_by(orphanage_id=orphanage.id, item_id=item_id, alert_type='low_stock').one()
+        assert entry.occurrence_count == 10
+        assert entry.title == 'Low 9'  # Latest text kept
+        assert entry.last_created_at - entry.first_created_at == timedelta(days=90)
+
+def test_archive_adds_to_existing_rows(orphanage, old_alerts):
+    AlertRetentionService.archive(retention_days=90)
+    Alert.query.filter_by(title='Recent').update({'created_at': datetime.utcnow() - timedelta(days=100)})
+    
+    result = AlertRetentionService.archive(retention_days=90)
+    
+    assert (result['alerts_archived'], result['archive_rows_created'], result['archive_rows_updated']) == (1, 0, 1)
+    entry = AlertArchive.query.filter_by(item_id=old_alerts[0], alert_type='low_stock').one()
+    assert entry.occurrence_count == 11
+    assert entry.title == 'Recent'
+
+def test_archive_renews_before_each_chunk(old_alerts):
+    calls = []
+    AlertRetentionService.archive(retention_days=90, chunk_size=8, before_write=lambda: calls.append(Alert.query.count()))
+    
+    # Called before each chunk's rows leave the alerts table
+    assert calls == [22, 14, 6]
+
+def test_scheduler_runs_the_archival(app, old_alerts):
+    app.config['ALERT_ARCHIVE_CHUNK_SIZE'] = 6
+    
+    result = AlertRetentionScheduler(owner='a').run_if_due()
+    
+    assert result['alerts_archived'] == 20
+    assert result['chunks'] == 4
+    assert AlertRetentionScheduler(owner='a').run_if_due() is None  # Not due again yet
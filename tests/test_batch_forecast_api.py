@@ -0,0 +1,41 @@
+import json
+import pytest
+from app.ai_forecasting import forecasting_engine
+from app.services import InventoryService
+from app.models import Inventory
+
+def _lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_streams_one_forecast_per_item_matching_the_single_item_api(client, orphanage, seed_usage):
+    seed_usage(40)
+    
+    response = client.get(f'/api/forecasting/{orphanage.id}/batch?horizon=14')
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = _lines(response)
+    assert [line['item_id'] for line in lines] == sorted(inv.item_id for inv in Inventory.query.all())
+    for line in lines:
+        forecast = forecasting_engine.predict_usage(orphanage.id, line['item_id'], 14)
+        assert line['predictions'] == pytest.approx(forecast['predictions'])
+        assert line['method'] == forecast['method']
+
+def test_unknown_items_get_an_error_line(client, orphanage):
+    item_id = Inventory.query.first().item_id
+    
+    lines = _lines(client.get(f'/api/forecasting/{orphanage.id}/batch?item_ids={item_id},9999'))
+    
+    assert [line['item_id'] for line in lines] == [item_id, 9999]
+    assert lines[1] == {'item_id': 9999, 'error': 'Inventory item not found'}
+
+@pytest.mark.parametrize('query', ['horizon=0', 'horizon=91', 'item_ids=1,x'])
+def test_bad_parameters_are_rejected(client, orphanage, query):
+    assert client.get(f'/api/forecasting/{orphanage.id}/batch?{query}').status_code == 400
+
+def test_chunks_do_not_change_the_results(orphanage, seed_usage):
+    seed_usage(40)
+    
+    whole = list(InventoryService.iter_batch_forecasts(orphanage.id, horizon=7))
+    chunked = list(InventoryService.iter_batch_forecasts(orphanage.id, horizon=7, chunk_size=3))
+    assert chunked == whole
@@ -0,0 +1,34 @@
+import numpy as np
+from app.ai_forecasting import forecasting_engine
+from app.models import Inventory, Item
+
+def test_batch_matches_per_item_regression_fits(orphanage, seed_usage):
+    seed_usage(60)
+    batch = forecasting_engine.predict_usage_batch(orphanage.id, forecast_days=7)
+    
+    assert set(batch) == {inv.item_id for inv in Inventory.query.filter_by(orphanage_id=orphanage.id)}
+    for item_id, forecast in batch.items():
+        if forecast['method'] not in ('linear', 'polynomial'):
+            continue
+        df = forecasting_engine.get_usage_data(orphanage.id, item_id)
+        X = df[['day_number', 'day_of_week']].values
+        model = forecasting_engine._get_models()[forecast['method']].fit(X, df['quantity_used'].values)
+        expected = np.maximum(model.predict(forecasting_engine._future_features(X[-1, 0], 7)), 0)
+        np.testing.assert_allclose(forecast['predictions'], expected, atol=1e-6)
+
+def test_batch_loads_usage_in_one_query(orphanage, seed_usage, count_queries):
+    seed_usage(30)
+    item_ids = [inv.item_id for inv in Inventory.query.filter_by(orphanage_id=orphanage.id)]
+    with count_queries() as statements:
+        forecasting_engine.predict_usage_batch(orphanage.id, item_ids)
+    assert len(statements) == 1
+
+def test_items_without_usage_forecast_zero(orphanage, db):
+    item = Item(name='Blankets', category='Bedding', unit='pieces')
+    db.session.add(item)
+    db.session.commit()
+    
+    forecast = forecasting_engine.predict_usage_batch(orphanage.id, [item.id, item.id], forecast_days=3)
+    assert list(forecast) == [item.id]
+    assert forecast[item.id]['method'] == 'average'
+    assert forecast[item.id]['predictions'] == [0, 0, 0]
@@ -0,0 +1,69 @@
+import pytest
+from app import cache
+from app.dashboard_cache import DashboardCache
+from app.services import InventoryService
+from app.models import Orphanage, Inventory, Item
+
+@pytest.fixture
+def computations(monkeypatch):
+    """Count dashboard recomputations"""
+    calls = []
+    get_dashboard_data = InventoryService.get_dashboard_data
+    monkeypatch.setattr(InventoryService, 'get_dashboard_data',
+                        staticmethod(lambda orphanage_id: calls.append(orphanage_id) or get_dashboard_data(orphanage_id)))
+    return calls
+
+def test_dashboard_is_recomputed_only_after_relevant_commits(orphanage, db, computations):
+    InventoryService.get_cached_dashboard_data(orphanage.id)
+    InventoryService.get_cached_dashboard_data(orphanage.id)
+    assert len(computations) == 1
+    
+    inventory = Inventory.query.filter_by(orphanage_id=orphanage.id).first()
+    inventory.quantity = 0
+    db.session.commit()
+    data = InventoryService.get_cached_dashboard_data(orphanage.id)
+    assert len(computations) == 2
+    assert inventory.id in {inv['id'] for inv in data['critical_stock_items']}
+
+def test_other_orphanages_keep_their_entry(orphanage, db, computations):
+    other = Orphanage(name='Second Home', location='Pune')
+    db.session.add(other)
+    db.session.commit()
+    InventoryService.get_cached_dashboard_data(orphanage.id)
+    InventoryService.get_cached_dashboard_data(other.id)
+    
+    Inventory.query.filter_by(orphanage_id=orphanage.id).first().quantity = 1
+    db.session.commit()
+    InventoryService.get_cached_dashboard_data(orphanage.id)
+    InventoryService.get_cached_dashboard_data(other.id)
+    assert computations == [orphanage.id, other.id, orphanage.id]
+
+def test_rollbacks_keep_the_entry_and_item_changes_reach_every_orphanage(orphanage, db, computations):
+    InventoryService.get_cached_dashboard_data(orphanage.id)
+    
+    Inventory.query.filter_by(orphanage_id=orphanage.id).first().quantity = 1
+    db.session.rollback()
+    InventoryService.get_cached_dashboard_data(orphanage.id)
+    assert len(computations) == 1
+    
+    # Item renames show on every dashboard
+    Item.query.first().name = 'Basmati Rice'
+    db.session.commit()
+    InventoryService.get_cached_dashboard_data(orphanage.id)
+    assert len(computations) == 2
+
+def test_stale_entry_is_served_while_another_request_refreshes(orphanage):
+    DashboardCache.get_or_compute(orphanage.id, lambda: {'total': 1})
+    DashboardCache.invalidate(orphanage.id)
+    
+    cache.add(f'dashboard_refresh:{orphanage.id}', True)  # Another request is recomputing
+    assert DashboardCache.get_or_compute(orphanage.id, lambda: {'total': 2}) == {'total': 1}
+    
+    cache.delete(f'dashboard_refresh:{orphanage.id}')
+    assert DashboardCache.get_or_compute(orphanage.id, lambda: {'total': 2}) == {'total': 2}
+
+def test_dashboard_api_serves_the_cached_data(client, orphanage):
+    response = client.get(f'/api/dashboard/{orphanage.id}')
+    
+    assert response.status_code == 200
+    assert response.get_json()['summary'] == InventoryService.get_cached_dashboard_data(orphanage.id)['summary']
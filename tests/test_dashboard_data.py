@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+import pytest
+from app.services import InventoryService
+from app.models import Orphanage, Inventory, Item
+
+@pytest.fixture
+def catalog(orphanage, db):
+    """Add 15 low-stock items, some critical and some expiring"""
+    for n in range(15):
+        item = Item(name=f'Supply {n}', category='Supplies' if n % 2 else 'Food', unit='pieces')
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Inventory(
+            orphanage_id=orphanage.id, item_id=item.id, quantity=n % 10, minimum_level=10,
+            expiry_date=date.today() + timedelta(days=n % 9) if n % 3 == 0 else None
+        ))
+    db.session.commit()
+
+def test_summary_and_lists_match_the_per_row_checks(orphanage, catalog):
+    data = InventoryService.get_dashboard_data(orphanage.id)
+    
+    inventories = Inventory.query.filter_by(orphanage_id=orphanage.id).all()
+    low = {inv.id for inv in inventories if inv.is_low_stock()}
+    critical = {inv.id for inv in inventories if inv.is_critical_stock()}
+    expiring = {inv.id for inv in inventories if inv.is_expiring_soon()}
+    assert len(low) > 10
+    
+    assert data['summary']['total_items'] == len(inventories)
+    assert data['summary']['low_stock_count'] == len(low)
+    assert data['summary']['critical_stock_count'] == len(critical)
+    assert data['summary']['expiring_items_count'] == len(expiring)
+    assert {inv.id for inv in data['low_stock_items']} == low
+    assert {inv.id for inv in data['critical_stock_items']} == critical
+    assert {inv.id for inv in data['expiring_items']} == expiring
+    
+    for category, stats in data['category_stats'].items():
+        in_category = [inv for inv in inventories if inv.item.category == category]
+        assert stats['total_items'] == len(in_category)
+        assert stats['low_stock'] == sum(inv.is_low_stock() for inv in in_category)
+
+def test_most_urgent_items_are_listed_first(orphanage, catalog):
+    data = InventoryService.get_dashboard_data(orphanage.id)
+    
+    ratios = [inv.quantity / inv.minimum_level for inv in data['low_stock_items']]
+    assert ratios == sorted(ratios)
+    expiry_dates = [inv.expiry_date for inv in data['expiring_items']]
+    assert expiry_dates == sorted(expiry_dates)
+
+def test_query_count_does_not_grow_with_the_catalog(orphanage, db, count_queries):
+    db.session.expire_all()
+    with count_queries() as sample:
+        InventoryService.get_dashboard_data(orphanage.id)
+    for n in range(30):
+        item = Item(name=f'Extra {n}', category='Food', unit='kg')
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Inventory(orphanage_id=orphanage.id, item_id=item.id, quantity=0, minimum_level=5))
+    db.session.commit()
+    db.session.expire_all()
+    
+    with count_queries() as larger:
+        data = InventoryService.get_dashboard_data(orphanage.id)
+        [inv.item.name for inv in data['low_stock_items']]
+    assert len(larger) == len(sample)
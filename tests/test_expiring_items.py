@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import text
+from app.services import InventoryService
+from app.models import Inventory
+
+@pytest.fixture
+def expiries(orphanage, db):
+    """Give the sample items expiry dates from 3 days ago to 18 days ahead"""
+    for n, inventory in enumerate(Inventory.query.order_by(Inventory.id)):
+        inventory.expiry_date = date.today() + timedelta(days=3 * n - 3)
+    db.session.commit()
+
+def test_window_matches_the_per_row_check(orphanage, expiries):
+    result = InventoryService.get_expiring_items(days=7)
+    
+    listed = [item['inventory_id'] for group in result['orphanages'] for item in group['items']]
+    assert sorted(listed) == sorted(inv.id for inv in Inventory.query.all() if inv.is_expiring_soon(7))
+    days = [item['days_until_expiry'] for item in result['orphanages'][0]['items']]
+    assert days == sorted(days) and all(0 < day <= 7 for day in days)
+
+def test_expired_items_are_included_on_request(orphanage, expiries):
+    result = InventoryService.get_expiring_items(days=7, include_expired=True)
+    
+    listed = {item['inventory_id'] for group in result['orphanages'] for item in group['items']}
+    assert listed == {inv.id for inv in Inventory.query.all() if inv.expiry_date <= date.today() + timedelta(days=7)}
+    assert any(Inventory.query.get(inventory_id).is_expired() for inventory_id in listed)
+    assert result['total_items'] == len(listed)
+
+def test_lookup_uses_the_expiry_index(orphanage, db):
+    window = Inventory.query.filter(Inventory.is_expiring_soon(7)).statement.compile(
+        db.engine, compile_kwargs={'literal_binds': True}
+    )
+    plan = ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {window}')))
+    assert 'ix_inventory_expiry_date' in plan
+
+def test_expiring_api_groups_by_orphanage(client, orphanage, expiries):
+    response = client.get('/api/inventory/expiring?days=7')
+    
+    assert response.status_code == 200
+    assert [group['orphanage_id'] for group in response.get_json()['orphanages']] == [orphanage.id]
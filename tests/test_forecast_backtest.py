@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.ai_forecasting import forecasting_engine
+from app.forecast_backtest import ForecastBacktestService
+from app.forecast_cache import ForecastCache
+from app.forecast_models import ForecastModelService, design_matrix
+from app.usage_series import UsageSeries
+from app.models import Inventory, ForecastAccuracy, ForecastModel
+
+def _series(values):
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    return UsageSeries(range(1, len(values) + 1), date(2026, 1, 5), values, np.full(len(values), values.shape[1]))
+
+def test_regressions_score_zero_on_exactly_linear_usage(app):
+    series = _series(2 + 0.1 * np.arange(80))
+    
+    results, n_cutoffs = ForecastBacktestService.backtest_series(series, n_cutoffs=4)
+    
+    assert n_cutoffs == 4
+    assert results['linear'][0][0] == pytest.approx(0, abs=1e-6)
+    assert results['polynomial'][0][0] == pytest.approx(0, abs=1e-6)
+    assert results['tsb'][0][0] > 0.1
+
+def test_batched_cutoffs_match_a_fit_per_cutoff(app):
+    rng = np.random.default_rng(0)
+    series = _series(rng.uniform(0, 5, size=(3, 60)))
+    train_days, horizon = 31, 7
+    
+    results, n_cutoffs = ForecastBacktestService.backtest_series(
+        series, train_days=train_days, horizon=horizon, n_cutoffs=3, step=7
+    )
+    
+    errors = []
+    for cutoff in (53, 46, 39):
+        train = np.arange(cutoff - train_days, cutoff)
+        test = np.arange(cutoff, cutoff + horizon)
+        X = design_matrix(np.arange(train_days), series.day_of_week[train], 1)
+        X_test = design_matrix(train_days + np.arange(horizon), series.day_of_week[test], 1)
+        coef = np.linalg.lstsq(X, series.values[:, train].T, rcond=None)[0]
+        errors.append(np.abs(np.maximum(X_test @ coef, 0) - series.values[:, test].T))
+    np.testing.assert_allclose(results['linear'][0], np.mean(errors, axis=(0, 1)))
+
+def test_run_stores_results_and_retires_stored_models(orphanage, seed_usage):
+    seed_usage(90)
+    ForecastModelService.reselect(forecasting_engine, force=True)
+    versions = {(model.orphanage_id, model.item_id): ForecastCache.get_version(model.orphanage_id, model.item_id)
+                for model in ForecastModel.query.all()}
+    
+    result = ForecastBacktestService.run(workers=1)
+    
+    n_items = Inventory.query.count()
+    assert result['items'] == n_items
+    assert ForecastAccuracy.query.count() == result['results_written'] == 3 * n_items
+    assert all(model.stale for model in ForecastModel.query.all())
+    assert all(ForecastCache.get_version(*key) != version for key, version in versions.items())
+    
+    item_id = Inventory.query.first().item_id
+    best = ForecastAccuracy.best_for(orphanage.id, item_id)
+    assert best.mae == min(row.mae for row in ForecastAccuracy.query.filter_by(item_id=item_id))
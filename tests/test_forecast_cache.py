@@ -0,0 +1,32 @@
+from app.forecast_cache import ForecastCache
+from app.ai_forecasting import forecasting_engine
+from app.services import InventoryService
+from app.models import Inventory
+
+def test_second_lookup_is_served_from_cache(app):
+    calls = []
+    compute = lambda: calls.append(1) or {'predictions': [1.0]}
+    
+    assert ForecastCache.get_or_compute(1, 1, 7, compute) == {'predictions': [1.0]}
+    assert ForecastCache.get_or_compute(1, 1, 7, compute) == {'predictions': [1.0]}
+    assert len(calls) == 1
+
+def test_invalidate_only_affects_that_item(app):
+    calls = []
+    compute = lambda: calls.append(1) or {'predictions': [1.0]}
+    ForecastCache.get_or_compute(1, 1, 7, compute)
+    ForecastCache.get_or_compute(1, 2, 7, compute)
+    
+    ForecastCache.invalidate(1, 1)
+    ForecastCache.get_or_compute(1, 1, 7, compute)
+    ForecastCache.get_or_compute(1, 2, 7, compute)
+    assert len(calls) == 3
+
+def test_usage_write_invalidates_the_item_forecast(orphanage, seed_usage):
+    seed_usage(30)
+    inventory = Inventory.query.filter_by(orphanage_id=orphanage.id).first()
+    before = ForecastCache.get_version(orphanage.id, inventory.item_id)
+    forecasting_engine.predict_usage(orphanage.id, inventory.item_id)
+    
+    assert InventoryService.log_daily_usage(orphanage.id, inventory.item_id, 3)['success']
+    assert ForecastCache.get_version(orphanage.id, inventory.item_id) != before
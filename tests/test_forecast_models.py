@@ -0,0 +1,78 @@
+import json
+from datetime import date, datetime, timedelta
+import pytest
+from app.ai_forecasting import ForecastingEngine, forecasting_engine
+from app.forecast_models import ForecastModelService
+from app.forecast_state import ForecastStateService
+from app.models import Inventory, ForecastModel
+
+@pytest.fixture
+def item_id(orphanage):
+    return Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+
+def _store(db, orphanage_id, item_id, method='linear', coefficients=(2.0, 0.0, 0.0), accuracy=1.0):
+    model = ForecastModel(
+        orphanage_id=orphanage_id, item_id=item_id, method=method, coefficients=json.dumps(list(coefficients)),
+        origin_date=date.today(), accuracy=accuracy, confidence='medium', residual_ewma=0.0, residual_count=0,
+        stale=False, selected_at=datetime.utcnow()
+    )
+    db.session.add(model)
+    db.session.commit()
+    return model
+
+def test_stored_selection_is_reused_across_forecasts(orphanage, item_id, seed_usage, monkeypatch):
+    seed_usage(40)
+    selections = []
+    select_model = ForecastingEngine.select_model
+    monkeypatch.setattr(ForecastingEngine, 'select_model',
+                        lambda self, *args: selections.append(args) or select_model(self, *args))
+    
+    forecasting_engine.predict_usage(orphanage.id, item_id, 7)
+    forecasting_engine.predict_usage(orphanage.id, item_id, 14)
+    forecasting_engine.predict_usage_stored(orphanage.id, [item_id], 30)
+    assert len(selections) == 1
+    
+    ForecastModel.query.filter_by(item_id=item_id).update({'stale': True})
+    forecasting_engine.predict_usage_stored(orphanage.id, [item_id], 30)
+    assert len(selections) == 2
+
+@pytest.mark.parametrize('residual, stale', [(1.9, False), (2.1, True)])
+def test_drift_compares_rmse_with_the_in_sample_rmse(db, orphanage, item_id, residual, stale):
+    model = _store(db, orphanage.id, item_id, accuracy=1.0)
+    days = [date.today() - timedelta(days=k) for k in range(3)]
+    
+    ForecastModelService.record_actuals(orphanage.id, item_id, {day: 2.0 + residual for day in days})
+    
+    assert model.residual_count == 3
+    assert model.residual_ewma == pytest.approx(residual ** 2)
+    assert model.stale is stale
+
+def test_writes_refit_the_stored_method_from_the_state(db, orphanage, item_id, seed_usage):
+    seed_usage(40)
+    state = ForecastStateService.rebuild(orphanage.id, item_id)
+    model = _store(db, orphanage.id, item_id, method='polynomial',
+                   coefficients=ForecastStateService.fit(state, method='polynomial')['coefficients'], accuracy=100)
+    
+    state.sum_y += 5.0  # Stand-in for a usage write folded into the state
+    ForecastModelService.record_actuals(orphanage.id, item_id, {date.today(): 3.0}, state)
+    
+    assert not model.stale and model.method == 'polynomial'
+    assert json.loads(model.coefficients) == pytest.approx(ForecastStateService.fit(state, method='polynomial')['coefficients'])
+
+def test_average_model_is_reselected_once_there_is_enough_data(db, orphanage, item_id, seed_usage):
+    seed_usage(40)
+    state = ForecastStateService.rebuild(orphanage.id, item_id)
+    model = _store(db, orphanage.id, item_id, method='average', coefficients=(2.0,), accuracy=None)
+    
+    ForecastModelService.record_actuals(orphanage.id, item_id, {date.today(): 2.0}, state)
+    
+    assert model.stale
+    assert ForecastModelService.needs_selection(model)
+
+def test_reselect_replaces_stale_and_missing_models(orphanage, seed_usage):
+    seed_usage(40)
+    assert ForecastModelService.reselect(forecasting_engine) == Inventory.query.count()
+    assert ForecastModelService.reselect(forecasting_engine) == 0
+    
+    ForecastModel.query.limit(1).one().stale = True
+    assert ForecastModelService.reselect(forecasting_engine) == 1
@@ -0,0 +1,38 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from app.ai_forecasting import forecasting_engine
+from app.forecast_snapshots import ForecastSnapshotService, SNAPSHOT_HORIZON_DAYS
+from app.services import InventoryService
+from app.models import Inventory, ForecastSnapshot
+
+def test_precompute_stores_the_engine_forecast_of_every_item(orphanage, seed_usage):
+    seed_usage(40)
+    
+    result = ForecastSnapshotService.precompute(workers=1)
+    
+    inventories = Inventory.query.all()
+    assert result['snapshots_written'] == len(inventories)
+    for inventory in inventories:
+        snapshot = ForecastSnapshotService.get_fresh(inventory.orphanage_id, inventory.item_id)
+        forecast = forecasting_engine.predict_usage(inventory.orphanage_id, inventory.item_id, SNAPSHOT_HORIZON_DAYS)
+        assert json.loads(snapshot.predictions) == pytest.approx(forecast['predictions'])
+
+def test_usage_written_after_the_snapshot_makes_it_stale(orphanage, seed_usage):
+    seed_usage(40)
+    ForecastSnapshotService.precompute(workers=1)
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    assert ForecastSnapshotService.get_fresh(orphanage.id, item_id) is not None
+    
+    InventoryService.log_daily_usage(orphanage.id, item_id, 2.0)
+    assert ForecastSnapshotService.get_fresh(orphanage.id, item_id) is None
+
+def test_precompute_prunes_snapshots_past_retention(app, orphanage, db):
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    db.session.add(ForecastSnapshot(
+        orphanage_id=orphanage.id, item_id=item_id, horizon_days=30, predictions='[]',
+        computed_at=datetime.utcnow() - timedelta(days=app.config['FORECAST_SNAPSHOT_RETENTION_DAYS'] + 1)
+    ))
+    db.session.commit()
+    
+    assert ForecastSnapshotService.precompute(workers=1)['snapshots_pruned'] == 1
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.forecast_state import ForecastStateService, SUM_COLUMNS
+from app.services import InventoryService
+from app.usage_series import UsageSeries
+from app.models import Inventory, ForecastState
+
+STATE_COLUMNS = SUM_COLUMNS + ('sum_yy', 'log_count')
+
+def _snapshot(state):
+    return {column: getattr(state, column) for column in STATE_COLUMNS + ('anchor_date', 'first_date')}
+
+def test_incremental_updates_match_a_full_rebuild(orphanage, seed_usage):
+    seed_usage(40)
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    ForecastStateService.rebuild(orphanage.id, item_id)
+    today = date.today()
+    
+    # New, backdated, rewritten and older-than-history logs
+    InventoryService.log_daily_usage(orphanage.id, item_id, 3.0)
+    InventoryService.log_daily_usage(orphanage.id, item_id, 1.5, usage_date=today - timedelta(days=5))
+    InventoryService.log_daily_usage(orphanage.id, item_id, 4.0, usage_date=today - timedelta(days=5))
+    InventoryService.log_daily_usage(orphanage.id, item_id, 2.0, usage_date=today - timedelta(days=45))
+    InventoryService.update_stock(orphanage.id, item_id, 1.0, operation='subtract')
+    incremental = _snapshot(ForecastState.query.filter_by(orphanage_id=orphanage.id, item_id=item_id).one())
+    
+    rebuilt = _snapshot(ForecastStateService.rebuild(orphanage.id, item_id))
+    assert incremental == pytest.approx(rebuilt)
+
+def test_shifting_the_anchor_matches_a_rebuild(app, orphanage, seed_usage):
+    seed_usage(20)
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    state = ForecastStateService.rebuild(orphanage.id, item_id)
+    
+    # Decay the sums ten days forward, as if today's write came ten days later
+    ForecastStateService._shift(state, state.anchor_date + timedelta(days=10))
+    shifted = _snapshot(state)
+    
+    decay = ForecastStateService._decay(state.half_life_days)
+    series = UsageSeries.load(orphanage.id, [item_id], state.first_date, date.today())
+    u = (series.day_number - (series.n_days - 1) - 10).astype(float)
+    w = series.day_of_week.astype(float)
+    y = series.row(item_id) * decay ** -u
+    expected = dict(zip(SUM_COLUMNS, [y.sum(), (y * u).sum(), (y * w).sum(),
+                                      (y * u * u).sum(), (y * u * w).sum(), (y * w * w).sum()]))
+    assert {column: shifted[column] for column in SUM_COLUMNS} == pytest.approx(expected)
+
+@pytest.mark.parametrize('method, n_features', [('linear', 3), ('polynomial', 6)])
+def test_fit_matches_weighted_least_squares_on_the_history(orphanage, seed_usage, method, n_features):
+    seed_usage(40)
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    state = ForecastStateService.rebuild(orphanage.id, item_id)
+    
+    fitted = ForecastStateService.fit(state, method=method)
+    
+    series = UsageSeries.load(orphanage.id, [item_id], state.first_date, date.today())
+    u = (series.day_number - (series.n_days - 1)).astype(float)
+    w = series.day_of_week.astype(float)
+    X = np.column_stack([np.ones_like(u), u, w, u * u, u * w, w * w])[:, :n_features]
+    sqrt_weights = np.sqrt(ForecastStateService._decay(state.half_life_days) ** -u)
+    coef = np.linalg.lstsq(X * sqrt_weights[:, None], series.row(item_id) * sqrt_weights, rcond=None)[0]
+    
+    assert fitted['method'] == method
+    assert fitted['origin_date'] == date.today()
+    np.testing.assert_allclose(X @ fitted['coefficients'], X @ coef, atol=1e-6)
+
+def test_fit_falls_back_to_the_average_without_enough_history(orphanage, db):
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    InventoryService.log_daily_usage(orphanage.id, item_id, 4.0)
+    
+    fitted = ForecastStateService.fit(ForecastState.query.filter_by(orphanage_id=orphanage.id, item_id=item_id).one())
+    assert fitted['method'] == 'average'
+    assert fitted['coefficients'] == pytest.approx([8.0])  # The log plus update_stock's consumption log
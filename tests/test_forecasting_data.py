@@ -0,0 +1,37 @@
+import pytest
+from app.ai_forecasting import ForecastingEngine, forecasting_engine
+from app.services import InventoryService
+from app.models import Inventory
+
+@pytest.fixture
+def fits(monkeypatch):
+    """Count the engine's usage fits"""
+    calls = []
+    fit_and_predict = ForecastingEngine._fit_and_predict
+    def counting(self, orphanage_id, item_id, forecast_days):
+        calls.append((item_id, forecast_days))
+        return fit_and_predict(self, orphanage_id, item_id, forecast_days)
+    monkeypatch.setattr(ForecastingEngine, '_fit_and_predict', counting)
+    return calls
+
+def test_forecasting_data_fits_once(orphanage, seed_usage, fits):
+    seed_usage(60)
+    inventory = Inventory.query.filter_by(orphanage_id=orphanage.id).first()
+    
+    data = InventoryService.get_forecasting_data(orphanage.id, inventory.item_id)
+    
+    assert fits == [(inventory.item_id, 30)]
+    month = forecasting_engine.predict_usage(orphanage.id, inventory.item_id, 30)
+    assert data['usage_prediction']['predictions'] == month['predictions'][:7]
+    assert data['usage_prediction']['monthly_predicted'] == pytest.approx(month['total_predicted'])
+    assert data['reorder_recommendation']['predicted_monthly_usage'] == pytest.approx(month['total_predicted'])
+
+def test_slice_forecast_matches_shorter_horizon(orphanage, seed_usage):
+    seed_usage(60)
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    
+    month = forecasting_engine.predict_usage(orphanage.id, item_id, 30)
+    week = forecasting_engine.slice_forecast(month, 7)
+    assert week['predictions'] == forecasting_engine.predict_usage(orphanage.id, item_id, 7)['predictions']
+    with pytest.raises(ValueError):
+        forecasting_engine.slice_forecast(week, 30)
@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+import numpy as np
+from sklearn.preprocessing import PolynomialFeatures
+from app.ai_forecasting import forecasting_engine
+from app.forecast_models import ForecastModelService, design_matrix
+
+def test_design_matrix_follows_polynomial_features_columns():
+    X = np.array([[0, 3], [5, 6], [12, 1]], dtype=float)
+    
+    np.testing.assert_allclose(design_matrix(X[:, 0], X[:, 1], 2), PolynomialFeatures(2).fit_transform(X))
+    np.testing.assert_allclose(design_matrix(X[:, 0], X[:, 1], 1), np.column_stack([np.ones(3), X]))
+
+def test_future_features_continue_day_numbers_and_weekdays(app):
+    features = forecasting_engine._future_features(29, 10)
+    
+    assert features[:, 0].tolist() == list(range(30, 40))
+    assert features[:, 1].tolist() == [(date.today() + timedelta(days=d)).weekday() for d in range(1, 11)]
+
+def test_horizon_evaluation_matches_the_per_day_formula():
+    origin = date.today() - timedelta(days=20)
+    coefficients = [2.0, 0.1, -0.3, 0.002, 0.01, 0.05]
+    days = [date.today() + timedelta(days=d) for d in range(1, 15)]
+    
+    expected = []
+    for day in days:
+        d, w = (day - origin).days, day.weekday()
+        expected.append(max(np.dot(coefficients, [1, d, w, d * d, d * w, w * w]), 0))
+    np.testing.assert_allclose(ForecastModelService.evaluate_fit(coefficients, origin, days), expected)
@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.ai_forecasting import forecasting_engine, tsb_forecast, zero_day_ratio, INTERMITTENT_METHOD
+from app.models import Inventory, Item, UsageLog
+
+def _tsb_reference(values, alpha, beta):
+    """Scalar TSB recurrence for one series"""
+    occurred = [v > 0 for v in values]
+    p = sum(occurred) / len(values)
+    z = sum(v for v in values if v > 0) / sum(occurred) if any(occurred) else 0.0
+    fitted = []
+    for v, o in zip(values, occurred):
+        fitted.append(p * z)
+        p += beta * (o - p)
+        if o:
+            z += alpha * (v - z)
+    return p * z, fitted
+
+def test_vectorized_tsb_matches_the_scalar_recurrence():
+    rng = np.random.default_rng(0)
+    values = np.where(rng.random((5, 40)) < 0.3, rng.uniform(1, 6, (5, 40)), 0)
+    values[4] = 0  # Never used
+    
+    rates, fitted = tsb_forecast(values, alpha=0.2, beta=0.15)
+    
+    for i, row in enumerate(values):
+        rate, row_fitted = _tsb_reference(row.tolist(), 0.2, 0.15)
+        assert rates[i] == pytest.approx(rate)
+        np.testing.assert_allclose(fitted[i], row_fitted)
+
+def test_zero_day_ratio_counts_days_without_usage():
+    assert zero_day_ratio([[0, 1, 0, 3], [2, 2, 2, 2]]).tolist() == [0.5, 0.0]
+
+def test_mostly_zero_items_are_forecast_with_tsb(orphanage, seed_usage, db):
+    seed_usage(31)
+    sporadic = Item(name='Syringes', category='Medicine', unit='pieces')
+    db.session.add(sporadic)
+    db.session.flush()
+    db.session.add(Inventory(orphanage_id=orphanage.id, item_id=sporadic.id, quantity=40, minimum_level=10))
+    for offset in (2, 9, 16, 23, 30):
+        db.session.add(UsageLog(orphanage_id=orphanage.id, item_id=sporadic.id,
+                                date=date.today() - timedelta(days=offset), quantity_used=6))
+    db.session.commit()
+    
+    batch = forecasting_engine.predict_usage_batch(orphanage.id, forecast_days=7)
+    
+    assert batch[sporadic.id]['method'] == INTERMITTENT_METHOD
+    assert len(set(batch[sporadic.id]['predictions'])) == 1  # Flat daily rate
+    food = [inv.item_id for inv in Inventory.query.join(Item).filter(Item.category == 'Food')]
+    assert all(batch[item_id]['method'] in ('linear', 'polynomial') for item_id in food)
+    
+    selected = forecasting_engine.select_model(orphanage.id, sporadic.id)
+    assert selected['method'] == INTERMITTENT_METHOD
+    assert selected['coefficients'] == pytest.approx([batch[sporadic.id]['predictions'][0]])
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+import pytest
+from app.alert_scheduler import AlertScheduler, ALERT_JOB
+from app.job_scheduler import JobScheduler
+from app.models import Inventory, Alert, ScheduledJob
+
+class RecordingScheduler(JobScheduler):
+    job_name = 'test_job'
+    interval_setting = 'TEST_JOB_INTERVAL'
+    default_interval = timedelta(hours=1)
+    
+    def __init__(self, owner=None, during_run=None):
+        super().__init__(owner)
+        self.runs = []
+        self.during_run = during_run
+    
+    def run(self, last_run_at):
+        self.runs.append(last_run_at)
+        if self.during_run:
+            self.during_run(self)
+        return {'ok': True}
+
+def _job(name='test_job'):
+    return ScheduledJob.query.filter_by(name=name).one()
+
+def test_runs_once_per_interval_unless_forced(app):
+    scheduler = RecordingScheduler()
+    
+    assert scheduler.run_if_due() == {'ok': True}
+    assert scheduler.run_if_due() is None
+    assert scheduler.run_if_due(force=True) == {'ok': True}
+    assert len(scheduler.runs) == 2
+    assert _job().lease_owner is None
+
+def test_watermark_is_the_start_of_the_previous_run(app):
+    scheduler = RecordingScheduler()
+    before = datetime.utcnow()
+    scheduler.run_if_due()
+    watermark = _job().last_run_at
+    
+    scheduler.run_if_due(force=True)
+    assert before <= watermark <= datetime.utcnow()
+    assert scheduler.runs == [None, watermark]
+
+def test_a_live_lease_blocks_other_workers_until_it_expires(app, db):
+    holder = RecordingScheduler(owner='a')
+    other = RecordingScheduler(owner='b')
+    assert holder.acquire_lease()
+    
+    assert other.run_if_due(force=True) is None
+    
+    _job().lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert other.run_if_due(force=True) == {'ok': True}
+
+def test_renewal_extends_the_lease_during_a_run(app):
+    expiries = []
+    scheduler = RecordingScheduler(during_run=lambda s: (s.renew_lease(), expiries.append(_job().lease_expires_at)))
+    
+    started = datetime.utcnow()
+    scheduler.run_if_due()
+    assert expiries[0] >= started + app.config['ALERT_LEASE_TIMEOUT']
+
+def test_a_run_that_lost_its_lease_stops_and_keeps_the_watermark(app, db):
+    def taken_over(scheduler):
+        # The lease lapsed and another worker took it mid-run
+        db.session.query(ScheduledJob).filter_by(name='test_job').update({'lease_owner': 'b'})
+        db.session.commit()
+        scheduler.renew_lease()
+    scheduler = RecordingScheduler(owner='a', during_run=taken_over)
+    
+    with pytest.raises(RuntimeError):
+        scheduler.run_if_due()
+    assert _job().last_run_at is None and _job().lease_owner == 'b'
+
+def test_alert_runs_scan_only_rows_changed_since_the_watermark(orphanage, db):
+    scheduler = AlertScheduler(owner='a')
+    assert scheduler.run_if_due()['full_scan']
+    
+    inventory = Inventory.query.filter_by(orphanage_id=orphanage.id).first()
+    inventory.quantity = 0
+    db.session.commit()
+    result = scheduler.run_if_due(force=True)
+    
+    assert not result['full_scan']
+    assert result['alerts_created'] == 1
+    assert Alert.query.filter_by(item_id=inventory.item_id, alert_type='critical_stock').count() == 1
+    assert _job(ALERT_JOB).lease_owner is None
@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+BOOT_SCRIPT = r'''
+import json, sys
+from app import create_app
+app = create_app('testing')
+loaded = [module for module in ('numpy', 'pandas', 'sklearn') if module in sys.modules]
+with app.test_request_context():
+    from app.lazy_forecasting import forecasting_engine, is_loaded
+    before = is_loaded()
+    forecasting_engine.default_forecast_days
+print(json.dumps({'loaded_at_boot': loaded, 'loaded_before_use': before,
+                  'loaded_after_use': 'sklearn' in sys.modules}))
+'''
+
+def test_app_boot_does_not_import_the_forecasting_stack():
+    output = subprocess.run(
+        [sys.executable, '-c', BOOT_SCRIPT], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    
+    assert result == {'loaded_at_boot': [], 'loaded_before_use': False, 'loaded_after_use': True}
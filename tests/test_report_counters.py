@@ -0,0 +1,66 @@
+from datetime import date
+from app.report_counters import ReportCounterService
+from app.services import InventoryService
+from app.models import Orphanage, Inventory, Item, UsageLog, OrphanageStats
+
+def _counted(orphanage_id):
+    inventories = Inventory.query.filter_by(orphanage_id=orphanage_id).all()
+    return {
+        'total_items': len(inventories),
+        'low_stock_count': sum(inv.is_low_stock() for inv in inventories),
+        'usage_log_count': UsageLog.query.filter_by(orphanage_id=orphanage_id).count()
+    }
+
+def _stored(orphanage_id):
+    stats = OrphanageStats.query.filter_by(orphanage_id=orphanage_id).one()
+    return {'total_items': stats.total_items, 'low_stock_count': stats.low_stock_count,
+            'usage_log_count': stats.usage_log_count}
+
+def test_orm_writes_keep_the_counters_exact(orphanage, db, seed_usage):
+    other = Orphanage(name='Second Home', location='Pune')
+    db.session.add(other)
+    db.session.commit()
+    seed_usage(10)
+    
+    inventory = Inventory.query.filter_by(orphanage_id=orphanage.id).first()
+    inventory.quantity = 0
+    item = Item(name='Blankets', category='Bedding', unit='pieces')
+    db.session.add(item)
+    db.session.flush()
+    db.session.add(Inventory(orphanage_id=other.id, item_id=item.id, quantity=1, minimum_level=5))
+    db.session.delete(UsageLog.query.first())
+    moved = UsageLog.query.filter_by(orphanage_id=orphanage.id).first()
+    moved.orphanage_id = other.id
+    db.session.commit()
+    InventoryService.log_daily_usage(orphanage.id, inventory.item_id, 1.0, usage_date=date.today())
+    
+    for orphanage_id in (orphanage.id, other.id):
+        assert _stored(orphanage_id) == _counted(orphanage_id)
+
+def test_network_summary_reads_the_counters(orphanage, seed_usage, count_queries):
+    seed_usage(10)
+    
+    with count_queries() as statements:
+        stats = InventoryService.get_report_summary_stats()
+    
+    assert len(statements) == 2
+    assert stats == {
+        'total_items': Inventory.query.count(),
+        'low_stock_count': sum(inv.is_low_stock() for inv in Inventory.query.all()),
+        'total_usage_logs': UsageLog.query.count(),
+        'total_orphanages': 1
+    }
+
+def test_rebuild_counters_repairs_bulk_writes(app, orphanage, db):
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    db.session.execute(db.insert(UsageLog), [
+        {'orphanage_id': orphanage.id, 'item_id': item_id, 'date': date.today(), 'quantity_used': 1.0}
+    ] * 3)
+    db.session.commit()
+    assert _stored(orphanage.id) != _counted(orphanage.id)
+    
+    result = app.test_cli_runner().invoke(args=['reports', 'rebuild-counters'])
+    
+    assert result.exit_code == 0
+    assert _stored(orphanage.id) == _counted(orphanage.id)
+    assert ReportCounterService.rebuild(orphanage.id) == 1
@@ -0,0 +1,79 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, timedelta
+import pytest
+from app.report_export import ReportExportService, USAGE_COLUMNS
+from app.models import Inventory, UsageLog
+
+@pytest.fixture
+def noted_usage(db, seed_usage):
+    """Seeded usage plus a few logs with multibyte notes"""
+    seed_usage(20)
+    inv = Inventory.query.first()
+    for offset, notes in enumerate(['café «déjà vu»', 'naïve 日本語', 'emoji 🍎🍞', 'plain, with "quotes"']):
+        db.session.add(UsageLog(orphanage_id=inv.orphanage_id, item_id=inv.item_id,
+                                date=date.today() - timedelta(days=offset), quantity_used=1.5, notes=notes))
+    db.session.commit()
+
+def _export(*args, **kwargs):
+    return b''.join(ReportExportService.stream(*args, **kwargs))
+
+def test_chunks_are_bounded_in_utf8_bytes(app):
+    app.config.update(EXPORT_FLUSH_BYTES=100, EXPORT_FLUSH_SECONDS=3600)
+    line = 'é' * 30 + '\n'  # 31 characters, 61 bytes
+    lines = [line] * 9
+    
+    chunks = list(ReportExportService._chunks(iter(lines)))
+    
+    # The first line goes out alone, then two lines (122 bytes) reach the
+    # 100 byte limit; counting characters would have needed four
+    assert [len(chunk) for chunk in chunks] == [61, 122, 122, 122, 122]
+    assert b''.join(chunks) == ''.join(lines).encode('utf-8')
+    for chunk in chunks:
+        chunk.decode('utf-8')  # Never split inside a character
+
+def test_csv_export_matches_rows(noted_usage, app):
+    app.config.update(EXPORT_FLUSH_BYTES=256)
+    logs = UsageLog.query.order_by(UsageLog.date, UsageLog.id).all()
+    
+    rows = list(csv.reader(io.StringIO(_export('usage', 'csv').decode('utf-8'))))
+    
+    assert tuple(rows[0]) == USAGE_COLUMNS
+    assert [int(row[0]) for row in rows[1:]] == [log.id for log in logs]
+    notes = {int(row[0]): row[USAGE_COLUMNS.index('notes')] for row in rows[1:]}
+    assert {notes[log.id] for log in logs if log.notes} == {log.notes for log in logs if log.notes}
+
+def test_jsonl_export_scoped_by_orphanage_and_dates(noted_usage, orphanage):
+    start_date, end_date = date.today() - timedelta(days=10), date.today() - timedelta(days=2)
+    logs = UsageLog.query.filter(UsageLog.orphanage_id == orphanage.id, UsageLog.date >= start_date,
+                                 UsageLog.date <= end_date).order_by(UsageLog.date, UsageLog.id).all()
+    
+    records = [json.loads(line) for line in
+               _export('usage', 'jsonl', orphanage.id, start_date, end_date).decode('utf-8').splitlines()]
+    
+    assert [record['id'] for record in records] == [log.id for log in logs]
+    assert all(record['orphanage_name'] == orphanage.name for record in records)
+    assert {record['notes'] for record in records if record['notes']} == {'emoji 🍎🍞', 'plain, with "quotes"'}
+
+def test_gzip_export_decompresses_to_plain_export(noted_usage, app):
+    app.config.update(EXPORT_FLUSH_BYTES=512)
+    for dataset in ('usage', 'inventory'):
+        assert gzip.decompress(_export(dataset, 'csv', compress=True)) == _export(dataset, 'csv')
+
+def test_export_route(noted_usage, client):
+    response = client.get('/reports/export?dataset=usage&format=jsonl')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert len(response.get_data().splitlines()) == UsageLog.query.count()
+    
+    response = client.get('/reports/export?dataset=inventory&gzip=true')
+    assert response.mimetype == 'application/gzip'
+    assert len(gzip.decompress(response.get_data()).splitlines()) == Inventory.query.count() + 1
+
+@pytest.mark.parametrize('query', ['format=xml', 'dataset=orders', 'start_date=yesterday'])
+def test_export_route_rejects_bad_arguments(client, query):
+    response = client.get(f'/reports/export?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
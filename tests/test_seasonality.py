@@ -0,0 +1,43 @@
+import json
+import numpy as np
+import pytest
+from app.seasonality import SeasonalityService
+from app.services import InventoryService
+from app.usage_series import UsageSeries
+from app.models import Inventory, SeasonalityProfile
+
+def test_factors_match_zero_filled_daily_averages(orphanage, seed_usage):
+    seed_usage(60)
+    SeasonalityService.refresh()
+    
+    for profile in SeasonalityProfile.query.all():
+        series = UsageSeries.load(orphanage.id, [profile.item_id], profile.first_date, profile.last_date)
+        usage = series.row(profile.item_id)
+        weekdays = series.day_of_week
+        expected = [usage[weekdays == day].mean() / usage.mean() for day in range(7)]
+        assert json.loads(profile.weekday_factors) == pytest.approx(expected, abs=1e-4)
+        
+        months = np.array([day.month for day in series.dates()])
+        monthly = json.loads(profile.monthly_factors)
+        for month in set(months):
+            assert monthly[month - 1] == pytest.approx(usage[months == month].mean() / usage.mean(), abs=1e-4)
+
+def test_refresh_only_recomputes_items_written_since(orphanage, seed_usage):
+    seed_usage(30)
+    assert SeasonalityService.refresh()['full']
+    
+    assert SeasonalityService.refresh()['items_checked'] == 0
+    
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    InventoryService.log_daily_usage(orphanage.id, item_id, 2.0)
+    result = SeasonalityService.refresh()
+    assert not result['full']
+    assert result['items_checked'] == result['profiles_refreshed'] == 1
+
+def test_patterns_need_enough_history(orphanage, seed_usage):
+    seed_usage(20)
+    SeasonalityService.refresh()
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    
+    patterns = SeasonalityService.get_patterns(orphanage.id, item_id)
+    assert patterns['weekly_patterns'] == {} and not patterns['has_seasonal_pattern']
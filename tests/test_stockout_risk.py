@@ -0,0 +1,75 @@
+from datetime import date
+import pytest
+from app.ai_forecasting import forecasting_engine
+from app.forecast_models import ForecastModelService
+from app.stockout_risk import StockoutRiskService, StockoutRiskScheduler
+from app.stockout_simulation import StockoutSimulator
+from app.services import InventoryService
+from app.models import Inventory, StockoutRisk
+
+@pytest.fixture
+def simulations(monkeypatch):
+    """Record the number of items of every simulate call"""
+    calls = []
+    simulate = StockoutSimulator.simulate
+    def recording(self, forecasts, history, stock):
+        calls.append(len(forecasts))
+        return simulate(self, forecasts, history, stock)
+    monkeypatch.setattr(StockoutSimulator, 'simulate', recording)
+    return calls
+
+def test_rebuild_simulates_each_chunk_in_one_call(orphanage, seed_usage, simulations):
+    seed_usage(40)
+    n_items = Inventory.query.count()
+    
+    assert StockoutRiskService.rebuild(chunk_size=5) == n_items
+    
+    assert simulations == [5, n_items - 5]
+    assert StockoutRisk.query.count() == n_items
+
+def test_rebuild_queries_do_not_grow_with_the_items(orphanage, seed_usage, count_queries):
+    seed_usage(40)
+    ForecastModelService.reselect(forecasting_engine)
+    first = Inventory.query.first()
+    key = (first.orphanage_id, first.item_id)
+    
+    with count_queries() as one_item:
+        StockoutRiskService.rebuild(items=[key])
+    with count_queries() as all_items:
+        StockoutRiskService.rebuild()
+    assert len(all_items) == len(one_item)
+
+def test_stock_writes_refresh_the_item_entry(orphanage, seed_usage):
+    seed_usage(40)
+    StockoutRiskService.rebuild()
+    inventory = Inventory.query.filter_by(orphanage_id=orphanage.id).first()
+    
+    InventoryService.update_stock(orphanage.id, inventory.item_id, 1000, operation='set')
+    
+    entry = StockoutRisk.query.filter_by(orphanage_id=orphanage.id, item_id=inventory.item_id).one()
+    assert entry.current_stock == 1000
+    assert entry.stockout_date is None and entry.stockout_probability_7d == 0
+
+def test_top_ranks_by_stockout_date(orphanage, seed_usage, db):
+    seed_usage(40)
+    for inventory in Inventory.query.all():
+        inventory.quantity = 5
+    db.session.commit()
+    StockoutRiskService.rebuild()
+    
+    top = StockoutRiskService.top(orphanage.id, limit=3)
+    
+    assert 0 < len(top) <= 3
+    assert [entry.stockout_date for entry in top] == sorted(entry.stockout_date for entry in top)
+    assert all(entry.stockout_date >= date.today() for entry in top)
+
+def test_reselection_and_the_scheduler_refresh_entries(orphanage, seed_usage):
+    seed_usage(40)
+    StockoutRiskService.rebuild()
+    computed = {entry.id: entry.computed_at for entry in StockoutRisk.query.all()}
+    
+    ForecastModelService.reselect(forecasting_engine, force=True)
+    assert all(entry.computed_at > computed[entry.id] for entry in StockoutRisk.query.all())
+    
+    result = StockoutRiskScheduler(owner='test').run_if_due(force=True)
+    assert result['items_rebuilt'] == Inventory.query.count()
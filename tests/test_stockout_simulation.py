@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from app import stockout_simulation
+from app.stockout_simulation import StockoutSimulator
+from app.ai_forecasting import forecasting_engine
+from app.models import Inventory
+
+def _inputs(n_items=4, horizon=30, seed=1):
+    rng = np.random.default_rng(seed)
+    forecasts = rng.uniform(1, 4, size=(n_items, horizon))
+    history = rng.gamma(2.0, 1.5, size=(n_items, 30))
+    stock = rng.uniform(20, 80, size=n_items)
+    return forecasts, history, stock
+
+def test_constant_usage_runs_out_on_the_projected_day():
+    simulator = StockoutSimulator(n_paths=200, seed=0)
+    
+    probabilities, quantile_days = simulator.simulate([[2.0] * 10], [[3.0] * 30], [9.0])
+    
+    assert probabilities[0].tolist() == [0, 0, 0, 0, 1, 1, 1, 1, 1, 1]
+    assert quantile_days[0].tolist() == [5, 5, 5]
+
+def test_probabilities_match_a_per_path_simulation():
+    forecasts, history, stock = _inputs(n_items=1, horizon=20)
+    n_paths = 300
+    
+    probabilities, quantile_days = StockoutSimulator(n_paths=n_paths, seed=7).simulate(forecasts, history, stock)
+    
+    # The same bootstrap draws, one path at a time
+    draws = np.random.default_rng(7).integers(0, history.shape[1], size=(n_paths, 20))
+    deviations = history[0] - history[0].mean()
+    stockout_days = []
+    for path in draws:
+        remaining = stock[0]
+        day = None
+        for d in range(20):
+            remaining -= max(forecasts[0, d] + deviations[path[d]], 0)
+            if remaining <= 0:
+                day = d + 1
+                break
+        stockout_days.append(day if day is not None else np.inf)
+    expected = [np.mean(np.array(stockout_days) <= d) for d in range(1, 21)]
+    np.testing.assert_allclose(probabilities[0], expected, atol=1e-6)
+    
+    for q, day in zip((0.1, 0.5, 0.9), quantile_days[0]):
+        if np.isnan(day):
+            assert max(expected) < q
+        else:
+            assert expected[int(day) - 1] >= q and (day == 1 or expected[int(day) - 2] < q)
+
+def test_curves_are_monotonic_and_quantiles_ordered():
+    forecasts, history, stock = _inputs(n_items=6)
+    
+    probabilities, quantile_days = StockoutSimulator(n_paths=500, seed=3).simulate(forecasts, history, stock)
+    
+    assert (np.diff(probabilities, axis=1) >= 0).all()
+    finite = ~np.isnan(quantile_days).any(axis=1)
+    assert (np.diff(quantile_days[finite], axis=1) >= 0).all()
+
+def test_items_share_random_numbers_across_batches_and_chunks(monkeypatch):
+    forecasts, history, stock = _inputs(n_items=5)
+    
+    together = StockoutSimulator(n_paths=400, seed=11).simulate(forecasts, history, stock)
+    alone = StockoutSimulator(n_paths=400, seed=11).simulate(forecasts[2:3], history[2:3], stock[2:3])
+    monkeypatch.setattr(stockout_simulation, 'MAX_CELLS_PER_CHUNK', 400 * 30)  # One item per chunk
+    chunked = StockoutSimulator(n_paths=400, seed=11).simulate(forecasts, history, stock)
+    
+    np.testing.assert_array_equal(together[0][2], alone[0][0])
+    np.testing.assert_array_equal(together[0], chunked[0])
+    np.testing.assert_array_equal(together[1], chunked[1])
+
+def test_forecast_context_simulates_its_whole_horizon(orphanage, seed_usage):
+    seed_usage(40)
+    item_id = Inventory.query.filter_by(orphanage_id=orphanage.id).first().item_id
+    
+    stockout = forecasting_engine.context(orphanage.id, item_id, horizon=30).stockout()
+    
+    assert len(stockout['stock_levels']) == 7
+    assert stockout['simulated_days'] == len(stockout['stockout_probabilities']) == 30
+    assert set(stockout['scenarios']) == {'optimistic', 'realistic', 'pessimistic'}
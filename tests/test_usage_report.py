@@ -0,0 +1,56 @@
+from collections import defaultdict
+from datetime import date, timedelta
+import pytest
+from app.services import InventoryService
+from app.models import UsageLog
+
+@pytest.fixture
+def period(seed_usage):
+    seed_usage(70)
+    return date.today() - timedelta(days=60), date.today() - timedelta(days=5)
+
+def _logs(orphanage_id, start_date, end_date):
+    return UsageLog.query.filter(UsageLog.orphanage_id == orphanage_id,
+                                 UsageLog.date >= start_date, UsageLog.date <= end_date).all()
+
+@pytest.mark.parametrize('granularity, period_start', [
+    ('day', lambda day: day),
+    ('week', lambda day: day - timedelta(days=day.weekday())),
+    ('month', lambda day: day.replace(day=1))
+])
+def test_report_matches_python_aggregation(orphanage, period, granularity, period_start):
+    start_date, end_date = period
+    
+    report = InventoryService.generate_usage_report(orphanage.id, start_date, end_date, granularity, per_page=100)
+    
+    logs = _logs(orphanage.id, start_date, end_date)
+    totals = defaultdict(float)
+    buckets = defaultdict(lambda: defaultdict(float))
+    for log in logs:
+        totals[log.item.name] += log.quantity_used
+        buckets[log.item.name][period_start(log.date)] += log.quantity_used
+    
+    assert report['total_logs'] == len(logs)
+    assert report['total_items'] == len(totals)
+    assert {name: usage['total_used'] for name, usage in report['item_usage'].items()} == pytest.approx(totals)
+    for name, usage in report['item_usage'].items():
+        series = {bucket['period_start']: bucket['quantity'] for bucket in usage['usage_series']}
+        assert list(series) == sorted(buckets[name])
+        assert series == pytest.approx(dict(buckets[name]))
+
+def test_pages_list_the_largest_consumers_first(orphanage, period):
+    start_date, end_date = period
+    
+    pages = [InventoryService.generate_usage_report(orphanage.id, start_date, end_date, page=page, per_page=3)
+             for page in (1, 2, 3)]
+    
+    assert pages[0]['pages'] == 3
+    totals = [usage['total_used'] for page in pages for usage in page['item_usage'].values()]
+    assert len(totals) == pages[0]['total_items']
+    assert totals == sorted(totals, reverse=True)
+
+def test_unknown_granularity_is_rejected(client, orphanage):
+    assert client.get('/api/reports/usage?granularity=hour').status_code == 400
+    
+    response = client.get(f'/api/reports/usage?orphanage_id={orphanage.id}&granularity=week')
+    assert response.status_code == 200 and response.get_json()['granularity'] == 'week'
@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+import numpy as np
+from app.usage_series import UsageSeries
+from app.models import Inventory, UsageLog
+
+def test_series_matches_naive_daily_sums(orphanage, seed_usage, db):
+    seed_usage(40)
+    today = date.today()
+    start = today - timedelta(days=30)
+    item_ids = [inv.item_id for inv in Inventory.query.filter_by(orphanage_id=orphanage.id)]
+    # A second log on a day already logged is summed into that day
+    db.session.add(UsageLog(orphanage_id=orphanage.id, item_id=item_ids[0], date=today, quantity_used=2.5))
+    db.session.commit()
+    
+    series = UsageSeries.load(orphanage.id, item_ids, start, today)
+    
+    expected = np.zeros((len(item_ids), 31))
+    for log in UsageLog.query.filter(UsageLog.orphanage_id == orphanage.id, UsageLog.date >= start):
+        expected[item_ids.index(log.item_id), (log.date - start).days] += log.quantity_used
+    np.testing.assert_allclose(series.values, expected)
+    assert series.dates()[0] == start and series.dates()[-1] == today
+    assert list(series.day_of_week) == [day.weekday() for day in series.dates()]
+
+def test_items_without_logs_are_zero_rows(orphanage):
+    series = UsageSeries.load(orphanage.id, [1, 2, 1], date.today() - timedelta(days=6))
+    
+    assert series.item_ids == [1, 2]
+    assert series.values.shape == (2, 7)
+    assert not series.values.any() and not series.has_data.any()